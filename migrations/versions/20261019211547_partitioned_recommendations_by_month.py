@@ -0,0 +1,98 @@
+"""partitioned_recommendations_by_month
+
+Revision ID: 8f1c27a4d5b9
+Revises: 0b6f93d2e7c5
+Create Date: 2026-10-19 21:15:47.391026
+
+"""
+from datetime import timedelta
+
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = "8f1c27a4d5b9"
+down_revision = "0b6f93d2e7c5"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Name of primary key index should be freed for new table
+    op.execute(
+        "ALTER TABLE recommendations "
+        "RENAME CONSTRAINT recommendations_pkey TO recommendations_old_pkey"
+    )
+    op.rename_table("recommendations", "recommendations_old")
+
+    op.create_table(
+        "recommendations",
+        sa.Column("trial_id", postgresql.UUID(), nullable=False),
+        sa.Column("created_at", postgresql.TIMESTAMP(), nullable=False),
+        sa.Column("user_id", sa.BIGINT(), nullable=False),
+        sa.Column("item_id", sa.BIGINT(), nullable=False),
+        sa.Column("rank", sa.SMALLINT(), nullable=False),
+        sa.ForeignKeyConstraint(
+            ["trial_id"],
+            ["trials.trial_id"],
+        ),
+        sa.PrimaryKeyConstraint("trial_id", "created_at", "user_id", "item_id"),
+        postgresql_partition_by="RANGE (created_at)",
+    )
+
+    months = op.get_bind().execute(
+        """
+        SELECT DISTINCT date_trunc('month', t.created_at)::DATE
+        FROM recommendations_old r
+            JOIN trials t on r.trial_id = t.trial_id
+        """
+    )
+    for (month,) in months:
+        next_month = (month.replace(day=28) + timedelta(days=4)).replace(day=1)
+        op.execute(
+            f"""
+            CREATE TABLE recommendations_p{month:%Y%m}
+            PARTITION OF recommendations
+            FOR VALUES FROM ('{month.isoformat()}') TO ('{next_month.isoformat()}')
+            """
+        )
+
+    op.execute(
+        """
+        INSERT INTO recommendations (trial_id, created_at, user_id, item_id, rank)
+        SELECT r.trial_id, t.created_at, r.user_id, r.item_id, r.rank
+        FROM recommendations_old r
+            JOIN trials t on r.trial_id = t.trial_id
+        """
+    )
+    op.drop_table("recommendations_old")
+
+
+def downgrade():
+    op.create_table(
+        "recommendations_old",
+        sa.Column("trial_id", postgresql.UUID(), nullable=False),
+        sa.Column("user_id", sa.BIGINT(), nullable=False),
+        sa.Column("item_id", sa.BIGINT(), nullable=False),
+        sa.Column("rank", sa.SMALLINT(), nullable=False),
+        sa.ForeignKeyConstraint(
+            ["trial_id"],
+            ["trials.trial_id"],
+        ),
+        sa.PrimaryKeyConstraint("trial_id", "user_id", "item_id", name="recommendations_old_pkey"),
+    )
+    op.execute(
+        """
+        INSERT INTO recommendations_old (trial_id, user_id, item_id, rank)
+        SELECT trial_id, user_id, item_id, rank
+        FROM recommendations
+        """
+    )
+    # Partitions are dropped together with partitioned table
+    op.drop_table("recommendations")
+    op.rename_table("recommendations_old", "recommendations")
+    op.execute(
+        "ALTER TABLE recommendations "
+        "RENAME CONSTRAINT recommendations_old_pkey TO recommendations_pkey"
+    )
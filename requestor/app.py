@@ -1,12 +1,15 @@
 import asyncio
+import typing as tp
 
 from aiogram import Bot, Dispatcher
-from aiogram.utils.executor import start_webhook
+from aiogram.utils.executor import set_webhook
+from aiohttp import web
 from sqlalchemy.exc import OperationalError
 
 from migrations.utils import upgrade_db
 from requestor.bot import create_bot
 from requestor.bot.events import make_on_shutdown_handler, make_on_startup_handler
+from requestor.leaderboard import register_leaderboard_routes
 from requestor.log import app_logger, setup_logging
 from requestor.services import App
 from requestor.settings import Env, config
@@ -21,20 +24,38 @@ async def run_with_polling(bot: Bot, dp: Dispatcher, app: App) -> None:
         await make_on_shutdown_handler(bot, app)(dp)
 
 
+def make_health_handler(app: App) -> tp.Callable[[web.Request], tp.Awaitable[web.Response]]:
+    async def health_h(request: web.Request) -> web.Response:
+        # DB service is recreated on startup, so it's taken on every request
+        if not app.db_service.is_ready:
+            raise web.HTTPServiceUnavailable()
+        return web.json_response({"status": "ok"})
+
+    return health_h
+
+
 def run_with_webhook(bot: Bot, dp: Dispatcher, app: App) -> None:
     webhook_path_pattern = config.telegram_config.webhook_path_pattern
     webhook_path = webhook_path_pattern.format(bot_token=config.telegram_config.bot_token)
     webhook_url = config.telegram_config.webhook_host + webhook_path
 
-    start_webhook(
+    web_app = web.Application()
+    # Ready only after DB connections are opened and hot queries are prepared
+    web_app.router.add_get("/health", make_health_handler(app))
+    if app.leaderboard_file_sink is not None:
+        register_leaderboard_routes(
+            web_app, app.leaderboard_file_sink, config.leaderboard_config.files_path_prefix
+        )
+
+    executor = set_webhook(
         dispatcher=dp,
         webhook_path=webhook_path,
         skip_updates=True,
         on_startup=make_on_startup_handler(bot, app, webhook_url, config),
         on_shutdown=make_on_shutdown_handler(bot, app),
-        host=config.telegram_config.host,
-        port=config.telegram_config.port,
+        web_app=web_app,
     )
+    executor.run_app(host=config.telegram_config.host, port=config.telegram_config.port)
 
 
 def run_app():
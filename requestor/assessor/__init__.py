@@ -1,3 +1,9 @@
+from .segments import Segmentation, make_activity_segmentation, make_popularity_segmentation
 from .service import AssessorService
 
-__all__ = ("AssessorService",)
+__all__ = (
+    "AssessorService",
+    "Segmentation",
+    "make_activity_segmentation",
+    "make_popularity_segmentation",
+)
@@ -0,0 +1,83 @@
+import typing as tp
+
+import numpy as np
+import pandas as pd
+from pydantic import BaseModel  # pylint: disable=no-name-in-module
+from rectools import Columns
+
+
+class Segmentation(BaseModel):
+    """
+    Split of users into segments.
+
+    `codes` contains segment number for every user of sorted `users`,
+    so breakdown for any per-user metric is just a grouped reduction
+    over precomputed arrays after aligning metric users with them.
+    """
+
+    name: str
+    labels: tp.List[str]
+    users: np.ndarray
+    codes: np.ndarray
+    sizes: np.ndarray
+
+    class Config:
+        arbitrary_types_allowed = True
+
+    @classmethod
+    def from_codes(
+        cls, name: str, labels: tp.List[str], users: np.ndarray, codes: np.ndarray
+    ) -> "Segmentation":
+        sizes = np.bincount(codes, minlength=len(labels))
+        return cls(name=name, labels=labels, users=users, codes=codes, sizes=sizes)
+
+    def reduce_mean(self, users: np.ndarray, values: np.ndarray) -> np.ndarray:
+        """Average `values` of `users` by segments, in any order of users"""
+        if users.shape != self.users.shape or values.shape != users.shape:
+            raise ValueError("Values should be given for every user of segmentation")
+
+        positions = np.minimum(np.searchsorted(self.users, users), self.users.size - 1)
+        is_matched = np.array_equal(self.users[positions], users)
+        if not is_matched or np.unique(positions).size != positions.size:
+            raise ValueError("Users don't match users of segmentation")
+
+        codes = self.codes[positions]
+        sums = np.bincount(codes, weights=values, minlength=len(self.labels))
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return sums / self.sizes
+
+
+def _make_bounds_labels(bounds: tp.List[int]) -> tp.List[str]:
+    labels = []
+    for low, high in zip([1] + bounds, bounds):
+        labels.append(str(low) if high - low == 1 else f"{low}-{high - 1}")
+    labels.append(f"{bounds[-1]}+" if bounds else "1+")
+    return labels
+
+
+def make_activity_segmentation(interactions: pd.DataFrame, bounds: tp.List[int]) -> Segmentation:
+    """Split users by number of interactions, `bounds` are segments starts"""
+    if sorted(bounds) != bounds or (bounds and bounds[0] <= 1):
+        raise ValueError("Bounds should be sorted and greater than 1")
+
+    n_interactions = interactions.groupby(Columns.User).size()
+    codes = np.searchsorted(bounds, n_interactions.values, side="right")
+    return Segmentation.from_codes(
+        "activity", _make_bounds_labels(bounds), n_interactions.index.values, codes
+    )
+
+
+def make_popularity_segmentation(
+    interactions: pd.DataFrame, quantiles: tp.List[float]
+) -> Segmentation:
+    """Split users by quantiles of mean popularity of their items"""
+    if sorted(quantiles) != quantiles or any(not 0 < q < 1 for q in quantiles):
+        raise ValueError("Quantiles should be sorted and lie in (0, 1) interval")
+
+    item_popularity = interactions.groupby(Columns.Item)[Columns.User].transform("size")
+    user_popularity = item_popularity.groupby(interactions[Columns.User]).mean()
+    codes = np.searchsorted(np.quantile(user_popularity.values, quantiles), user_popularity.values)
+
+    percents = [0] + [round(q * 100) for q in quantiles] + [100]
+    labels = [f"{low}-{high}%" for low, high in zip(percents, percents[1:])]
+    return Segmentation.from_codes("popularity", labels, user_popularity.index.values, codes)
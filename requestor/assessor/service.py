@@ -1,18 +1,25 @@
 import typing as tp
 
+import numpy as np
 import pandas as pd
 from asgiref.sync import sync_to_async
 from pydantic import BaseModel  # pylint: disable=no-name-in-module
 from rectools import Columns
 from rectools.metrics import calc_metrics
+from rectools.metrics.base import merge_reco
+from rectools.metrics.classification import TP, calc_confusions
 
 from requestor.gunner import UserRecoResponse
-from requestor.models import Metric
+from requestor.models import Comparison, Metric, SegmentMetric, UserMetrics
 from requestor.settings import config
 
+from .segments import Segmentation
+from .stats import bootstrap_confidence_interval, paired_bootstrap_test
+
 
 class AssessorService(BaseModel):
     interactions: pd.DataFrame
+    segmentations: tp.List[Segmentation] = []
 
     class Config:
         arbitrary_types_allowed = True
@@ -34,17 +41,130 @@ class AssessorService(BaseModel):
             ],
         )
 
-    async def estimate_recos(self, recos: pd.DataFrame) -> tp.List[Metric]:
-        return await sync_to_async(self._estimate_recos)(recos)
+    async def calc_user_metrics(self, recos: pd.DataFrame) -> UserMetrics:
+        return await sync_to_async(self._calc_user_metrics)(recos)
+
+    def _calc_user_metrics(self, recos: pd.DataFrame) -> UserMetrics:
+        ap = self._calc_main_metric_per_user(recos)
+        merged = merge_reco(recos, self.interactions)
+        hits = calc_confusions(merged, config.assessor_config.reco_size)[TP]
+
+        users = ap.index.values
+        return UserMetrics(users=users, ap=ap.values, hits=hits.reindex(users).values)
+
+    def _calc_main_metric_per_user(self, recos: pd.DataFrame) -> pd.Series:
+        assessor_config = config.assessor_config
+        metric = assessor_config.metrics[assessor_config.main_metric_name]
+        return metric.calc_per_user(reco=recos, interactions=self.interactions)
+
+    async def estimate_recos(
+        self, recos: pd.DataFrame, user_metrics: tp.Optional[UserMetrics] = None
+    ) -> tp.List[Metric]:
+        return await sync_to_async(self._estimate_recos)(recos, user_metrics)
 
-    def _estimate_recos(self, recos: pd.DataFrame) -> tp.List[Metric]:
-        quality: tp.Dict[str, float] = calc_metrics(
-            metrics=config.assessor_config.metrics,
-            reco=recos,
-            interactions=self.interactions,
+    def _estimate_recos(
+        self, recos: pd.DataFrame, user_metrics: tp.Optional[UserMetrics] = None
+    ) -> tp.List[Metric]:
+        assessor_config = config.assessor_config
+        main_metric_name = assessor_config.main_metric_name
+        other_metrics = {
+            name: metric
+            for name, metric in assessor_config.metrics.items()
+            if name != main_metric_name
+        }
+
+        if user_metrics is None:
+            main_metric_per_user = self._calc_main_metric_per_user(recos).values
+        else:
+            main_metric_per_user = user_metrics.ap
+
+        ci_low, ci_high = bootstrap_confidence_interval(
+            main_metric_per_user,
+            n_samples=assessor_config.bootstrap_n_samples,
+            confidence_level=assessor_config.confidence_level,
+            batch_size=assessor_config.bootstrap_batch_size,
+            random_state=assessor_config.random_state,
         )
-        metric_data = []
-        for metric_name, metric_value in quality.items():
-            metric_data.append(Metric(name=metric_name, value=metric_value))
+        metric_data = [
+            Metric(
+                name=main_metric_name,
+                value=main_metric_per_user.mean(),
+                ci_low=ci_low,
+                ci_high=ci_high,
+            )
+        ]
+
+        if other_metrics:
+            quality: tp.Dict[str, float] = calc_metrics(
+                metrics=other_metrics,
+                reco=recos,
+                interactions=self.interactions,
+            )
+            for metric_name, metric_value in quality.items():
+                metric_data.append(Metric(name=metric_name, value=metric_value))
 
         return metric_data
+
+    def rescore_recos(self, recos: pd.DataFrame) -> tp.Tuple[UserMetrics, tp.List[Metric]]:
+        """
+        Calculate user metrics and metrics of prepared recommendations
+        synchronously, so it can be run in worker processes
+        """
+        user_metrics = self._calc_user_metrics(recos)
+        return user_metrics, self._estimate_recos(recos, user_metrics)
+
+    async def compare_user_metrics(
+        self, user_metrics_a: UserMetrics, user_metrics_b: UserMetrics
+    ) -> Comparison:
+        return await sync_to_async(self._compare_user_metrics)(user_metrics_a, user_metrics_b)
+
+    def _compare_user_metrics(
+        self, user_metrics_a: UserMetrics, user_metrics_b: UserMetrics
+    ) -> Comparison:
+        assessor_config = config.assessor_config
+
+        if np.array_equal(user_metrics_a.users, user_metrics_b.users):
+            ap_a, ap_b = user_metrics_a.ap, user_metrics_b.ap
+        else:
+            _, idx_a, idx_b = np.intersect1d(
+                user_metrics_a.users,
+                user_metrics_b.users,
+                assume_unique=True,
+                return_indices=True,
+            )
+            ap_a, ap_b = user_metrics_a.ap[idx_a], user_metrics_b.ap[idx_b]
+
+        delta, p_value, ci_low, ci_high = paired_bootstrap_test(
+            ap_a,
+            ap_b,
+            n_samples=assessor_config.bootstrap_n_samples,
+            confidence_level=assessor_config.confidence_level,
+            batch_size=assessor_config.bootstrap_batch_size,
+            random_state=assessor_config.random_state,
+        )
+        return Comparison(
+            metric_name=assessor_config.main_metric_name,
+            n_users=ap_a.size,
+            delta=delta,
+            p_value=p_value,
+            ci_low=ci_low,
+            ci_high=ci_high,
+        )
+
+    async def estimate_segments(self, user_metrics: UserMetrics) -> tp.List[SegmentMetric]:
+        return await sync_to_async(self._estimate_segments)(user_metrics)
+
+    def _estimate_segments(self, user_metrics: UserMetrics) -> tp.List[SegmentMetric]:
+        segment_metrics = []
+        for segmentation in self.segmentations:
+            values = segmentation.reduce_mean(user_metrics.users, user_metrics.ap)
+            for label, n_users, value in zip(segmentation.labels, segmentation.sizes, values):
+                segment_metrics.append(
+                    SegmentMetric(
+                        segmentation=segmentation.name,
+                        segment=label,
+                        n_users=n_users,
+                        value=value if n_users > 0 else None,
+                    )
+                )
+        return segment_metrics
@@ -0,0 +1,92 @@
+import typing as tp
+
+import numpy as np
+
+
+def _check_confidence_level(confidence_level: float) -> None:
+    if not 0 < confidence_level < 1:
+        raise ValueError("`confidence_level` should be in (0, 1) interval")
+
+
+def _percentile_interval(means: np.ndarray, confidence_level: float) -> tp.Tuple[float, float]:
+    alpha = (1 - confidence_level) / 2
+    low, high = np.quantile(means, [alpha, 1 - alpha])
+    return float(low), float(high)
+
+
+def bootstrap_means(
+    values: np.ndarray,
+    n_samples: int,
+    batch_size: int,
+    random_state: tp.Optional[int] = None,
+) -> np.ndarray:
+    """
+    Calculate means of `n_samples` bootstrap resamples of `values`.
+
+    Zeros don't contribute to resampled sums, so instead of drawing
+    `len(values)` indices per resample we draw only the number of hits
+    into non-zero values (it's binomial) and then the hits themselves
+    (they're uniform over non-zero values). Result has exactly the same
+    distribution as the plain bootstrap, but it's much cheaper for sparse
+    per-user metrics like AP where most of users have zero value.
+    """
+    if values.size == 0:
+        raise ValueError("Cannot bootstrap empty array")
+    if n_samples <= 0 or batch_size <= 0:
+        raise ValueError("`n_samples` and `batch_size` should be positive numbers")
+
+    rng = np.random.default_rng(random_state)
+    n_values = values.size
+    nonzero = values[values != 0].astype(np.float64)
+    if nonzero.size == 0:
+        return np.zeros(n_samples)
+
+    n_hits = rng.binomial(n_values, nonzero.size / n_values, size=n_samples)
+    sums = np.empty(n_samples)
+    for start in range(0, n_samples, batch_size):
+        batch_n_hits = n_hits[start : start + batch_size]
+        hits = rng.integers(0, nonzero.size, size=batch_n_hits.sum())
+        sample_ids = np.repeat(np.arange(batch_n_hits.size), batch_n_hits)
+        sums[start : start + batch_size] = np.bincount(
+            sample_ids, weights=nonzero[hits], minlength=batch_n_hits.size
+        )
+
+    return sums / n_values
+
+
+def bootstrap_confidence_interval(
+    values: np.ndarray,
+    n_samples: int,
+    confidence_level: float,
+    batch_size: int,
+    random_state: tp.Optional[int] = None,
+) -> tp.Tuple[float, float]:
+    """Percentile bootstrap confidence interval for the mean of `values`"""
+    _check_confidence_level(confidence_level)
+    means = bootstrap_means(values, n_samples, batch_size, random_state)
+    return _percentile_interval(means, confidence_level)
+
+
+def paired_bootstrap_test(
+    values_a: np.ndarray,
+    values_b: np.ndarray,
+    n_samples: int,
+    confidence_level: float,
+    batch_size: int,
+    random_state: tp.Optional[int] = None,
+) -> tp.Tuple[float, float, float, float]:
+    """
+    Paired bootstrap test for difference of `values_a` and `values_b` means.
+
+    Returns mean difference, two-sided p-value of the null hypothesis
+    that means are equal and bounds of the difference confidence interval.
+    """
+    if values_a.shape != values_b.shape:
+        raise ValueError("Paired values should have the same shape")
+    _check_confidence_level(confidence_level)
+
+    diff = values_a.astype(np.float64) - values_b.astype(np.float64)
+    means = bootstrap_means(diff, n_samples, batch_size, random_state)
+    p_value = min(1.0, 2 * min((means <= 0).mean(), (means >= 0).mean()))
+    low, high = _percentile_interval(means, confidence_level)
+    return float(diff.mean()), float(p_value), low, high
@@ -1,19 +1,47 @@
-import asyncio
+import base64
 import typing as tp
 from urllib.parse import urlsplit
+from uuid import UUID
 
 from aiogram import types
+from aiogram.types import InlineKeyboardButton, InlineKeyboardMarkup
+from aiogram.utils.callback_data import CallbackData
 from aiogram.utils.markdown import bold, escape_md, text
 from pydantic import ValidationError
 
-from requestor.db import DBService
-from requestor.google import GSService
-from requestor.models import Model, TeamInfo, TrialStatus
-from requestor.settings import TrialLimit
-
-from .constants import DATETIME_FORMAT
+from requestor.leaderboard import TeamRank
+from requestor.models import (
+    Comparison,
+    GlobalLeaderboardRow,
+    HistoryDirection,
+    Metric,
+    Model,
+    SegmentMetric,
+    TeamInfo,
+    TrialAdmission,
+    TrialRefusal,
+    TrialStatus,
+    TrialsHistoryPage,
+)
+from requestor.settings import TrialLimit, config
+
+from .constants import DATETIME_FORMAT, MODEL_NOT_FOUND_MSG, TEAM_NOT_FOUND_MSG
 from .exceptions import IncorrectValueError, InvalidURLError
 
+PRECISION: tp.Final = config.telegram_config.metric_by_assessor_display_precision
+CONFIDENCE_LEVEL: tp.Final = config.assessor_config.confidence_level
+
+# Telegram limits callback data to 64 bytes, so UUIDs are encoded compactly
+# and model is empty if history isn't filtered by model
+HISTORY_CALLBACK: tp.Final = CallbackData("history", "direction", "model", "cursor")
+
+TRIAL_STATUS_NAMES: tp.Final = {
+    TrialStatus.waiting: "в очереди",
+    TrialStatus.started: "в процессе",
+    TrialStatus.success: "успешно",
+    TrialStatus.failed: "неудачно",
+}
+
 
 def is_url_valid(url: str) -> bool:
     try:
@@ -84,26 +112,74 @@ def parse_msg_with_request_info(message: types.Message) -> str:
     raise ValueError()
 
 
-def validate_today_trial_stats(trial_stats: tp.Dict[TrialStatus, int]) -> None:
+def parse_msg_with_compare_info(message: types.Message) -> tp.Tuple[str, str]:
+    args = message.get_args().split()
+    n_args = len(args)
+
+    if n_args == 2:
+        return args[0], args[1]
+
+    raise ValueError()
+
+
+def parse_msg_with_leaderboard_info(message: types.Message) -> int:
+    """Number of top teams to show"""
+    telegram_config = config.telegram_config
+    args = message.get_args().split()
+    n_args = len(args)
+
+    if n_args == 0:
+        return telegram_config.leaderboard_display_limit
+    if n_args == 1 and args[0].isdigit():
+        n_teams = int(args[0])
+        if 0 < n_teams <= telegram_config.leaderboard_max_display_limit:
+            return n_teams
+
+    raise ValueError()
+
+
+def parse_msg_with_history_info(message: types.Message) -> tp.Optional[str]:
+    """Name of model to show history of, all team models if it's not set"""
+    args = message.get_args().split()
+    n_args = len(args)
+
+    if n_args == 0:
+        return None
+    if n_args == 1:
+        return args[0]
+
+    raise ValueError()
+
+
+def encode_uuid(value: UUID) -> str:
+    return base64.urlsafe_b64encode(value.bytes).decode().rstrip("=")
+
 
-    if trial_stats.get(TrialStatus.success, 0) >= TrialLimit.success:
-        raise ValueError(
+def decode_uuid(value: str) -> UUID:
+    return UUID(bytes=base64.urlsafe_b64decode(value + "=" * (-len(value) % 4)))
+
+
+def generate_trial_refusal_description(admission: TrialAdmission) -> str:
+    trial_stat = admission.today_trial_stat
+    descriptions = {
+        TrialRefusal.team_not_found: TEAM_NOT_FOUND_MSG,
+        TrialRefusal.model_not_found: MODEL_NOT_FOUND_MSG,
+        TrialRefusal.success_limit: (
             f"Вы уже совершили {TrialLimit.success} успешных попыток. "
             "Пожалуйста, подождите следующего дня."
-        )
-
-    if trial_stats.get(TrialStatus.waiting, 0) >= TrialLimit.waiting:
-        raise ValueError(
-            f"Количество моделей в очереди на проверку: {TrialStatus.waiting}, "
+        ),
+        TrialRefusal.waiting_limit: (
+            f"Количество моделей в очереди на проверку: "
+            f"{trial_stat.get(TrialStatus.waiting, 0)}, "
             f"предел: {TrialLimit.waiting}. "
             "Пожалуйста, подождите пока завершатся проверки этих моделей."
-        )
-
-    if trial_stats.get(TrialStatus.failed, 0) >= TrialLimit.failed:
-        raise ValueError(
+        ),
+        TrialRefusal.failed_limit: (
             f"Вы уже совершили {TrialLimit.failed} неудачных попыток. "
             "Пожалуйста, подождите следующего дня."
-        )
+        ),
+    }
+    return descriptions[admission.refusal]
 
 
 def generate_model_description(model: Model, model_num: int) -> str:
@@ -128,13 +204,98 @@ def generate_models_description(models: tp.List[Model]) -> str:
     return reply
 
 
-async def update_leaderboards(db_service: DBService, gs_service: GSService, metric: str) -> None:
-    async def update_global() -> None:
-        rows = await db_service.get_global_leaderboard(metric)
-        await gs_service.update_global_leaderboard(rows)
+def generate_metric_description(metric: Metric) -> str:
+    description = f"Результат {metric.name} = {metric.value:{PRECISION}f}"
+    if metric.ci_low is not None and metric.ci_high is not None:
+        description += (
+            f", {CONFIDENCE_LEVEL:.0%} доверительный интервал: "
+            f"[{metric.ci_low:{PRECISION}f}, {metric.ci_high:{PRECISION}f}]"
+        )
+    return description
 
-    async def update_by_model() -> None:
-        rows = await db_service.get_by_model_leaderboard(metric)
-        await gs_service.update_by_model_leaderboard(rows)
 
-    await asyncio.gather(update_global(), update_by_model())
+def generate_segments_description(segment_metrics: tp.List[SegmentMetric]) -> str:
+    segmentation_names = {"activity": "активности юзеров", "popularity": "популярности айтемов"}
+    lines = []
+    for segment_metric in segment_metrics:
+        segmentation = segmentation_names.get(
+            segment_metric.segmentation, segment_metric.segmentation
+        )
+        value = "-" if segment_metric.value is None else f"{segment_metric.value:{PRECISION}f}"
+        lines.append(
+            f"По {segmentation}, {segment_metric.segment} "
+            f"({segment_metric.n_users} юзеров): {value}"
+        )
+    return "\n".join(lines)
+
+
+def generate_comparison_description(
+    model_name_a: str, model_name_b: str, comparison: Comparison
+) -> str:
+    return text(
+        (
+            f"{comparison.metric_name}({model_name_a}) - {comparison.metric_name}({model_name_b}) "
+            f"= {comparison.delta:{PRECISION}f}"
+        ),
+        (
+            f"{CONFIDENCE_LEVEL:.0%} доверительный интервал: "
+            f"[{comparison.ci_low:{PRECISION}f}, {comparison.ci_high:{PRECISION}f}]"
+        ),
+        f"p-value: {comparison.p_value:.4f}",
+        f"Количество юзеров: {comparison.n_users}",
+        sep="\n",
+    )
+
+
+def generate_score_description(row: GlobalLeaderboardRow) -> str:
+    score = "-" if row.best_score is None else f"{row.best_score:{PRECISION}f}"
+    return f"{score} (попыток: {row.n_attempts})"
+
+
+def generate_leaderboard_description(rows: tp.List[GlobalLeaderboardRow], metric: str) -> str:
+    lines = [f"Лидерборд по {metric}:"]
+    for rank, row in enumerate(rows, 1):
+        lines.append(f"{rank}. {row.team_name}: {generate_score_description(row)}")
+    return "\n".join(lines)
+
+
+def generate_rank_description(team_rank: TeamRank, metric: str) -> str:
+    return text(
+        f"Место команды: {team_rank.rank} из {team_rank.n_teams}",
+        f"Лучший результат {metric}: {generate_score_description(team_rank.row)}",
+        sep="\n",
+    )
+
+
+def generate_history_description(page: TrialsHistoryPage, metric: str) -> str:
+    lines = []
+    for item in page.items:
+        created_at = item.created_at.strftime(DATETIME_FORMAT)
+        line = f"{created_at} {item.model_name}: {TRIAL_STATUS_NAMES[item.status]}"
+        if item.metric_value is not None:
+            line += f", {metric} = {item.metric_value:{PRECISION}f}"
+        lines.append(line)
+    return "\n".join(lines)
+
+
+def make_history_keyboard(
+    page: TrialsHistoryPage, model_id: tp.Optional[UUID]
+) -> tp.Optional[InlineKeyboardMarkup]:
+    model = encode_uuid(model_id) if model_id is not None else ""
+    buttons = []
+    if page.has_newer:
+        cursor = encode_uuid(page.items[0].trial_id)
+        callback_data = HISTORY_CALLBACK.new(
+            direction=HistoryDirection.newer.value, model=model, cursor=cursor
+        )
+        buttons.append(InlineKeyboardButton("« Новее", callback_data=callback_data))
+    if page.has_older:
+        cursor = encode_uuid(page.items[-1].trial_id)
+        callback_data = HISTORY_CALLBACK.new(
+            direction=HistoryDirection.older.value, model=model, cursor=cursor
+        )
+        buttons.append(InlineKeyboardButton("Старее »", callback_data=callback_data))
+
+    if not buttons:
+        return None
+    return InlineKeyboardMarkup(inline_keyboard=[buttons])
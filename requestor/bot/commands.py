@@ -120,6 +120,58 @@ commands_description = (
             sep="\n",
         ),
     ),
+    (
+        "compare",
+        "Сравнение двух моделей",
+        text(
+            "С помощью этой команды можно сравнить последние успешные попытки двух моделей.",
+            "Для этого на вход принимаются названия двух моделей через пробел.",
+            (
+                f"Выводится разница {config.assessor_config.main_metric_name} между моделями, "
+                "доверительный интервал для нее и p-value парного бутстреп-теста."
+            ),
+            "Сервис при этом повторно не запрашивается.",
+            "Пример использования команды:",
+            "/compare lightfm_64 popular",
+            sep="\n",
+        ),
+    ),
+    (
+        "leaderboard",
+        "Вывод лучших команд лидерборда",
+        text(
+            "С помощью этой команды можно вывести лучшие команды общего лидерборда.",
+            (
+                "Опционально на вход принимается количество команд, по умолчанию "
+                f"{config.telegram_config.leaderboard_display_limit}, не более "
+                f"{config.telegram_config.leaderboard_max_display_limit}."
+            ),
+            "Лидерборд обновляется с небольшой задержкой после новых попыток.",
+            "Пример использования команды:",
+            "/leaderboard 20",
+            sep="\n",
+        ),
+    ),
+    (
+        "history",
+        "История попыток команды",
+        text(
+            "С помощью этой команды можно посмотреть историю попыток команды.",
+            "Опционально на вход принимается название модели, чтобы вывести только ее попытки.",
+            (
+                f"Выводится по {config.telegram_config.history_page_size} попыток, "
+                "остальные можно пролистать кнопками под сообщением."
+            ),
+            "Пример использования команды:",
+            "/history lightfm_64",
+            sep="\n",
+        ),
+    ),
+    (
+        "rank",
+        "Вывод места команды в лидерборде",
+        "Выводит место вашей команды в общем лидерборде и лучший результат",
+    ),
 )
 
 cmd2cls_desc = {args[0]: CommandDescription(*args) for args in commands_description}
@@ -139,6 +191,10 @@ class BotCommands(Enum):
     add_model: CommandDescription = cmd2cls_desc["add_model"]
     show_models: CommandDescription = cmd2cls_desc["show_models"]
     request: CommandDescription = cmd2cls_desc["request"]
+    compare: CommandDescription = cmd2cls_desc["compare"]
+    leaderboard: CommandDescription = cmd2cls_desc["leaderboard"]
+    history: CommandDescription = cmd2cls_desc["history"]
+    rank: CommandDescription = cmd2cls_desc["rank"]
 
     @classmethod
     def get_bot_commands(cls) -> tp.List[BotCommand]:
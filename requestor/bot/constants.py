@@ -11,6 +11,15 @@ MODEL_NOT_FOUND_MSG: tp.Final = (
     "чтобы посмотреть список доступных моделей"
 )
 
+NO_SUCCESS_TRIALS_MSG: tp.Final = (
+    "У модели `{model_name}` пока нет успешных попыток. Воспользуйтесь командой /request"
+)
+
+NO_USER_METRICS_MSG: tp.Final = (
+    "Для последней успешной попытки модели `{model_name}` не сохранены метрики по юзерам. "
+    "Пожалуйста, запросите модель заново с помощью команды /request"
+)
+
 INCORRECT_DATA_IN_MSG: tp.Final = (
     "Пожалуйста, введите данные в корректном формате. Используйте команду /help для справки."
 )
@@ -19,4 +28,6 @@ TEAM_NOT_FOUND_MSG: tp.Final = (
     "Команда от вашего чата не найдена. Скорее всего, вы еще не регистрировались."
 )
 
+LEADERBOARD_NOT_READY_MSG: tp.Final = "Лидерборд еще не сформирован. Попробуйте позже."
+
 DATETIME_FORMAT: tp.Final = "%Y-%m-%d %H:%M:%S"
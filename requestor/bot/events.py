@@ -1,12 +1,12 @@
+import time
 import typing as tp
 
 from aiogram import Bot, Dispatcher
 
-from requestor.services import App, make_db_service
+from requestor.services import App, make_db_service, make_leaderboard_publisher
 
 from ..log import app_logger
 from ..settings import ServiceConfig
-from .bot_utils import update_leaderboards
 from .commands import BotCommands
 
 EventHandler = tp.Callable[[Dispatcher], tp.Coroutine[tp.Any, tp.Any, tp.Any]]
@@ -17,19 +17,26 @@ def make_on_startup_handler(
 ) -> EventHandler:
     async def on_startup(dispatcher: Dispatcher) -> None:
         app_logger.info("On startup handler started")
+        start = time.perf_counter()
         # Do initialization again because of asyncio/asyncpg error
         # https://github.com/sqlalchemy/sqlalchemy/issues/6409
         app.db_service = make_db_service(config)
+        app.leaderboard_publisher = make_leaderboard_publisher(
+            config,
+            app.db_service,
+            app.gs_service,
+            app.leaderboard_file_sink,
+            app.leaderboard_cache,
+        )
 
         await app.setup()
         await bot.set_my_commands(commands=BotCommands.get_bot_commands())
         if webhook_url is not None:
             await bot.set_webhook(webhook_url, drop_pending_updates=False)
 
-        await update_leaderboards(
-            app.db_service, app.gs_service, config.assessor_config.main_metric_name
-        )
-        app_logger.info("On startup handler finished")
+        # Initial sync runs in background when the bot is already ready
+        app.leaderboard_publisher.mark_dirty()
+        app_logger.info(f"On startup handler finished in {time.perf_counter() - start:.1f}s")
 
     return on_startup
 
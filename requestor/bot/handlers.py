@@ -15,8 +15,10 @@ from requestor.db import (
     DuplicatedModelError,
     DuplicatedTeamError,
     ModelNotFoundError,
+    RecosRepository,
     TeamNotFoundError,
     TokenNotFoundError,
+    TrialNotFoundError,
 )
 from requestor.gunner import (
     DuplicatedRecommendationsError,
@@ -29,31 +31,53 @@ from requestor.gunner import (
     RequestTimeoutError,
 )
 from requestor.log import app_logger
-from requestor.models import ModelInfo, ProgressNotifier, TeamInfo, Trial, TrialStatus
+from requestor.models import (
+    HistoryDirection,
+    ModelInfo,
+    ProgressNotifier,
+    Team,
+    TeamInfo,
+    Trial,
+    TrialStatus,
+)
 from requestor.services import App
 from requestor.settings import ServiceConfig, config
+from requestor.storage import UserMetricsNotFoundError
 from requestor.utils import utc_now
 
 from .bot_utils import (
+    HISTORY_CALLBACK,
+    decode_uuid,
+    generate_comparison_description,
+    generate_history_description,
+    generate_leaderboard_description,
+    generate_metric_description,
     generate_models_description,
+    generate_rank_description,
+    generate_segments_description,
+    generate_trial_refusal_description,
+    make_history_keyboard,
+    parse_msg_with_compare_info,
+    parse_msg_with_history_info,
+    parse_msg_with_leaderboard_info,
     parse_msg_with_model_info,
     parse_msg_with_request_info,
     parse_msg_with_team_info,
-    update_leaderboards,
     url_validator,
-    validate_today_trial_stats,
 )
 from .commands import BotCommands
 from .constants import (
     AVAILABLE_FOR_UPDATE,
     INCORRECT_DATA_IN_MSG,
+    LEADERBOARD_NOT_READY_MSG,
     MODEL_NOT_FOUND_MSG,
+    NO_SUCCESS_TRIALS_MSG,
+    NO_USER_METRICS_MSG,
     TEAM_NOT_FOUND_MSG,
 )
 from .exceptions import IncorrectValueError, InvalidURLError, TooManyRequestsError
 
 DELAY: tp.Final = config.telegram_config.delay_between_messages
-PRECISION: tp.Final = config.telegram_config.metric_by_assessor_display_precision
 
 LAST_MSG_TS_BY_CHAT: tp.Dict[int, datetime] = {}
 
@@ -105,6 +129,17 @@ async def handle(handler, app: App, message: types.Message) -> None:
     app_logger.info(f"Msg {msg_desc} handled")
 
 
+async def handle_callback(
+    handler, app: App, query: types.CallbackQuery, callback_data: tp.Dict[str, str]
+) -> None:
+    app_logger.info(f"Got callback {query.data} from chat {query.message.chat.id}")
+    try:
+        await handler(query, callback_data, app)
+    except Exception:  # pylint: disable=broad-except
+        app_logger.error(traceback.format_exc())
+        await query.answer("Что-то пошло не так. Попробуйте позже")
+
+
 async def start_h(message: types.Message, app: App) -> None:
     reply = text(
         "Привет! Я бот, который будет проверять сервисы",
@@ -277,31 +312,18 @@ async def show_models_h(message: types.Message, app: App) -> None:
 async def request_h(  # pylint: disable=too-many-branches, too-many-locals;  # noqa: C901
     message: types.Message, app: App
 ) -> None:
-    try:
-        team = await app.db_service.get_team_by_chat(message.chat.id)
-    except TeamNotFoundError:
-        return await message.reply(TEAM_NOT_FOUND_MSG)
-
     try:
         model_name = parse_msg_with_request_info(message)
     except ValueError:
         return await message.reply(INCORRECT_DATA_IN_MSG)
 
-    try:
-        model = await app.db_service.get_model_by_name(team.team_id, model_name)
-    except ModelNotFoundError:
-        return await message.reply(MODEL_NOT_FOUND_MSG)
-
-    today_trials = await app.db_service.get_team_today_trial_stat(team.team_id)
-
-    try:
-        validate_today_trial_stats(today_trials)
-    except ValueError as e:
-        return await message.reply(e)
+    admission = await app.db_service.admit_trial(message.chat.id, model_name)
+    if admission.refusal is not None:
+        return await message.reply(generate_trial_refusal_description(admission))
 
-    trial: Trial = await app.db_service.add_trial(
-        model_id=model.model_id, status=TrialStatus.waiting
-    )
+    # Team and trial are always set for admitted trial
+    team = tp.cast(Team, admission.team)
+    trial = tp.cast(Trial, admission.trial)
 
     message_to_update = await message.reply(
         "Заявку приняли, начинаем запрашивать рекомендации от сервиса."
@@ -347,22 +369,163 @@ async def request_h(  # pylint: disable=too-many-branches, too-many-locals;  # n
     await notifier.send_progress_update(reply)
 
     prepared_recos = await app.assessor_service.prepare_recos(raw_recos)
-    metrics_data = await app.assessor_service.estimate_recos(prepared_recos)
+    user_metrics = await app.assessor_service.calc_user_metrics(prepared_recos)
+    metrics_data = await app.assessor_service.estimate_recos(prepared_recos, user_metrics)
+
+    segment_metrics = await app.assessor_service.estimate_segments(user_metrics)
 
     for metric in metrics_data:
         if metric.name == config.assessor_config.main_metric_name:
             await asyncio.sleep(DELAY)
-            await notifier.send_progress_update(
-                f"Результат {metric.name} = {metric.value:{PRECISION}f}"
-            )
+            reply = generate_metric_description(metric)
+            if segment_metrics:
+                reply += "\n\n" + generate_segments_description(segment_metrics)
+            await notifier.send_progress_update(reply)
 
     await app.db_service.add_metrics(trial_id=trial.trial_id, metrics=metrics_data)
+    # Leaderboard depends only on metrics, so it doesn't wait for recos
+    app.leaderboard_publisher.mark_dirty()
+    await app.storage_service.save_user_metrics(trial.trial_id, user_metrics)
+    try:
+        await RecosRepository(db_service=app.db_service).add_recos(trial, prepared_recos)
+    except Exception as e:  # pylint: disable=broad-except
+        # Trial is already scored, recommendations are kept only for re-scoring
+        app_logger.error(f"Failed to save recommendations of trial {trial.trial_id}: {e!r}")
 
-    await update_leaderboards(
-        app.db_service, app.gs_service, config.assessor_config.main_metric_name
-    )
     await asyncio.sleep(DELAY)
-    await notifier.reply("Лидерборд обновлен, можете смотреть результаты.")
+    await notifier.reply("Результаты сохранены, лидерборд скоро обновится.")
+
+
+async def compare_h(  # noqa: C901 # pylint: disable=too-many-return-statements
+    message: types.Message, app: App
+) -> None:
+    try:
+        team = await app.db_service.get_team_by_chat(message.chat.id)
+    except TeamNotFoundError:
+        return await message.reply(TEAM_NOT_FOUND_MSG)
+
+    try:
+        model_names = parse_msg_with_compare_info(message)
+    except ValueError:
+        return await message.reply(INCORRECT_DATA_IN_MSG)
+
+    user_metrics = []
+    for model_name in model_names:
+        try:
+            model = await app.db_service.get_model_by_name(team.team_id, model_name)
+        except ModelNotFoundError:
+            return await message.reply(MODEL_NOT_FOUND_MSG)
+
+        try:
+            trial = await app.db_service.get_model_last_success_trial(model.model_id)
+        except TrialNotFoundError:
+            return await message.reply(NO_SUCCESS_TRIALS_MSG.format(model_name=model_name))
+
+        try:
+            user_metrics.append(await app.storage_service.load_user_metrics(trial.trial_id))
+        except UserMetricsNotFoundError:
+            return await message.reply(NO_USER_METRICS_MSG.format(model_name=model_name))
+
+    comparison = await app.assessor_service.compare_user_metrics(*user_metrics)
+    await message.reply(generate_comparison_description(*model_names, comparison))
+
+
+async def history_h(message: types.Message, app: App) -> None:
+    try:
+        model_name = parse_msg_with_history_info(message)
+    except ValueError:
+        return await message.reply(INCORRECT_DATA_IN_MSG)
+
+    try:
+        team = await app.db_service.get_team_by_chat(message.chat.id)
+    except TeamNotFoundError:
+        return await message.reply(TEAM_NOT_FOUND_MSG)
+
+    model_id = None
+    if model_name is not None:
+        try:
+            model = await app.db_service.get_model_by_name(team.team_id, model_name)
+        except ModelNotFoundError:
+            return await message.reply(MODEL_NOT_FOUND_MSG)
+        model_id = model.model_id
+
+    metric = config.assessor_config.main_metric_name
+    page = await app.db_service.get_trials_history(
+        team.team_id, metric, config.telegram_config.history_page_size, model_id
+    )
+    if len(page.items) == 0:
+        return await message.reply("Попыток пока нет. Воспользуйтесь командой /request")
+
+    await message.reply(
+        generate_history_description(page, metric),
+        reply_markup=make_history_keyboard(page, model_id),
+    )
+
+
+async def history_callback_h(
+    query: types.CallbackQuery, callback_data: tp.Dict[str, str], app: App
+) -> None:
+    # Team is taken from chat, so cursor of other team gives empty page
+    try:
+        team = await app.db_service.get_team_by_chat(query.message.chat.id)
+    except TeamNotFoundError:
+        return await query.answer(TEAM_NOT_FOUND_MSG)
+
+    model_id = decode_uuid(callback_data["model"]) if callback_data["model"] else None
+    metric = config.assessor_config.main_metric_name
+    page = await app.db_service.get_trials_history(
+        team.team_id,
+        metric,
+        config.telegram_config.history_page_size,
+        model_id,
+        cursor=decode_uuid(callback_data["cursor"]),
+        direction=HistoryDirection(callback_data["direction"]),
+    )
+    if len(page.items) == 0:
+        return await query.answer("Больше попыток нет")
+
+    await query.message.edit_text(
+        generate_history_description(page, metric),
+        reply_markup=make_history_keyboard(page, model_id),
+    )
+    await query.answer()
+
+
+async def leaderboard_h(message: types.Message, app: App) -> None:
+    try:
+        n_teams = parse_msg_with_leaderboard_info(message)
+    except ValueError:
+        return await message.reply(INCORRECT_DATA_IN_MSG)
+
+    cache = app.leaderboard_cache
+    if not cache.is_ready:
+        return await message.reply(LEADERBOARD_NOT_READY_MSG)
+
+    rows = cache.get_top(n_teams)
+    if len(rows) == 0:
+        return await message.reply("В лидерборде пока нет команд")
+
+    metric = config.assessor_config.main_metric_name
+    await message.reply(generate_leaderboard_description(rows, metric))
+
+
+async def rank_h(message: types.Message, app: App) -> None:
+    try:
+        team = await app.db_service.get_team_by_chat(message.chat.id)
+    except TeamNotFoundError:
+        return await message.reply(TEAM_NOT_FOUND_MSG)
+
+    cache = app.leaderboard_cache
+    if not cache.is_ready:
+        return await message.reply(LEADERBOARD_NOT_READY_MSG)
+
+    # Team registered after the last publication isn't in leaderboard yet
+    team_rank = cache.get_team_rank(team.description)
+    if team_rank is None:
+        return await message.reply(LEADERBOARD_NOT_READY_MSG)
+
+    metric = config.assessor_config.main_metric_name
+    await message.reply(generate_rank_description(team_rank, metric))
 
 
 async def other_messages_h(message: types.Message, app: App) -> None:
@@ -381,10 +544,18 @@ def register_handlers(dp: Dispatcher, app: App, service_config: ServiceConfig) -
         BotCommands.add_model.name: add_model_h,
         BotCommands.show_models.name: show_models_h,
         BotCommands.request.name: request_h,
+        BotCommands.compare.name: compare_h,
+        BotCommands.leaderboard.name: leaderboard_h,
+        BotCommands.history.name: history_h,
+        BotCommands.rank.name: rank_h,
     }
 
     for command, handler in command_handlers_mapping.items():
         # TODO: think of way to remove partial
         dp.register_message_handler(partial(handle, handler, app), commands=[command])
 
+    dp.register_callback_query_handler(
+        partial(handle_callback, history_callback_h, app), HISTORY_CALLBACK.filter()
+    )
+
     dp.register_message_handler(partial(handle, other_messages_h, app), regexp=rf"@{bot_name}")
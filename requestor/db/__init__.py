@@ -1,21 +1,26 @@
 from .exceptions import (
     DuplicatedMetricError,
     DuplicatedModelError,
+    DuplicatedRecommendationError,
     DuplicatedTeamError,
     ModelNotFoundError,
     TeamNotFoundError,
     TokenNotFoundError,
     TrialNotFoundError,
 )
+from .repositories import LeaderboardRepository, RecosRepository
 from .service import DBService
 
 __all__ = (
     "DuplicatedTeamError",
     "DuplicatedModelError",
     "DuplicatedMetricError",
+    "DuplicatedRecommendationError",
     "TeamNotFoundError",
     "ModelNotFoundError",
     "TrialNotFoundError",
     "TokenNotFoundError",
     "DBService",
+    "LeaderboardRepository",
+    "RecosRepository",
 )
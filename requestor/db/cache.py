@@ -0,0 +1,66 @@
+import time
+import typing as tp
+from collections import OrderedDict
+
+from pydantic import BaseModel  # pylint: disable=no-name-in-module
+
+K = tp.TypeVar("K")
+V = tp.TypeVar("V")
+
+
+class CacheStats(BaseModel):
+    hits: int
+    misses: int
+    size: int
+
+
+class TTLCache(tp.Generic[K, V]):
+    """
+    Bounded LRU cache which entries expire after `ttl` seconds.
+
+    It's not thread-safe, but it's fine for usage from event loop.
+    """
+
+    def __init__(self, max_size: int = 1024, ttl: float = 300) -> None:
+        if max_size <= 0 or ttl <= 0:
+            raise ValueError("`max_size` and `ttl` should be positive numbers")
+
+        self.max_size = max_size
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries: tp.OrderedDict[K, tp.Tuple[float, V]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: K) -> tp.Optional[V]:
+        entry = self._entries.get(key)
+        if entry is None or entry[0] < time.monotonic():
+            self._entries.pop(key, None)
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def set(self, key: K, value: V) -> None:
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+        self._entries.move_to_end(key)
+        if len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, key: K) -> None:
+        self._entries.pop(key, None)
+
+    def invalidate_where(self, predicate: tp.Callable[[V], bool]) -> None:
+        keys = [key for key, (_, value) in self._entries.items() if predicate(value)]
+        for key in keys:
+            del self._entries[key]
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def get_stats(self) -> CacheStats:
+        return CacheStats(hits=self.hits, misses=self.misses, size=len(self))
@@ -26,6 +26,10 @@ class DuplicatedMetricError(DuplicatedError):
     subject = "metric"
 
 
+class DuplicatedRecommendationError(DuplicatedError):
+    subject = "recommendation"
+
+
 class NotFoundError(Exception):
     pass
 
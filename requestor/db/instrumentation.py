@@ -0,0 +1,233 @@
+import bisect
+import time
+import typing as tp
+from collections import defaultdict
+
+from asyncpg import Pool, Record, create_pool
+from asyncpg.pool import PoolConnectionProxy
+from pydantic import BaseModel  # pylint: disable=no-name-in-module
+
+from requestor.log import app_logger
+
+from .cache import CacheStats
+
+# Upper bounds of latency buckets in seconds, the last bucket is unbounded
+LATENCY_BUCKETS: tp.Final = (
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+
+
+class HistogramStats(BaseModel):
+    # Number of observations by bucket upper bound, not cumulative
+    buckets: tp.Dict[float, int]
+    count: int
+    total: float
+
+
+class MethodStats(BaseModel):
+    latency: HistogramStats
+    n_errors: int
+    n_retries: int
+    n_slow: int
+
+
+class PoolStats(BaseModel):
+    max_size: int
+    # Connections acquired and not released yet
+    n_in_use: int
+    acquire_wait: HistogramStats
+
+
+class DBStats(BaseModel):
+    methods: tp.Dict[str, MethodStats]
+    pool: tp.Optional[PoolStats]
+    replica_pool: tp.Optional[PoolStats] = None
+    caches: tp.Dict[str, CacheStats] = {}
+
+
+class LatencyHistogram:
+    def __init__(self, buckets: tp.Sequence[float] = LATENCY_BUCKETS) -> None:
+        self.bounds = tuple(buckets) + (float("inf"),)
+        self.counts = [0] * len(self.bounds)
+        self.count = 0
+        self.total = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.total += value
+
+    def get_stats(self) -> HistogramStats:
+        return HistogramStats(
+            buckets=dict(zip(self.bounds, self.counts)),
+            count=self.count,
+            total=self.total,
+        )
+
+
+class DBInstrumentation:
+    """
+    Collects latencies, errors and retries of DB service methods
+    and wait time of pool connections acquiring.
+
+    Calls longer than `slow_query_threshold` seconds are logged.
+    """
+
+    def __init__(self, slow_query_threshold: float = 1) -> None:
+        if slow_query_threshold <= 0:
+            raise ValueError("`slow_query_threshold` should be positive number")
+
+        self.slow_query_threshold = slow_query_threshold
+        self.latencies: tp.DefaultDict[str, LatencyHistogram] = defaultdict(LatencyHistogram)
+        self.n_errors: tp.DefaultDict[str, int] = defaultdict(int)
+        self.n_retries: tp.DefaultDict[str, int] = defaultdict(int)
+        self.n_slow: tp.DefaultDict[str, int] = defaultdict(int)
+        self.acquire_wait = LatencyHistogram()
+
+    def observe_call(self, method: str, duration: float, failed: bool) -> None:
+        self.latencies[method].observe(duration)
+        if failed:
+            self.n_errors[method] += 1
+        if duration >= self.slow_query_threshold:
+            self.n_slow[method] += 1
+            app_logger.warning(f"Slow DB call: {method} took {duration:.3f}s")
+
+    def observe_retry(self, method: str) -> None:
+        self.n_retries[method] += 1
+
+    def observe_acquire(self, duration: float) -> None:
+        self.acquire_wait.observe(duration)
+
+    def get_method_stats(self) -> tp.Dict[str, MethodStats]:
+        return {
+            method: MethodStats(
+                latency=latency.get_stats(),
+                n_errors=self.n_errors[method],
+                n_retries=self.n_retries[method],
+                n_slow=self.n_slow[method],
+            )
+            for method, latency in self.latencies.items()
+        }
+
+
+class InstrumentedAcquireContext:
+    """
+    Same as context of `Pool.acquire`: connection is released on exit
+    if it's used as context manager, or can be awaited directly
+    """
+
+    def __init__(self, pool: "InstrumentedPool", timeout: tp.Optional[float]) -> None:
+        self.pool = pool
+        self.timeout = timeout
+        self.conn: tp.Optional[PoolConnectionProxy] = None
+
+    async def _acquire(self) -> PoolConnectionProxy:
+        start = time.perf_counter()
+        try:
+            conn = await self.pool.pool.acquire(timeout=self.timeout)
+        finally:
+            self.pool.instrumentation.observe_acquire(time.perf_counter() - start)
+        self.pool.n_in_use += 1
+        return conn
+
+    def __await__(self) -> tp.Generator[tp.Any, None, PoolConnectionProxy]:
+        return self._acquire().__await__()
+
+    async def __aenter__(self) -> PoolConnectionProxy:
+        self.conn = await self._acquire()
+        return self.conn
+
+    async def __aexit__(self, *exc_info: tp.Any) -> None:
+        conn, self.conn = self.conn, None
+        await self.pool.release(conn)
+
+
+class InstrumentedPool:
+    """
+    Wrapper of asyncpg pool which reports connections acquiring wait time
+    to instrumentation. Attributes which aren't overridden are taken
+    from the wrapped pool.
+    """
+
+    def __init__(self, pool: Pool, instrumentation: DBInstrumentation, max_size: int) -> None:
+        self.pool = pool
+        self.instrumentation = instrumentation
+        self.max_size = max_size
+        self.n_in_use = 0
+
+    def __getattr__(self, name: str) -> tp.Any:
+        return getattr(self.pool, name)
+
+    def __await__(self) -> tp.Generator[tp.Any, None, "InstrumentedPool"]:
+        return self._init().__await__()
+
+    async def _init(self) -> "InstrumentedPool":
+        await self.pool
+        return self
+
+    def acquire(self, *, timeout: tp.Optional[float] = None) -> InstrumentedAcquireContext:
+        return InstrumentedAcquireContext(self, timeout)
+
+    async def release(
+        self, connection: PoolConnectionProxy, *, timeout: tp.Optional[float] = None
+    ) -> None:
+        try:
+            await self.pool.release(connection, timeout=timeout)
+        finally:
+            self.n_in_use -= 1
+
+    # Query methods of pool acquire connections internally,
+    # so they're reimplemented with instrumented `acquire`
+
+    async def execute(self, query: str, *args: tp.Any, timeout: tp.Optional[float] = None) -> str:
+        async with self.acquire() as conn:
+            return await conn.execute(query, *args, timeout=timeout)
+
+    async def fetch(
+        self, query: str, *args: tp.Any, timeout: tp.Optional[float] = None
+    ) -> tp.List[Record]:
+        async with self.acquire() as conn:
+            return await conn.fetch(query, *args, timeout=timeout)
+
+    async def fetchrow(
+        self, query: str, *args: tp.Any, timeout: tp.Optional[float] = None
+    ) -> tp.Optional[Record]:
+        async with self.acquire() as conn:
+            return await conn.fetchrow(query, *args, timeout=timeout)
+
+    async def fetchval(
+        self, query: str, *args: tp.Any, column: int = 0, timeout: tp.Optional[float] = None
+    ) -> tp.Any:
+        async with self.acquire() as conn:
+            return await conn.fetchval(query, *args, column=column, timeout=timeout)
+
+    def get_stats(self) -> PoolStats:
+        return PoolStats(
+            max_size=self.max_size,
+            n_in_use=self.n_in_use,
+            acquire_wait=self.instrumentation.acquire_wait.get_stats(),
+        )
+
+
+def get_pool_stats(pool: tp.Optional[InstrumentedPool]) -> tp.Optional[PoolStats]:
+    return pool.get_stats() if pool is not None else None
+
+
+def create_instrumented_pool(
+    dsn: str, instrumentation: DBInstrumentation, *, max_size: int, **kwargs: tp.Any
+) -> InstrumentedPool:
+    """Same as `asyncpg.create_pool`, but acquiring wait time is reported"""
+    pool = create_pool(dsn, max_size=max_size, **kwargs)
+    return InstrumentedPool(pool, instrumentation, max_size)
@@ -31,7 +31,10 @@ class ModelsTable(Base):
 
     team = orm.relationship(TeamsTable)
 
-    __table_args__ = (Index("team_model_idx", "team_id", "name", unique=True),)
+    __table_args__ = (
+        Index("team_model_idx", "team_id", "name", unique=True),
+        Index("team_created_at_idx", "team_id", "created_at"),
+    )
 
 
 trial_status_enum = pg.ENUM(
@@ -52,6 +55,11 @@ class TrialsTable(Base):
 
     model = orm.relationship(ModelsTable)
 
+    __table_args__ = (
+        # History is ordered by (created_at, trial_id) within model
+        Index("model_created_at_idx", "model_id", "created_at", "trial_id"),
+    )
+
 
 class MetricsTable(Base):
     __tablename__ = "metrics"
@@ -59,6 +67,22 @@ class MetricsTable(Base):
     trial_id = Column(pg.UUID, ForeignKey(TrialsTable.trial_id), primary_key=True)
     name = Column(pg.VARCHAR(64), primary_key=True)
     value = Column(pg.FLOAT, nullable=False)
+    ci_low = Column(pg.FLOAT, nullable=True)
+    ci_high = Column(pg.FLOAT, nullable=True)
+
+
+class RecommendationsTable(Base):
+    """Partitioned by trial creation month, partitions are created on demand"""
+
+    __tablename__ = "recommendations"
+
+    trial_id = Column(pg.UUID, ForeignKey(TrialsTable.trial_id), primary_key=True)
+    created_at = Column(pg.TIMESTAMP, primary_key=True)
+    user_id = Column(pg.BIGINT, primary_key=True)
+    item_id = Column(pg.BIGINT, primary_key=True)
+    rank = Column(pg.SMALLINT, nullable=False)
+
+    __table_args__ = {"postgresql_partition_by": "RANGE (created_at)"}
 
 
 class TokensTable(Base):
@@ -66,3 +90,49 @@ class TokensTable(Base):
 
     token = Column(pg.VARCHAR(64), primary_key=True, nullable=False, unique=True)
     team_description = Column(pg.VARCHAR(128), nullable=False, unique=True)
+
+
+class TeamStatsTable(Base):
+    __tablename__ = "team_stats"
+
+    team_id = Column(pg.UUID, ForeignKey(TeamsTable.team_id), primary_key=True)
+    n_attempts = Column(pg.INTEGER, nullable=False)
+    last_attempt = Column(pg.TIMESTAMP, nullable=False)
+
+
+class TeamMetricStatsTable(Base):
+    __tablename__ = "team_metric_stats"
+
+    team_id = Column(pg.UUID, ForeignKey(TeamsTable.team_id), primary_key=True)
+    name = Column(pg.VARCHAR(64), primary_key=True)
+    best_score = Column(pg.FLOAT, nullable=False)
+
+
+class ModelMetricStatsTable(Base):
+    __tablename__ = "model_metric_stats"
+
+    model_id = Column(pg.UUID, ForeignKey(ModelsTable.model_id), primary_key=True)
+    name = Column(pg.VARCHAR(64), primary_key=True, index=True)
+    best_score = Column(pg.FLOAT, nullable=False)
+    n_attempts = Column(pg.INTEGER, nullable=False)
+    last_attempt = Column(pg.TIMESTAMP, nullable=False)
+
+
+class TeamDailyTrialStatsTable(Base):
+    __tablename__ = "team_daily_trial_stats"
+
+    team_id = Column(pg.UUID, ForeignKey(TeamsTable.team_id), primary_key=True)
+    day = Column(pg.DATE, primary_key=True)
+    status = Column(trial_status_enum, primary_key=True)
+    n_trials = Column(pg.INTEGER, nullable=False)
+
+
+class LeaderboardSnapshotsTable(Base):
+    """Global leaderboard states, rank of team is its index in arrays"""
+
+    __tablename__ = "leaderboard_snapshots"
+
+    name = Column(pg.VARCHAR(64), primary_key=True)
+    created_at = Column(pg.TIMESTAMP, primary_key=True)
+    team_names = Column(pg.ARRAY(pg.VARCHAR(128)), nullable=False)
+    scores = Column(pg.ARRAY(pg.FLOAT), nullable=False)
@@ -0,0 +1,318 @@
+import typing as tp
+
+# Queries which are prepared on every connection of pool in advance
+
+GET_TEAM_BY_CHAT_QUERY: tp.Final = """
+    SELECT *
+    FROM teams
+    WHERE chat_id = $1::BIGINT
+"""
+
+GET_MODEL_BY_NAME_QUERY: tp.Final = """
+    SELECT *
+    FROM models
+    where team_id = $1::UUID and name = $2::VARCHAR
+"""
+
+UPDATE_TRIAL_STATUS_QUERY: tp.Final = """
+    UPDATE trials t
+    SET
+        finished_at = $1::TIMESTAMP
+        , status = $2::trial_status_enum
+    FROM (
+        SELECT status
+        FROM trials
+        WHERE trial_id = $3::UUID
+        FOR UPDATE
+    ) prev
+    WHERE t.trial_id = $3::UUID
+    RETURNING
+        t.trial_id
+        , t.model_id
+        , t.created_at
+        , t.finished_at
+        , t.status
+        , prev.status AS prev_status
+"""
+
+INCREMENT_DAILY_TRIAL_STAT_QUERY: tp.Final = """
+    INSERT INTO team_daily_trial_stats
+        (team_id, day, status, n_trials)
+    SELECT team_id, $2::DATE, $3::trial_status_enum, 1
+    FROM models
+    WHERE model_id = $1::UUID
+    ON CONFLICT (team_id, day, status) DO UPDATE
+    SET
+        n_trials = team_daily_trial_stats.n_trials + 1
+"""
+
+DECREMENT_DAILY_TRIAL_STAT_QUERY: tp.Final = """
+    UPDATE team_daily_trial_stats s
+    SET
+        n_trials = s.n_trials - 1
+    FROM models m
+    WHERE
+        m.model_id = $1::UUID
+        AND s.team_id = m.team_id
+        AND s.day = $2::DATE
+        AND s.status = $3::trial_status_enum
+"""
+
+ADD_SUCCESS_TRIAL_STATS_QUERY: tp.Final = """
+    INSERT INTO team_stats
+        (team_id, n_attempts, last_attempt)
+    SELECT m.team_id, 1, t.created_at
+    FROM trials t
+        JOIN models m on t.model_id = m.model_id
+    WHERE t.trial_id = $1::UUID
+    ON CONFLICT (team_id) DO UPDATE
+    SET
+        n_attempts = team_stats.n_attempts + 1
+        , last_attempt = GREATEST(team_stats.last_attempt, EXCLUDED.last_attempt)
+"""
+
+ADD_TEAM_METRIC_STATS_QUERY: tp.Final = """
+    INSERT INTO team_metric_stats
+        (team_id, name, best_score)
+    SELECT m.team_id, me.name, MAX(me.value)
+    FROM metrics me
+        JOIN trials t on me.trial_id = t.trial_id
+        JOIN models m on t.model_id = m.model_id
+    WHERE
+        me.trial_id = $1::UUID
+        AND ($2::VARCHAR[] IS NULL OR me.name = ANY($2::VARCHAR[]))
+    GROUP BY m.team_id, me.name
+    ON CONFLICT (team_id, name) DO UPDATE
+    SET
+        best_score = GREATEST(team_metric_stats.best_score, EXCLUDED.best_score)
+"""
+
+ADD_MODEL_METRIC_STATS_QUERY: tp.Final = """
+    INSERT INTO model_metric_stats
+        (model_id, name, best_score, n_attempts, last_attempt)
+    SELECT t.model_id, me.name, me.value, 1, t.created_at
+    FROM metrics me
+        JOIN trials t on me.trial_id = t.trial_id
+    WHERE
+        me.trial_id = $1::UUID
+        AND t.status = 'success'
+        AND ($2::VARCHAR[] IS NULL OR me.name = ANY($2::VARCHAR[]))
+    ON CONFLICT (model_id, name) DO UPDATE
+    SET
+        best_score = GREATEST(model_metric_stats.best_score, EXCLUDED.best_score)
+        , n_attempts = model_metric_stats.n_attempts + 1
+        , last_attempt = GREATEST(model_metric_stats.last_attempt, EXCLUDED.last_attempt)
+"""
+
+GET_MODEL_LAST_SUCCESS_TRIAL_QUERY: tp.Final = """
+    SELECT
+        trial_id
+        , model_id
+        , created_at
+        , finished_at
+        , status
+    FROM trials
+    WHERE model_id = $1::UUID AND status = 'success'
+    ORDER BY created_at DESC
+    LIMIT 1
+"""
+
+GET_TEAM_LAST_N_MODELS_QUERY: tp.Final = """
+    SELECT *
+    FROM models
+    WHERE team_id = $1::UUID
+    ORDER BY created_at DESC
+    LIMIT $2::BIGINT
+"""
+
+GET_TEAM_TODAY_TRIAL_STAT_QUERY: tp.Final = """
+    SELECT status, n_trials
+    FROM team_daily_trial_stats
+    WHERE team_id = $1::UUID AND day = $2::DATE AND n_trials > 0
+"""
+
+ADMIT_TRIAL_QUERY: tp.Final = """
+    WITH team AS (
+        SELECT *
+        FROM teams
+        WHERE chat_id = $1::BIGINT
+    ),
+    model AS (
+        SELECT m.*
+        FROM models m
+            JOIN team t on m.team_id = t.team_id
+        WHERE m.name = $2::VARCHAR
+    ),
+    stat AS (
+        SELECT COALESCE(jsonb_object_agg(s.status, s.n_trials), '{}') AS today_trial_stat
+        FROM team_daily_trial_stats s
+            JOIN team t on s.team_id = t.team_id
+        WHERE s.day = $3::DATE AND s.n_trials > 0
+    ),
+    waiting_counter AS (
+        INSERT INTO team_daily_trial_stats AS s
+            (team_id, day, status, n_trials)
+        SELECT m.team_id, $3::DATE, 'waiting', 1
+        FROM model m, stat
+        WHERE
+            COALESCE((today_trial_stat ->> 'success')::INT, 0) < $5::INT
+            AND COALESCE((today_trial_stat ->> 'waiting')::INT, 0) < $6::INT
+            AND COALESCE((today_trial_stat ->> 'failed')::INT, 0) < $7::INT
+        ON CONFLICT (team_id, day, status) DO UPDATE
+        SET
+            n_trials = s.n_trials + 1
+        WHERE s.n_trials < $6::INT
+        RETURNING s.team_id
+    ),
+    trial AS (
+        INSERT INTO trials
+            (model_id, created_at, status)
+        SELECT m.model_id, $4::TIMESTAMP, 'waiting'
+        FROM model m
+            JOIN waiting_counter c on m.team_id = c.team_id
+        RETURNING
+            trial_id
+            , model_id
+            , created_at
+            , finished_at
+            , status
+    )
+    SELECT
+        (SELECT row_to_json(team) FROM team) AS team
+        , (SELECT row_to_json(model) FROM model) AS model
+        , (SELECT row_to_json(trial) FROM trial) AS trial
+        , (SELECT today_trial_stat FROM stat) AS today_trial_stat
+"""
+
+GET_GLOBAL_LEADERBOARD_QUERY: tp.Final = """
+    SELECT
+        t.description AS team_name
+        , tms.best_score
+        , COALESCE(ts.n_attempts, 0) AS n_attempts
+        , ts.last_attempt
+    FROM teams t
+        LEFT JOIN team_stats ts on t.team_id = ts.team_id
+        LEFT JOIN team_metric_stats tms
+            on t.team_id = tms.team_id AND tms.name = $1::VARCHAR
+    ORDER BY best_score DESC NULLS LAST, last_attempt ASC NULLS LAST, t.description ASC
+"""
+
+GET_BY_MODEL_LEADERBOARD_QUERY: tp.Final = """
+    SELECT
+        t.description AS team_name
+        , m.name AS model_name
+        , ms.best_score
+        , ms.n_attempts
+        , ms.last_attempt
+    FROM model_metric_stats ms
+        JOIN models m on ms.model_id = m.model_id
+        JOIN teams t on m.team_id = t.team_id
+    WHERE ms.name = $1::VARCHAR
+    ORDER BY t.description, m.name
+"""
+
+# Snapshot is skipped if leaderboard hasn't changed since the last one,
+# arrays are equal if their NULL scores are at the same positions
+ADD_LEADERBOARD_SNAPSHOT_QUERY: tp.Final = """
+    INSERT INTO leaderboard_snapshots
+        (name, created_at, team_names, scores)
+    SELECT $1::VARCHAR, $2::TIMESTAMP, $3::VARCHAR[], $4::FLOAT[]
+    WHERE NOT EXISTS (
+        SELECT 1
+        FROM (
+            SELECT team_names, scores
+            FROM leaderboard_snapshots
+            WHERE name = $1::VARCHAR
+            ORDER BY created_at DESC
+            LIMIT 1
+        ) last
+        WHERE last.team_names = $3::VARCHAR[] AND last.scores = $4::FLOAT[]
+    )
+"""
+
+GET_LEADERBOARD_SNAPSHOTS_QUERY: tp.Final = """
+    SELECT created_at, team_names, scores
+    FROM leaderboard_snapshots
+    WHERE name = $1::VARCHAR
+        AND created_at >= COALESCE($2::TIMESTAMP, '-infinity'::TIMESTAMP)
+    ORDER BY created_at
+"""
+
+# Replica lag in seconds, it's zero if all received WAL is replayed
+# because replay timestamp isn't updated when primary is idle
+GET_REPLICA_LAG_QUERY: tp.Final = """
+    SELECT
+        CASE
+            WHEN NOT pg_is_in_recovery() THEN 0
+            WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+            ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp())
+        END
+"""
+
+# Trials of team models with the main metric, newest first. Every model
+# contributes at most `limit` trials from its index, so the cost depends
+# on page size and number of models, not on length of history.
+# Position of cursor trial is compared as (created_at, trial_id)
+# to keep order stable for trials created at the same time.
+_TRIALS_HISTORY_QUERY_TEMPLATE = """
+    SELECT
+        t.trial_id
+        , t.model_id
+        , m.name AS model_name
+        , t.created_at
+        , t.finished_at
+        , t.status
+        , me.value AS metric_value
+    FROM models m
+        CROSS JOIN LATERAL (
+            SELECT *
+            FROM trials
+            WHERE model_id = m.model_id{cursor_condition}
+            ORDER BY created_at {order}, trial_id {order}
+            LIMIT $4::BIGINT
+        ) t
+        LEFT JOIN metrics me on t.trial_id = me.trial_id AND me.name = $2::VARCHAR
+    WHERE m.team_id = $1::UUID AND ($3::UUID IS NULL OR m.model_id = $3::UUID)
+    ORDER BY t.created_at {order}, t.trial_id {order}
+    LIMIT $4::BIGINT
+"""
+
+_CURSOR_CONDITION_TEMPLATE = """
+                AND (created_at, trial_id) {op} (
+                    SELECT created_at, trial_id FROM trials WHERE trial_id = $5::UUID
+                )"""
+
+GET_LAST_TRIALS_QUERY: tp.Final = _TRIALS_HISTORY_QUERY_TEMPLATE.format(
+    cursor_condition="", order="DESC"
+)
+GET_TRIALS_BEFORE_QUERY: tp.Final = _TRIALS_HISTORY_QUERY_TEMPLATE.format(
+    cursor_condition=_CURSOR_CONDITION_TEMPLATE.format(op="<"), order="DESC"
+)
+GET_TRIALS_AFTER_QUERY: tp.Final = _TRIALS_HISTORY_QUERY_TEMPLATE.format(
+    cursor_condition=_CURSOR_CONDITION_TEMPLATE.format(op=">"), order="ASC"
+)
+
+HOT_QUERIES: tp.Final = (
+    GET_TEAM_BY_CHAT_QUERY,
+    GET_MODEL_BY_NAME_QUERY,
+    UPDATE_TRIAL_STATUS_QUERY,
+    INCREMENT_DAILY_TRIAL_STAT_QUERY,
+    DECREMENT_DAILY_TRIAL_STAT_QUERY,
+    ADD_SUCCESS_TRIAL_STATS_QUERY,
+    ADD_TEAM_METRIC_STATS_QUERY,
+    ADD_MODEL_METRIC_STATS_QUERY,
+    GET_MODEL_LAST_SUCCESS_TRIAL_QUERY,
+    GET_TEAM_TODAY_TRIAL_STAT_QUERY,
+    ADMIT_TRIAL_QUERY,
+    GET_GLOBAL_LEADERBOARD_QUERY,
+    GET_BY_MODEL_LEADERBOARD_QUERY,
+)
+
+# Replica is read-only, so only read queries are prepared there
+REPLICA_HOT_QUERIES: tp.Final = (
+    GET_GLOBAL_LEADERBOARD_QUERY,
+    GET_BY_MODEL_LEADERBOARD_QUERY,
+    GET_LAST_TRIALS_QUERY,
+    GET_TRIALS_BEFORE_QUERY,
+    GET_TRIALS_AFTER_QUERY,
+)
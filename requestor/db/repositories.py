@@ -0,0 +1,224 @@
+import io
+import itertools
+import typing as tp
+from datetime import date, datetime
+
+import numpy as np
+import pandas as pd
+from asyncpg import (
+    CheckViolationError,
+    Connection,
+    DuplicateTableError,
+    ForeignKeyViolationError,
+    UniqueViolationError,
+)
+from pydantic import BaseModel  # pylint: disable=no-name-in-module
+from rectools import Columns
+
+from requestor.models import (
+    ByModelLeaderboardRow,
+    GlobalLeaderboardRow,
+    LeaderboardSnapshot,
+    Trial,
+)
+from requestor.utils import utc_now
+
+from .exceptions import DuplicatedRecommendationError, TrialNotFoundError
+from .instrumentation import DBInstrumentation
+from .queries import (
+    ADD_LEADERBOARD_SNAPSHOT_QUERY,
+    GET_BY_MODEL_LEADERBOARD_QUERY,
+    GET_GLOBAL_LEADERBOARD_QUERY,
+    GET_LEADERBOARD_SNAPSHOTS_QUERY,
+)
+from .service import DBService, attempted, recalculate_leaderboard_stats
+
+RECOS_PARTITION_PREFIX: tp.Final = "recommendations_p"
+
+
+def get_month_start(dt: tp.Union[date, datetime]) -> date:
+    return date(dt.year, dt.month, 1)
+
+
+def get_next_month_start(dt: tp.Union[date, datetime]) -> date:
+    return date(dt.year + dt.month // 12, dt.month % 12 + 1, 1)
+
+
+def make_recos_partition_name(month: date) -> str:
+    return f"{RECOS_PARTITION_PREFIX}{month:%Y%m}"
+
+
+def parse_recos_partition_name(name: str) -> date:
+    return datetime.strptime(name[len(RECOS_PARTITION_PREFIX) :], "%Y%m").date()
+
+
+class DBRepository(BaseModel):
+    """
+    Group of queries which runs on pools of DB service,
+    so it's routed to replica and reported the same way
+    """
+
+    db_service: DBService
+
+    class Config:
+        arbitrary_types_allowed = True
+        copy_on_model_validation = "none"
+
+    @property
+    def instrumentation(self) -> DBInstrumentation:
+        return self.db_service.instrumentation
+
+
+class LeaderboardRepository(DBRepository):
+    """Leaderboards from stats tables and their snapshots"""
+
+    @attempted
+    async def rebuild_leaderboard_stats(self) -> None:
+        """Recalculate leaderboard stats tables from scratch"""
+        async with self.db_service.pool.acquire() as conn:
+            async with conn.transaction():
+                await recalculate_leaderboard_stats(conn)
+
+    @attempted
+    async def get_global_leaderboard(self, metric: str) -> tp.List[GlobalLeaderboardRow]:
+        pool = await self.db_service.get_read_pool()
+        records = await pool.fetch(GET_GLOBAL_LEADERBOARD_QUERY, metric)
+        return [GlobalLeaderboardRow(**record) for record in records]
+
+    @attempted
+    async def get_by_model_leaderboard(self, metric: str) -> tp.List[ByModelLeaderboardRow]:
+        pool = await self.db_service.get_read_pool()
+        records = await pool.fetch(GET_BY_MODEL_LEADERBOARD_QUERY, metric)
+        return [ByModelLeaderboardRow(**record) for record in records]
+
+    @attempted
+    async def add_leaderboard_snapshot(
+        self, metric: str, rows: tp.List[GlobalLeaderboardRow]
+    ) -> bool:
+        """Save global leaderboard state unless it is unchanged"""
+        status = await self.db_service.pool.execute(
+            ADD_LEADERBOARD_SNAPSHOT_QUERY,
+            metric,
+            utc_now(),
+            [row.team_name for row in rows],
+            [row.best_score for row in rows],
+        )
+        return status == "INSERT 0 1"
+
+    @attempted
+    async def get_leaderboard_snapshots(
+        self, metric: str, since: tp.Optional[datetime] = None
+    ) -> tp.List[LeaderboardSnapshot]:
+        pool = await self.db_service.get_read_pool()
+        records = await pool.fetch(GET_LEADERBOARD_SNAPSHOTS_QUERY, metric, since)
+        return [LeaderboardSnapshot(**record) for record in records]
+
+
+class RecosRepository(DBRepository):
+    """Recommendations of trials partitioned by month of trial creation"""
+
+    @attempted
+    async def add_recos(self, trial: Trial, recos: pd.DataFrame) -> None:
+        """Write all recommendations of trial with one COPY"""
+        month = get_month_start(trial.created_at)
+        try:
+            async with self.db_service.pool.acquire() as conn:
+                await self._ensure_recos_partition(conn, month)
+                try:
+                    await self._copy_recos(conn, trial, recos)
+                except CheckViolationError:
+                    # No partition for the row: cached one was dropped since,
+                    # e.g. by partitions retention script
+                    self.db_service.recos_partitions.discard(month)
+                    await self._ensure_recos_partition(conn, month)
+                    await self._copy_recos(conn, trial, recos)
+        except UniqueViolationError as e:
+            raise DuplicatedRecommendationError(e)
+        except ForeignKeyViolationError:
+            raise TrialNotFoundError(f"Trial '{trial.trial_id}' not found")
+
+    @staticmethod
+    async def _copy_recos(conn: Connection, trial: Trial, recos: pd.DataFrame) -> None:
+        records = zip(
+            itertools.repeat(trial.trial_id),
+            itertools.repeat(trial.created_at),
+            recos[Columns.User].tolist(),
+            recos[Columns.Item].tolist(),
+            recos[Columns.Rank].tolist(),
+        )
+        await conn.copy_records_to_table(
+            "recommendations",
+            records=records,
+            columns=("trial_id", "created_at", "user_id", "item_id", "rank"),
+        )
+
+    @attempted
+    async def get_recos(self, trial: Trial) -> pd.DataFrame:
+        """Recommendations of trial, empty if they were not written"""
+        # Condition on `created_at` lets Postgres scan only one partition
+        query = f"""
+            SELECT
+                user_id AS "{Columns.User}"
+                , item_id AS "{Columns.Item}"
+                , rank AS "{Columns.Rank}"
+            FROM recommendations
+            WHERE trial_id = $1::UUID AND created_at = $2::TIMESTAMP
+        """  # nosec
+        # CSV is much faster to parse than records for large sets
+        buffer = io.BytesIO()
+        async with self.db_service.pool.acquire() as conn:
+            await conn.copy_from_query(
+                query, trial.trial_id, trial.created_at, output=buffer, format="csv", header=True
+            )
+        buffer.seek(0)
+        return pd.read_csv(buffer, dtype=np.int64)
+
+    async def _ensure_recos_partition(self, conn: Connection, month: date) -> None:
+        if month in self.db_service.recos_partitions:
+            return
+
+        next_month = get_next_month_start(month)
+        query = f"""
+            CREATE TABLE IF NOT EXISTS {make_recos_partition_name(month)}
+            PARTITION OF recommendations
+            FOR VALUES FROM ('{month.isoformat()}') TO ('{next_month.isoformat()}')
+        """  # nosec
+        try:
+            await conn.execute(query)
+        except DuplicateTableError:  # Created concurrently
+            pass
+        self.db_service.recos_partitions.add(month)
+
+    @attempted
+    async def get_recos_partitions(self) -> tp.List[date]:
+        """Months which recommendations partitions exist for"""
+        query = """
+            SELECT c.relname
+            FROM pg_inherits i
+                JOIN pg_class c on i.inhrelid = c.oid
+            WHERE i.inhparent = 'recommendations'::regclass
+        """
+        records = await self.db_service.pool.fetch(query)
+        return sorted(parse_recos_partition_name(r["relname"]) for r in records)
+
+    @attempted
+    async def remove_recos_partitions(self, before: date, detach: bool = False) -> tp.List[str]:
+        """
+        Drop partitions of months before `before` or detach them to archive.
+
+        Returns names of removed partitions.
+        """
+        removed = []
+        for month in await self.get_recos_partitions():
+            if get_next_month_start(month) > before:
+                continue
+
+            name = make_recos_partition_name(month)
+            if detach:
+                query = f"ALTER TABLE recommendations DETACH PARTITION {name}"  # nosec
+            else:
+                query = f"DROP TABLE {name}"  # nosec
+            await self.db_service.pool.execute(query)
+            self.db_service.recos_partitions.discard(month)
+            removed.append(name)
+        return removed
@@ -1,30 +1,41 @@
+import asyncio
 import functools
+import json
+import time
 import typing as tp
+from datetime import date
 from uuid import UUID
 
 from asyncpg import (
+    Connection,
     ConnectionDoesNotExistError,
     ForeignKeyViolationError,
-    Pool,
+    InterfaceError,
+    PostgresError,
     UniqueViolationError,
+    connect,
 )
-from pydantic import BaseModel  # pylint: disable=no-name-in-module
+from pydantic import BaseModel, Field  # pylint: disable=no-name-in-module
 
 from requestor.log import app_logger
 from requestor.models import (
-    ByModelLeaderboardRow,
-    GlobalLeaderboardRow,
+    HistoryDirection,
     Metric,
     Model,
     ModelInfo,
     Team,
     TeamInfo,
     Trial,
+    TrialAdmission,
+    TrialHistoryItem,
+    TrialRefusal,
     TrialStatus,
+    TrialsHistoryPage,
 )
 from requestor.utils import async_do_with_retries, utc_now
 
-from ..settings import config
+from ..settings import TrialLimit, config
+from .cache import TTLCache
 from .exceptions import (
     DuplicatedMetricError,
     DuplicatedModelError,
@@ -34,38 +45,281 @@ from .exceptions import (
     TokenNotFoundError,
     TrialNotFoundError,
 )
+from .instrumentation import DBInstrumentation, DBStats, InstrumentedPool, get_pool_stats
+from .queries import (
+    ADD_MODEL_METRIC_STATS_QUERY,
+    ADD_SUCCESS_TRIAL_STATS_QUERY,
+    ADD_TEAM_METRIC_STATS_QUERY,
+    ADMIT_TRIAL_QUERY,
+    DECREMENT_DAILY_TRIAL_STAT_QUERY,
+    GET_LAST_TRIALS_QUERY,
+    GET_MODEL_BY_NAME_QUERY,
+    GET_MODEL_LAST_SUCCESS_TRIAL_QUERY,
+    GET_REPLICA_LAG_QUERY,
+    GET_TEAM_BY_CHAT_QUERY,
+    GET_TEAM_LAST_N_MODELS_QUERY,
+    GET_TEAM_TODAY_TRIAL_STAT_QUERY,
+    GET_TRIALS_AFTER_QUERY,
+    GET_TRIALS_BEFORE_QUERY,
+    HOT_QUERIES,
+    INCREMENT_DAILY_TRIAL_STAT_QUERY,
+    REPLICA_HOT_QUERIES,
+    UPDATE_TRIAL_STATUS_QUERY,
+)
 
 T = tp.TypeVar("T")
 
+CACHE_INVALIDATION_CHANNEL: tp.Final = "requestor_cache_invalidation"
+
+# Daily limits in order of check, the first reached one is reported
+TRIAL_LIMIT_REFUSALS: tp.Final = (
+    (TrialStatus.success, TrialLimit.success, TrialRefusal.success_limit),
+    (TrialStatus.waiting, TrialLimit.waiting, TrialRefusal.waiting_limit),
+    (TrialStatus.failed, TrialLimit.failed, TrialRefusal.failed_limit),
+)
+
+
+class InstrumentedService(tp.Protocol):
+    """DB service or repository which reports its calls"""
+
+    @property
+    def instrumentation(self) -> DBInstrumentation:
+        ...
+
+
+def instrumented(func: tp.Callable[..., tp.Awaitable[T]]) -> tp.Callable[..., tp.Awaitable[T]]:
+    """Report latency and failures of DB service or repository method"""
+
+    @functools.wraps(func)
+    async def _wrapper(service: InstrumentedService, *args: tp.Any, **kwargs: tp.Any) -> T:
+        start = time.perf_counter()
+        failed = True
+        try:
+            res = await func(service, *args, **kwargs)
+            failed = False
+            return res
+        finally:
+            duration = time.perf_counter() - start
+            service.instrumentation.observe_call(func.__name__, duration, failed)
+
+    return _wrapper
+
 
 def attempted(func: tp.Callable[..., tp.Awaitable[T]]) -> tp.Callable[..., tp.Awaitable[T]]:
+    @instrumented
     @functools.wraps(func)
-    async def _wrapper(*args: tp.Any, **kwargs: tp.Any) -> T:
+    async def _wrapper(service: InstrumentedService, *args: tp.Any, **kwargs: tp.Any) -> T:
         res: T = await async_do_with_retries(
-            func=func(*args, **kwargs),
+            func=functools.partial(func, service, *args, **kwargs),
             exc_type=(ConnectionRefusedError, ConnectionDoesNotExistError),
             max_attempts=config.db_config.n_attempts,
             interval=config.db_config.attempts_interval,
+            on_retry=functools.partial(service.instrumentation.observe_retry, func.__name__),
         )
         return res
 
     return _wrapper
 
 
+async def _prepare_queries(conn: Connection, queries: tp.Iterable[str]) -> None:
+    # Public `prepare` doesn't put statements to the connection statement
+    # cache, which `fetch` and others use, so private `_prepare` is used.
+    # It's intentional: asyncpg is pinned to 0.23.x, check it on upgrade.
+    for query in queries:
+        await conn._prepare(query, use_cache=True)  # pylint: disable=protected-access
+
+
+async def prepare_hot_queries(conn: Connection) -> None:
+    """
+    Prepare hot queries on a new pool connection and put them
+    to its statement cache, so first requests don't pay for it
+    """
+    await _prepare_queries(conn, HOT_QUERIES)
+
+
+async def prepare_replica_hot_queries(conn: Connection) -> None:
+    await _prepare_queries(conn, REPLICA_HOT_QUERIES)
+
+
+async def recalculate_leaderboard_stats(conn: Connection) -> None:
+    """Recalculate leaderboard stats tables in transaction of `conn`"""
+    # Block incremental updates until rebuild is committed
+    await conn.execute(
+        "LOCK TABLE team_stats, team_metric_stats, model_metric_stats IN EXCLUSIVE MODE"
+    )
+    await conn.execute("DELETE FROM team_stats")
+    await conn.execute("DELETE FROM team_metric_stats")
+    await conn.execute("DELETE FROM model_metric_stats")
+
+    team_stats_query = """
+        INSERT INTO team_stats
+            (team_id, n_attempts, last_attempt)
+        SELECT m.team_id, COUNT(*), MAX(t.created_at)
+        FROM models m
+            JOIN trials t on m.model_id = t.model_id
+        WHERE t.status = 'success'
+        GROUP BY m.team_id
+    """
+    team_metric_stats_query = """
+        INSERT INTO team_metric_stats
+            (team_id, name, best_score)
+        SELECT m.team_id, me.name, MAX(me.value)
+        FROM models m
+            JOIN trials t on m.model_id = t.model_id
+            JOIN metrics me on t.trial_id = me.trial_id
+        GROUP BY m.team_id, me.name
+    """
+    model_metric_stats_query = """
+        INSERT INTO model_metric_stats
+            (model_id, name, best_score, n_attempts, last_attempt)
+        SELECT t.model_id, me.name, MAX(me.value), COUNT(*), MAX(t.created_at)
+        FROM trials t
+            JOIN metrics me on t.trial_id = me.trial_id
+        WHERE t.status = 'success'
+        GROUP BY t.model_id, me.name
+    """
+    await conn.execute(team_stats_query)
+    await conn.execute(team_metric_stats_query)
+    await conn.execute(model_metric_stats_query)
+
+
 class DBService(BaseModel):
-    pool: Pool
+    pool: InstrumentedPool
+    # Teams by chat id and models by (team id, name)
+    team_cache: TTLCache = Field(default_factory=TTLCache)
+    model_cache: TTLCache = Field(default_factory=TTLCache)
+    instrumentation: DBInstrumentation = Field(default_factory=DBInstrumentation)
+
+    # Optional read replica for leaderboards and history reads,
+    # primary is used while replica lags more than `replica_max_lag` seconds
+    replica_pool: tp.Optional[InstrumentedPool] = None
+    replica_max_lag: float = 5
+    replica_lag_check_interval: float = 1
+    replica_lag_checked_at: float = float("-inf")
+    is_replica_fresh: bool = False
+
+    # Dedicated connection outside of pool which listens to cache invalidation,
+    # it's reconnected in background once terminated
+    listener_dsn: str
+    listener_reconnect_interval: float = 1
+    listener_conn: tp.Optional[Connection] = None
+    listener_task: tp.Optional[asyncio.Task] = None
+    # Months which recommendations partitions are known to exist for
+    recos_partitions: tp.Set[date] = set()
+    is_ready: bool = False
 
     class Config:
         arbitrary_types_allowed = True
+        # Share instance between services instead of copying on validation
+        copy_on_model_validation = "none"
 
     async def setup(self) -> None:
+        # Pool opens `min_size` connections and prepares queries on them
         await self.pool
-        app_logger.info("Db service initialized")
+        await self._connect_listener()
+        if self.replica_pool is not None:
+            await self.replica_pool
+        self.is_ready = True
+        app_logger.info(f"Db service initialized, {len(HOT_QUERIES)} hot queries prepared")
 
     async def cleanup(self) -> None:
+        self.is_ready = False
+        if self.listener_task is not None:
+            self.listener_task.cancel()
+            try:
+                await self.listener_task
+            except asyncio.CancelledError:
+                pass
+            self.listener_task = None
+        if self.listener_conn is not None:
+            # Closing on shutdown shouldn't start reconnection
+            self.listener_conn.remove_termination_listener(self._on_listener_terminated)
+            await self.listener_conn.close()
+            self.listener_conn = None
         await self.pool.close()
-        app_logger.info("Db service shutdown")
+        if self.replica_pool is not None:
+            await self.replica_pool.close()
+        app_logger.info(f"Db service shutdown, stats: {self.get_db_stats().json()}")
+
+    def get_db_stats(self) -> DBStats:
+        return DBStats(
+            methods=self.instrumentation.get_method_stats(),
+            pool=get_pool_stats(self.pool),
+            replica_pool=get_pool_stats(self.replica_pool),
+            caches={"team": self.team_cache.get_stats(), "model": self.model_cache.get_stats()},
+        )
 
+    def _invalidate_team(self, team_id: UUID) -> None:
+        # Chat of team may be changed, so search by team id
+        self.team_cache.invalidate_where(lambda team: team.team_id == team_id)
+
+    def _invalidate_model(self, team_id: UUID, model_name: str) -> None:
+        self.model_cache.invalidate((team_id, model_name))
+
+    async def _connect_listener(self) -> None:
+        conn = await connect(self.listener_dsn)
+        await conn.add_listener(CACHE_INVALIDATION_CHANNEL, self._on_cache_invalidation)
+        conn.add_termination_listener(self._on_listener_terminated)
+        self.listener_conn = conn
+
+    def _on_listener_terminated(self, conn: Connection) -> None:  # pylint: disable=unused-argument
+        app_logger.warning("Cache invalidation listener connection is lost, reconnecting")
+        self.listener_conn = None
+        self.listener_task = asyncio.create_task(self._reconnect_listener())
+
+    async def _reconnect_listener(self) -> None:
+        while True:
+            try:
+                await self._connect_listener()
+                break
+            except (OSError, asyncio.TimeoutError, PostgresError, InterfaceError) as e:
+                app_logger.warning(f"Failed to reconnect cache invalidation listener: {e!r}")
+                await asyncio.sleep(self.listener_reconnect_interval)
+        # Notifications sent while listener was disconnected are lost
+        self.team_cache.clear()
+        self.model_cache.clear()
+        app_logger.info("Cache invalidation listener is reconnected, caches are cleared")
+
+    def _on_cache_invalidation(
+        self, conn: Connection, pid: int, channel: str, payload: str
+    ) -> None:  # pylint: disable=unused-argument
+        message = json.loads(payload)
+        team_id = UUID(message["team_id"])
+        if message["kind"] == "team":
+            self._invalidate_team(team_id)
+        elif message["kind"] == "model":
+            self._invalidate_model(team_id, message["name"])
+
+    async def _notify_cache_invalidation(self, **message: tp.Any) -> None:
+        """Invalidate entries in caches of other bot instances"""
+        payload = json.dumps(message, default=str)
+        await self.pool.execute(
+            "SELECT pg_notify($1::TEXT, $2::TEXT)", CACHE_INVALIDATION_CHANNEL, payload
+        )
+
+    async def get_read_pool(self) -> InstrumentedPool:
+        """Replica pool if it is set and not lagging, primary otherwise"""
+        if self.replica_pool is None:
+            return self.pool
+
+        now = time.monotonic()
+        if now - self.replica_lag_checked_at >= self.replica_lag_check_interval:
+            self.replica_lag_checked_at = now
+            try:
+                lag = await self.replica_pool.fetchval(GET_REPLICA_LAG_QUERY)
+            except (OSError, PostgresError, InterfaceError) as e:
+                app_logger.warning(f"Failed to check replica lag: {e!r}")
+                lag = None
+
+            is_replica_fresh = lag is not None and lag <= self.replica_max_lag
+            if is_replica_fresh != self.is_replica_fresh:
+                target = "replica" if is_replica_fresh else f"primary, replica lag is {lag}"
+                app_logger.warning(f"Reads are routed to {target}")
+            self.is_replica_fresh = is_replica_fresh
+
+        return self.replica_pool if self.is_replica_fresh else self.pool
+
+    @instrumented
     async def ping(self) -> bool:
         return await self.pool.fetchval("SELECT TRUE")
 
@@ -92,6 +346,7 @@ class DBService(BaseModel):
             raise TokenNotFoundError()
         return team_description
 
+    @instrumented
     async def add_team(self, team_info: TeamInfo, token: str) -> Team:
         description = await self._get_team_description_by_token(token)
         query = """
@@ -163,20 +418,24 @@ class DBService(BaseModel):
 
         if record is None:
             raise TeamNotFoundError(f"Team '{team_id}' not found")
+
+        self._invalidate_team(team_id)
+        await self._notify_cache_invalidation(kind="team", team_id=team_id)
         return Team(**record)
 
     @attempted
     async def get_team_by_chat(self, chat_id: int) -> Team:
-        query = """
-            SELECT *
-            FROM teams
-            WHERE chat_id = $1::BIGINT
-        """
-        record = await self.pool.fetchrow(query, chat_id)
+        team = self.team_cache.get(chat_id)
+        if team is not None:
+            return team
+
+        record = await self.pool.fetchrow(GET_TEAM_BY_CHAT_QUERY, chat_id)
 
         if record is None:
             raise TeamNotFoundError()
-        return Team(**record)
+        team = Team(**record)
+        self.team_cache.set(chat_id, team)
+        return team
 
     @attempted
     async def add_model(self, model_info: ModelInfo) -> Model:
@@ -205,38 +464,38 @@ class DBService(BaseModel):
                 model_info.description,
                 utc_now(),
             )
-            return Model(**record)
         except UniqueViolationError as e:
             raise DuplicatedModelError(e)
         except ForeignKeyViolationError:
             raise TeamNotFoundError()
 
+        self._invalidate_model(model_info.team_id, model_info.name)
+        await self._notify_cache_invalidation(
+            kind="model", team_id=model_info.team_id, name=model_info.name
+        )
+        return Model(**record)
+
     @attempted
     async def get_team_last_n_models(self, team_id: UUID, limit: int) -> tp.List[Model]:
         if limit <= 0:
             raise ValueError(f"Parameter 'limit' should be positive, but got: {limit}")
-        query = """
-           SELECT *
-           FROM models
-           WHERE team_id = $1::UUID
-           ORDER BY created_at DESC
-           LIMIT $2::BIGINT
-        """
-        records = await self.pool.fetch(query, team_id, limit)
+        # Read from primary, so just added model is always listed
+        records = await self.pool.fetch(GET_TEAM_LAST_N_MODELS_QUERY, team_id, limit)
         return [Model(**record) for record in records]
 
     @attempted
     async def get_model_by_name(self, team_id: UUID, model_name: str) -> Model:
-        query = """
-            SELECT *
-            FROM models
-            where team_id = $1::UUID and name = $2::VARCHAR
-        """
-        record = await self.pool.fetchrow(query, team_id, model_name)
+        model = self.model_cache.get((team_id, model_name))
+        if model is not None:
+            return model
+
+        record = await self.pool.fetchrow(GET_MODEL_BY_NAME_QUERY, team_id, model_name)
         if record is None:
             raise ModelNotFoundError(f"Model {model_name} not found")
 
-        return Model(**record)
+        model = Model(**record)
+        self.model_cache.set((team_id, model_name), model)
+        return model
 
     @attempted
     async def add_trial(self, model_id: UUID, status: TrialStatus) -> Trial:
@@ -259,122 +518,229 @@ class DBService(BaseModel):
                 , finished_at
                 , status
         """
-        try:
-            record = await self.pool.fetchrow(
-                query,
-                model_id,
-                utc_now(),
-                status,
-            )
-        except ForeignKeyViolationError:
-            raise ModelNotFoundError(f"Model {model_id} not found")
-        return Trial(**record)
+        async with self.pool.acquire() as conn:
+            async with conn.transaction():
+                try:
+                    record = await conn.fetchrow(
+                        query,
+                        model_id,
+                        utc_now(),
+                        status,
+                    )
+                except ForeignKeyViolationError:
+                    raise ModelNotFoundError(f"Model {model_id} not found")
+
+                trial = Trial(**record)
+                await self._increment_daily_trial_stat(conn, trial)
+        return trial
+
+    async def _increment_daily_trial_stat(self, conn: Connection, trial: Trial) -> None:
+        await conn.execute(
+            INCREMENT_DAILY_TRIAL_STAT_QUERY, trial.model_id, trial.created_at.date(), trial.status
+        )
+
+    async def _decrement_daily_trial_stat(
+        self, conn: Connection, trial: Trial, status: TrialStatus
+    ) -> None:
+        await conn.execute(
+            DECREMENT_DAILY_TRIAL_STAT_QUERY, trial.model_id, trial.created_at.date(), status
+        )
 
     @attempted
     async def update_trial_status(self, trial_id: UUID, status: TrialStatus) -> Trial:
-        query = """
-            UPDATE trials
-            SET
-                finished_at = $1::TIMESTAMP
-                , status = $2::trial_status_enum
-            WHERE trial_id = $3::UUID
-            RETURNING
-                trial_id
-                , model_id
-                , created_at
-                , finished_at
-                , status
-        """
-        record = await self.pool.fetchrow(
-            query,
-            utc_now() if status.is_finished else None,
-            status,
-            trial_id,
-        )
+        async with self.pool.acquire() as conn:
+            async with conn.transaction():
+                record = await conn.fetchrow(
+                    UPDATE_TRIAL_STATUS_QUERY,
+                    utc_now() if status.is_finished else None,
+                    status,
+                    trial_id,
+                )
+                if record is None:
+                    raise TrialNotFoundError(f"Trial '{trial_id}' not found")
+
+                trial_info = dict(record)
+                prev_status = trial_info.pop("prev_status")
+                trial = Trial(**trial_info)
+                if prev_status != status:
+                    await self._decrement_daily_trial_stat(conn, trial, prev_status)
+                    await self._increment_daily_trial_stat(conn, trial)
+                    if status == TrialStatus.success:
+                        await self._add_success_trial_stats(conn, trial_id)
+
+        return trial
+
+    async def _add_success_trial_stats(self, conn: Connection, trial_id: UUID) -> None:
+        await conn.execute(ADD_SUCCESS_TRIAL_STATS_QUERY, trial_id)
+        # Metrics could be added before trial became successful
+        await self._add_model_metric_stats(conn, trial_id)
+
+    async def _add_team_metric_stats(
+        self, conn: Connection, trial_id: UUID, names: tp.Optional[tp.List[str]] = None
+    ) -> None:
+        await conn.execute(ADD_TEAM_METRIC_STATS_QUERY, trial_id, names)
+
+    async def _add_model_metric_stats(
+        self, conn: Connection, trial_id: UUID, names: tp.Optional[tp.List[str]] = None
+    ) -> None:
+        await conn.execute(ADD_MODEL_METRIC_STATS_QUERY, trial_id, names)
 
+    @attempted
+    async def get_model_last_success_trial(self, model_id: UUID) -> Trial:
+        record = await self.pool.fetchrow(GET_MODEL_LAST_SUCCESS_TRIAL_QUERY, model_id)
         if record is None:
-            raise TrialNotFoundError(f"Trial '{trial_id}' not found")
+            raise TrialNotFoundError(f"Model '{model_id}' has no successful trials")
         return Trial(**record)
 
     @attempted
-    async def get_team_today_trial_stat(self, team_id: UUID) -> tp.Dict[TrialStatus, int]:
-        query = """
-            SELECT status, count(*) AS n_trials
-            FROM trials t
-                JOIN models m on t.model_id = m.model_id
-            WHERE m.team_id = $1::UUID and t.created_at::DATE = $2::DATE
-            GROUP BY status
+    async def get_trials_history(  # pylint: disable=too-many-arguments
+        self,
+        team_id: UUID,
+        metric: str,
+        limit: int,
+        model_id: tp.Optional[UUID] = None,
+        cursor: tp.Optional[UUID] = None,
+        direction: HistoryDirection = HistoryDirection.older,
+    ) -> TrialsHistoryPage:
         """
-        records = await self.pool.fetch(query, team_id, utc_now().date())
+        Page of team trials with values of `metric`, newest first.
+
+        Without `cursor` the last trials are returned, otherwise trials
+        which are older or newer than `cursor` trial depending on `direction`.
+        """
+        if limit <= 0:
+            raise ValueError(f"Parameter 'limit' should be positive, but got: {limit}")
+
+        # One extra trial tells whether there's the next page
+        args: tp.List[tp.Any] = [team_id, metric, model_id, limit + 1]
+        if cursor is None:
+            query = GET_LAST_TRIALS_QUERY
+        elif direction == HistoryDirection.older:
+            query, args = GET_TRIALS_BEFORE_QUERY, args + [cursor]
+        else:
+            query, args = GET_TRIALS_AFTER_QUERY, args + [cursor]
+
+        pool = await self.get_read_pool()
+        records = await pool.fetch(query, *args)
+        items = [TrialHistoryItem(**record) for record in records[:limit]]
+        has_more = len(records) > limit
+        if cursor is None:
+            return TrialsHistoryPage(items=items, has_newer=False, has_older=has_more)
+        if direction == HistoryDirection.older:
+            return TrialsHistoryPage(items=items, has_newer=True, has_older=has_more)
+        return TrialsHistoryPage(items=items[::-1], has_newer=has_more, has_older=True)
+
+    @attempted
+    async def get_team_today_trial_stat(self, team_id: UUID) -> tp.Dict[TrialStatus, int]:
+        records = await self.pool.fetch(GET_TEAM_TODAY_TRIAL_STAT_QUERY, team_id, utc_now().date())
         return {r["status"]: r["n_trials"] for r in records}
 
     @attempted
-    async def add_metrics(self, trial_id: UUID, metrics: tp.Iterable[Metric]) -> None:
-        query = """
-            INSERT INTO metrics
-                (trial_id, name, value)
-            VALUES
-                (
-                    $1::UUID
-                    , $2::VARCHAR
-                    , $3::FLOAT
-                )
+    async def admit_trial(self, chat_id: int, model_name: str) -> TrialAdmission:
+        """
+        Resolve team and model and add waiting trial if today limits allow.
+
+        Everything is done in one statement. Waiting trials counter is
+        incremented only if it's still below the limit at the moment of
+        update, so concurrent admissions can't exceed it.
         """
-        values = ((trial_id, m.name, m.value) for m in metrics)
+        now = utc_now()
+        record = await self.pool.fetchrow(
+            ADMIT_TRIAL_QUERY,
+            chat_id,
+            model_name,
+            now.date(),
+            now,
+            int(TrialLimit.success),
+            int(TrialLimit.waiting),
+            int(TrialLimit.failed),
+        )
+
+        admission = TrialAdmission(
+            **{
+                field: json.loads(record[field])
+                for field in ("team", "model", "trial", "today_trial_stat")
+                if record[field] is not None
+            }
+        )
+        admission.refusal = self._get_trial_refusal(admission)
+        return admission
+
+    @staticmethod
+    def _get_trial_refusal(admission: TrialAdmission) -> tp.Optional[TrialRefusal]:
+        if admission.trial is not None:
+            return None
+        if admission.team is None:
+            return TrialRefusal.team_not_found
+        if admission.model is None:
+            return TrialRefusal.model_not_found
+
+        trial_stat = admission.today_trial_stat
+        reached_limits = (
+            refusal
+            for status, limit, refusal in TRIAL_LIMIT_REFUSALS
+            if trial_stat.get(status, 0) >= limit
+        )
+        # No reached limit means concurrent admission took the last slot
+        return next(reached_limits, TrialRefusal.waiting_limit)
+
+    async def _insert_metrics(
+        self, conn: Connection, metrics_by_trial: tp.Mapping[UUID, tp.Iterable[Metric]]
+    ) -> None:
+        records = [
+            (trial_id, m.name, m.value, m.ci_low, m.ci_high)
+            for trial_id, metrics in metrics_by_trial.items()
+            for m in metrics
+        ]
         try:
-            await self.pool.executemany(query, values)
+            await conn.copy_records_to_table(
+                "metrics",
+                records=records,
+                columns=("trial_id", "name", "value", "ci_low", "ci_high"),
+            )
         except UniqueViolationError as e:
             raise DuplicatedMetricError(e)
         except ForeignKeyViolationError:
             raise TrialNotFoundError()
 
     @attempted
-    async def get_global_leaderboard(self, metric: str) -> tp.List[GlobalLeaderboardRow]:
+    async def add_metrics(self, trial_id: UUID, metrics: tp.Iterable[Metric]) -> None:
+        metrics = list(metrics)
+        names = [m.name for m in metrics]
+        async with self.pool.acquire() as conn:
+            async with conn.transaction():
+                await self._insert_metrics(conn, {trial_id: metrics})
+                await self._add_team_metric_stats(conn, trial_id, names)
+                await self._add_model_metric_stats(conn, trial_id, names)
+
+    @attempted
+    async def replace_metrics(
+        self, metrics_by_trial: tp.Mapping[UUID, tp.Iterable[Metric]]
+    ) -> None:
+        """Replace all metrics of given trials in one transaction"""
         query = """
-            WITH trials_stat AS (
-                SELECT m.team_id, COUNT(*) AS n_attempts, MAX(t.created_at) AS last_attempt
-                FROM models m
-                    JOIN trials t on m.model_id = t.model_id
-                WHERE t.status = 'success'
-                GROUP BY m.team_id
-            ),
-            best_metrics AS (
-                SELECT m.team_id, MAX(me.value) AS best_score
-                FROM models m
-                    JOIN trials tr on m.model_id = tr.model_id
-                    JOIN metrics me on tr.trial_id = me.trial_id
-                WHERE me.name = $1::VARCHAR
-                GROUP BY m.team_id
-            )
-            SELECT
-                t.description AS team_name
-                , best_score
-                , COALESCE(n_attempts, 0) AS n_attempts
-                , last_attempt
-            FROM teams t
-                LEFT JOIN trials_stat ts on t.team_id = ts.team_id
-                LEFT JOIN best_metrics bm on t.team_id = bm.team_id
-            ORDER BY best_score DESC NULLS LAST, last_attempt ASC NULLS LAST, t.description ASC
+            DELETE FROM metrics
+            WHERE trial_id = ANY($1::UUID[])
         """
-        records = await self.pool.fetch(query, metric)
-        return [GlobalLeaderboardRow(**record) for record in records]
+        async with self.pool.acquire() as conn:
+            async with conn.transaction():
+                await conn.execute(query, list(metrics_by_trial.keys()))
+                await self._insert_metrics(conn, metrics_by_trial)
+                # Best scores may decrease, so stats are recalculated
+                await recalculate_leaderboard_stats(conn)
 
     @attempted
-    async def get_by_model_leaderboard(self, metric: str) -> tp.List[ByModelLeaderboardRow]:
+    async def get_success_trials(self) -> tp.List[Trial]:
         query = """
             SELECT
-                t.description AS team_name
-                , m.name AS model_name
-                , MAX(me.value) AS best_score
-                , COUNT(*) AS n_attempts
-                , MAX(tr.created_at) AS last_attempt
-            FROM teams t
-                JOIN models m on t.team_id = m.team_id
-                JOIN trials tr on m.model_id = tr.model_id
-                JOIN metrics me on tr.trial_id = me.trial_id
-            WHERE tr.status = 'success' AND me.name = $1::VARCHAR
-            GROUP BY t.description, m.name
-            ORDER BY t.description, m.name
+                trial_id
+                , model_id
+                , created_at
+                , finished_at
+                , status
+            FROM trials
+            WHERE status = 'success'
+            ORDER BY created_at
         """
-        records = await self.pool.fetch(query, metric)
-        return [ByModelLeaderboardRow(**record) for record in records]
+        records = await self.pool.fetch(query)
+        return [Trial(**record) for record in records]
@@ -1,3 +1,5 @@
+from .client import SheetsClient
+from .exceptions import SheetsAPIError, WorksheetNotFoundError
 from .service import GSService
 
-__all__ = ("GSService",)
+__all__ = ("GSService", "SheetsAPIError", "SheetsClient", "WorksheetNotFoundError")
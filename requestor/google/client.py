@@ -0,0 +1,166 @@
+import asyncio
+import json
+import re
+import time
+import typing as tp
+from http import HTTPStatus
+
+from aiohttp import ClientSession, ClientTimeout
+from google.auth import crypt, jwt
+from pydantic import BaseModel  # pylint: disable=no-name-in-module
+
+from requestor.log import app_logger
+
+from .exceptions import SheetsAPIError
+
+SHEETS_API_URL: tp.Final = "https://sheets.googleapis.com"
+SCOPES: tp.Final = ("https://www.googleapis.com/auth/spreadsheets",)
+JWT_BEARER_GRANT_TYPE: tp.Final = "urn:ietf:params:oauth:grant-type:jwt-bearer"
+TOKEN_LIFETIME: tp.Final = 3600
+# Token is refreshed in advance, so requests never wait for it
+TOKEN_REFRESH_MARGIN: tp.Final = 300
+TOKEN_RETRY_INTERVAL: tp.Final = 10
+
+SPREADSHEET_ID_PATTERN: tp.Final = re.compile(r"/spreadsheets/d/([a-zA-Z0-9-_]+)")
+
+
+def extract_spreadsheet_id(url: str) -> str:
+    match = SPREADSHEET_ID_PATTERN.search(url)
+    if match is None:
+        raise ValueError(f"Spreadsheet id not found in url `{url}`")
+    return match.group(1)
+
+
+def parse_retry_after(value: tp.Optional[str]) -> tp.Optional[float]:
+    """Backoff hint in seconds, HTTP-date format isn't used by Google APIs"""
+    if value is None:
+        return None
+    try:
+        return max(float(value), 0)
+    except ValueError:
+        return None
+
+
+class SheetsResponse(BaseModel):
+    status: int
+    body: str
+    retry_after: tp.Optional[float] = None
+
+
+class SheetsClient(BaseModel):
+    """
+    Async Google Sheets API client authorized with service account.
+
+    Access token is cached and refreshed in background before it expires.
+    """
+
+    credentials: tp.Dict[str, tp.Any]
+    base_url: str = SHEETS_API_URL
+    # Token url from credentials is used by default
+    token_url: tp.Optional[str] = None
+    timeout: float = 10
+
+    session: tp.Optional[ClientSession] = None
+    token: tp.Optional[str] = None
+    token_expires_at: float = 0
+    refresh_task: tp.Optional[asyncio.Task] = None
+
+    class Config:
+        arbitrary_types_allowed = True
+        copy_on_model_validation = "none"
+
+    async def setup(self) -> None:
+        self.session = ClientSession(timeout=ClientTimeout(total=self.timeout))
+        await self._refresh_token()
+        self.refresh_task = asyncio.create_task(self._refresh_token_periodically())
+
+    async def cleanup(self) -> None:
+        if self.refresh_task is not None:
+            self.refresh_task.cancel()
+            try:
+                await self.refresh_task
+            except asyncio.CancelledError:
+                pass
+            self.refresh_task = None
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
+
+    async def get_spreadsheet(self, spreadsheet_id: str) -> tp.Dict[str, tp.Any]:
+        return await self._request(
+            "GET",
+            f"/v4/spreadsheets/{spreadsheet_id}",
+            params={"fields": "sheets.properties"},
+        )
+
+    async def values_batch_update(
+        self, spreadsheet_id: str, body: tp.Dict[str, tp.Any]
+    ) -> tp.Dict[str, tp.Any]:
+        return await self._request(
+            "POST", f"/v4/spreadsheets/{spreadsheet_id}/values:batchUpdate", json=body
+        )
+
+    async def _request(self, method: str, path: str, **kwargs: tp.Any) -> tp.Dict[str, tp.Any]:
+        if self.token is None or time.time() >= self.token_expires_at:
+            await self._refresh_token()
+
+        response = await self._send(method, path, **kwargs)
+        # Token may be revoked before it expires, so get a new one once
+        if response.status == HTTPStatus.UNAUTHORIZED:
+            await self._refresh_token()
+            response = await self._send(method, path, **kwargs)
+
+        if response.status >= HTTPStatus.BAD_REQUEST:
+            raise SheetsAPIError(response.status, response.body, response.retry_after)
+        return json.loads(response.body)
+
+    async def _send(self, method: str, path: str, **kwargs: tp.Any) -> SheetsResponse:
+        if self.session is None:
+            raise RuntimeError("Setup before using")
+
+        headers = {"Authorization": f"Bearer {self.token}"}
+        async with self.session.request(
+            method, f"{self.base_url}{path}", headers=headers, **kwargs
+        ) as response:
+            return SheetsResponse(
+                status=response.status,
+                body=await response.text(),
+                retry_after=parse_retry_after(response.headers.get("Retry-After")),
+            )
+
+    def _make_assertion(self, token_url: str) -> str:
+        signer = crypt.RSASigner.from_service_account_info(self.credentials)
+        now = int(time.time())
+        payload = {
+            "iss": self.credentials["client_email"],
+            "scope": " ".join(SCOPES),
+            "aud": token_url,
+            "iat": now,
+            "exp": now + TOKEN_LIFETIME,
+        }
+        return jwt.encode(signer, payload).decode()
+
+    async def _refresh_token(self) -> None:
+        if self.session is None:
+            raise RuntimeError("Setup before using")
+
+        token_url = self.token_url or self.credentials["token_uri"]
+        data = {"grant_type": JWT_BEARER_GRANT_TYPE, "assertion": self._make_assertion(token_url)}
+        requested_at = time.time()
+        async with self.session.post(token_url, data=data) as response:
+            if response.status != HTTPStatus.OK:
+                raise SheetsAPIError(response.status, await response.text())
+            token_info = await response.json()
+
+        self.token = token_info["access_token"]
+        self.token_expires_at = requested_at + token_info.get("expires_in", TOKEN_LIFETIME)
+
+    async def _refresh_token_periodically(self) -> None:
+        while True:
+            delay = self.token_expires_at - TOKEN_REFRESH_MARGIN - time.time()
+            await asyncio.sleep(max(delay, 0))
+            try:
+                await self._refresh_token()
+            except Exception as e:  # pylint: disable=broad-except
+                app_logger.error(f"Failed to refresh Sheets API token: {e!r}")
+                await asyncio.sleep(TOKEN_RETRY_INTERVAL)
@@ -0,0 +1,16 @@
+import typing as tp
+
+
+class SheetsAPIError(Exception):
+    """Raised when Google Sheets or OAuth API responds with an error"""
+
+    def __init__(self, status: int, message: str, retry_after: tp.Optional[float] = None) -> None:
+        self.status = status
+        self.message = message
+        # Backoff hint from `Retry-After` header in seconds
+        self.retry_after = retry_after
+        super().__init__(f"Sheets API error {status}: {message}")
+
+
+class WorksheetNotFoundError(Exception):
+    pass
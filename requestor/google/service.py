@@ -1,13 +1,67 @@
+import asyncio
+import json
 import typing as tp
-from tempfile import NamedTemporaryFile
+from http import HTTPStatus
 
-import gspread
-from asgiref.sync import sync_to_async
 from pydantic import BaseModel  # pylint: disable=no-name-in-module
 
+from requestor.log import app_logger
 from requestor.models import ByModelLeaderboardRow, GlobalLeaderboardRow
 
+from .client import SHEETS_API_URL, SheetsClient, extract_spreadsheet_id
+from .exceptions import SheetsAPIError, WorksheetNotFoundError
+from .write_queue import QuotaTracker, RetryPolicy, SheetsWriteQueue
+
 DT_FMT = "%Y-%m-%d %H:%M:%S"
+# Leaderboards have 5 columns and header in the first row
+N_COLUMNS = 5
+LAST_COLUMN = "E"
+FIRST_ROW = 2
+
+Values = tp.List[tp.List[tp.Any]]
+
+
+def make_values_diff(old: Values, new: Values) -> tp.List[tp.Dict[str, tp.Any]]:
+    """
+    Ranges to update to turn `old` rows into `new` ones.
+    Consecutive changed rows are merged, removed rows are emptied.
+    """
+    n_cols = max((len(row) for row in old + new), default=0)
+    ranges: tp.List[tp.Tuple[int, Values]] = []  # First row index and rows
+    for i in range(max(len(old), len(new))):
+        old_row = old[i] if i < len(old) else None
+        new_row = new[i] if i < len(new) else [""] * n_cols
+        if old_row == new_row:
+            continue
+        if ranges and ranges[-1][0] + len(ranges[-1][1]) == i:
+            ranges[-1][1].append(new_row)
+        else:
+            ranges.append((i, [new_row]))
+
+    return [
+        {
+            "range": f"A{first + FIRST_ROW}:{LAST_COLUMN}{first + len(rows) + FIRST_ROW - 1}",
+            "values": rows,
+        }
+        for first, rows in ranges
+    ]
+
+
+def is_rate_limited(error: Exception) -> bool:
+    return isinstance(error, SheetsAPIError) and error.status == HTTPStatus.TOO_MANY_REQUESTS
+
+
+def make_absolute_range(page_name: str, range_name: str) -> str:
+    escaped_name = page_name.replace("'", "''")
+    return f"'{escaped_name}'!{range_name}"
+
+
+def log_write_result(write: asyncio.Future) -> None:
+    if write.cancelled():
+        return
+    error = write.exception()
+    if error is not None:
+        app_logger.error(f"Failed to write leaderboards to Sheets API: {error!r}")
 
 
 class GSService(BaseModel):
@@ -17,64 +71,157 @@ class GSService(BaseModel):
     global_leaderboard_page_max_rows: int
     by_model_leaderboard_page_name: str
     by_model_leaderboard_page_max_rows: int
-
-    sheet: tp.Optional[gspread.Spreadsheet] = None
+    api_base_url: str = SHEETS_API_URL
+    token_url: tp.Optional[str] = None
+    timeout: float = 10
+    write_quota_per_minute: int = 60
+    write_max_attempts: int = 5
+
+    client: tp.Optional[SheetsClient] = None
+    write_queue: tp.Optional[SheetsWriteQueue] = None
+    # Write of the last queued values, the earlier ones are done before it
+    last_write: tp.Optional[asyncio.Future] = None
+    # Last published values by page name, they're unknown until
+    # the first successful publication
+    snapshots: tp.Dict[str, Values] = {}
 
     class Config:
         arbitrary_types_allowed = True
+        # Share instance between services instead of copying on validation
+        copy_on_model_validation = "none"
 
-    async def setup(self) -> None:
-        return await sync_to_async(self._setup)()
+    @property
+    def spreadsheet_id(self) -> str:
+        return extract_spreadsheet_id(self.url)
 
-    def _setup(self) -> None:
-        with NamedTemporaryFile("w+") as f:
-            f.write(self.credentials)
-            f.seek(0)
-            sa = gspread.service_account(f.name)
-        self.sheet = sa.open_by_url(self.url)
-
-    def _check_setup(self) -> None:
-        if self.sheet is None:
+    async def setup(self) -> None:
+        self.client = SheetsClient(
+            credentials=json.loads(self.credentials),
+            base_url=self.api_base_url,
+            token_url=self.token_url,
+            timeout=self.timeout,
+        )
+        await self.client.setup()
+
+        # Check worksheets once, updates address them by name in ranges
+        spreadsheet = await self.client.get_spreadsheet(self.spreadsheet_id)
+        page_names = {sheet["properties"]["title"] for sheet in spreadsheet["sheets"]}
+        for page_name in (self.global_leaderboard_page_name, self.by_model_leaderboard_page_name):
+            if page_name not in page_names:
+                raise WorksheetNotFoundError(f"Worksheet `{page_name}` not found")
+
+        retry_policy = RetryPolicy(
+            QuotaTracker(self.write_quota_per_minute), self.write_max_attempts
+        )
+        self.write_queue = SheetsWriteQueue(self._write_values, retry_policy)
+        self.write_queue.start()
+
+    async def cleanup(self) -> None:
+        if self.write_queue is not None:
+            try:
+                await self.flush()
+            except Exception:  # pylint: disable=broad-except
+                pass  # Failed write is already logged
+            await self.write_queue.stop()
+            self.write_queue = None
+        if self.client is not None:
+            await self.client.cleanup()
+            self.client = None
+
+    def _check_setup(self) -> tp.Tuple[SheetsClient, SheetsWriteQueue[Values]]:
+        if self.client is None or self.write_queue is None:
             raise RuntimeError("Setup before using")
+        return self.client, self.write_queue
 
     async def update_global_leaderboard(self, rows: tp.List[GlobalLeaderboardRow]) -> None:
-        return await sync_to_async(self._update_global_leaderboard)(rows)
-
-    def _update_global_leaderboard(self, rows: tp.List[GlobalLeaderboardRow]) -> None:
-        self._check_setup()
-
-        values = [
-            [
-                i,
-                row.team_name,
-                row.best_score if row.best_score is not None else "-",
-                row.n_attempts,
-                row.last_attempt.strftime(DT_FMT) if row.last_attempt is not None else "-",
-            ]
-            for i, row in enumerate(rows, 1)
-        ]
-
-        ws = self.sheet.worksheet(self.global_leaderboard_page_name)
-        ws.batch_clear([f"A2:E{self.global_leaderboard_page_max_rows}"])
-        ws.update(f"A2:E{len(rows) + 1}", values, raw=False)
+        return await self.update_leaderboards(global_rows=rows)
 
     async def update_by_model_leaderboard(self, rows: tp.List[ByModelLeaderboardRow]) -> None:
-        return await sync_to_async(self._update_by_model_leaderboard)(rows)
-
-    def _update_by_model_leaderboard(self, rows: tp.List[ByModelLeaderboardRow]) -> None:
-        self._check_setup()
-
-        values = [
-            [
-                row.team_name,
-                row.model_name,
-                row.best_score,
-                row.n_attempts,
-                row.last_attempt.strftime(DT_FMT),
-            ]
-            for row in rows
+        return await self.update_leaderboards(by_model_rows=rows)
+
+    async def update_leaderboards(
+        self,
+        global_rows: tp.Optional[tp.List[GlobalLeaderboardRow]] = None,
+        by_model_rows: tp.Optional[tp.List[ByModelLeaderboardRow]] = None,
+    ) -> None:
+        """
+        Queue given leaderboards to be updated with one API request.
+        It doesn't wait for the write, so retries of rate limited requests
+        don't delay other sinks. Failed writes are logged,
+        use `flush` to wait for queued values.
+        """
+        _, write_queue = self._check_setup()
+
+        values_by_page = {}
+        if global_rows is not None:
+            values_by_page[self.global_leaderboard_page_name] = make_global_values(global_rows)
+        if by_model_rows is not None:
+            values_by_page[self.by_model_leaderboard_page_name] = make_by_model_values(
+                by_model_rows
+            )
+        if values_by_page:
+            self.last_write = write_queue.submit(values_by_page)
+            self.last_write.add_done_callback(log_write_result)
+
+    async def flush(self) -> None:
+        """Wait until queued values are written, raise if their write failed"""
+        if self.last_write is not None:
+            await asyncio.shield(self.last_write)
+
+    async def _write_values(self, values_by_page: tp.Dict[str, Values]) -> None:
+        client, _ = self._check_setup()
+
+        max_rows = {
+            self.global_leaderboard_page_name: self.global_leaderboard_page_max_rows,
+            self.by_model_leaderboard_page_name: self.by_model_leaderboard_page_max_rows,
+        }
+        data: tp.List[tp.Dict[str, tp.Any]] = []
+        for page_name, values in values_by_page.items():
+            snapshot = self.snapshots.get(page_name)
+            if snapshot is None:
+                # Unknown content is overwritten with empty cells up to max
+                snapshot = [[None] * N_COLUMNS] * (max_rows[page_name] - FIRST_ROW + 1)
+            data.extend(
+                {**item, "range": make_absolute_range(page_name, item["range"])}
+                for item in make_values_diff(snapshot, values)
+            )
+
+        if data:
+            try:
+                await client.values_batch_update(
+                    self.spreadsheet_id, {"valueInputOption": "USER_ENTERED", "data": data}
+                )
+            except Exception as e:
+                # Rate limited request is rejected as a whole, otherwise
+                # worksheet content is unknown, so drop snapshots
+                if not is_rate_limited(e):
+                    for page_name in values_by_page:
+                        self.snapshots.pop(page_name, None)
+                raise
+        self.snapshots.update(values_by_page)
+
+
+def make_global_values(rows: tp.List[GlobalLeaderboardRow]) -> Values:
+    return [
+        [
+            i,
+            row.team_name,
+            row.best_score if row.best_score is not None else "-",
+            row.n_attempts,
+            row.last_attempt.strftime(DT_FMT) if row.last_attempt is not None else "-",
         ]
-
-        ws = self.sheet.worksheet(self.by_model_leaderboard_page_name)
-        ws.batch_clear([f"A2:E{self.by_model_leaderboard_page_max_rows}"])
-        ws.update(f"A2:E{len(rows) + 1}", values, raw=False)
+        for i, row in enumerate(rows, 1)
+    ]
+
+
+def make_by_model_values(rows: tp.List[ByModelLeaderboardRow]) -> Values:
+    return [
+        [
+            row.team_name,
+            row.model_name,
+            row.best_score,
+            row.n_attempts,
+            row.last_attempt.strftime(DT_FMT),
+        ]
+        for row in rows
+    ]
@@ -0,0 +1,172 @@
+import asyncio
+import time
+import typing as tp
+from collections import deque
+from dataclasses import dataclass
+from http import HTTPStatus
+
+from requestor.log import app_logger
+
+from .exceptions import SheetsAPIError
+
+T = tp.TypeVar("T")
+
+QUOTA_PERIOD: tp.Final = 60
+MIN_BACKOFF: tp.Final = 1
+MAX_BACKOFF: tp.Final = 64
+
+
+class QuotaTracker:
+    """
+    Tracks requests made during the last `period` seconds and tells
+    how long to wait, so requests are spaced evenly
+    within `max_requests` quota.
+    """
+
+    def __init__(self, max_requests: int, period: float = QUOTA_PERIOD) -> None:
+        if max_requests <= 0 or period <= 0:
+            raise ValueError("`max_requests` and `period` should be positive numbers")
+
+        self.max_requests = max_requests
+        self.period = period
+        self.requests: tp.Deque[float] = deque()
+        self.blocked_until = 0.0
+
+    def get_delay(self) -> float:
+        now = time.monotonic()
+        while self.requests and self.requests[0] <= now - self.period:
+            self.requests.popleft()
+
+        delay = self.blocked_until - now
+        if self.requests:
+            delay = max(delay, self.requests[-1] + self.period / self.max_requests - now)
+        if len(self.requests) >= self.max_requests:
+            delay = max(delay, self.requests[0] + self.period - now)
+        return max(delay, 0)
+
+    def add_request(self) -> None:
+        self.requests.append(time.monotonic())
+
+    def block(self, delay: float) -> None:
+        self.blocked_until = max(self.blocked_until, time.monotonic() + delay)
+
+
+@dataclass
+class RetryPolicy:
+    """Quota to space writes within and attempts of rate limited write"""
+
+    quota: QuotaTracker
+    max_attempts: int
+
+    def get_backoff(self, attempt: int, retry_after: tp.Optional[float]) -> float:
+        """Delay before the next attempt, it's respected by quota"""
+        backoff = retry_after or min(MIN_BACKOFF * 2 ** (attempt - 1), MAX_BACKOFF)
+        self.quota.block(backoff)
+        return backoff
+
+
+class SheetsWriteQueue(tp.Generic[T]):
+    """
+    Serializes writes to Sheets API within quota and retries rate limited ones.
+
+    Only the latest value of every key is kept, so a newer snapshot replaces
+    a queued one instead of being written after it.
+    """
+
+    def __init__(
+        self,
+        write: tp.Callable[[tp.Dict[str, T]], tp.Awaitable[None]],
+        retry_policy: RetryPolicy,
+    ) -> None:
+        self.write = write
+        self.retry_policy = retry_policy
+
+        self.pending: tp.Dict[str, T] = {}
+        self.waiters: tp.List[asyncio.Future] = []
+        # Waiters of values which are being written now
+        self.in_flight: tp.List[asyncio.Future] = []
+        self.has_pending = asyncio.Event()
+        self.task: tp.Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        self.task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self.task is not None:
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+            self.task = None
+        self._resolve(self.in_flight + self.waiters, RuntimeError("Write queue is stopped"))
+        self.in_flight = []
+        self.waiters = []
+
+    def submit(self, values: tp.Dict[str, T]) -> asyncio.Future:
+        """
+        Queue values without waiting for the write.
+        Returned future is done when they or newer ones are written.
+        """
+        if self.task is None:
+            raise RuntimeError("Start before using")
+
+        waiter = asyncio.get_running_loop().create_future()
+        self.pending.update(values)
+        self.waiters.append(waiter)
+        self.has_pending.set()
+        return waiter
+
+    async def put(self, values: tp.Dict[str, T]) -> None:
+        """Queue values and wait until they or newer ones are written"""
+        await self.submit(values)
+
+    async def _run(self) -> None:
+        attempt = 0
+        while True:
+            await self.has_pending.wait()
+            await asyncio.sleep(self.retry_policy.quota.get_delay())
+
+            values, self.pending = self.pending, {}
+            waiters, self.waiters = self.waiters, []
+            self.in_flight = waiters
+            self.has_pending.clear()
+
+            self.retry_policy.quota.add_request()
+            attempt += 1
+            try:
+                await self.write(values)
+                self.in_flight = []
+            except SheetsAPIError as e:
+                self.in_flight = []
+                is_rate_limited = e.status == HTTPStatus.TOO_MANY_REQUESTS
+                if not is_rate_limited or attempt >= self.retry_policy.max_attempts:
+                    self._resolve(waiters, e)
+                    attempt = 0
+                    continue
+
+                backoff = self.retry_policy.get_backoff(attempt, e.retry_after)
+                app_logger.warning(f"Sheets API rate limit exceeded, retry in {backoff}s")
+                # Values queued meanwhile are newer than failed ones
+                self.pending = {**values, **self.pending}
+                self.waiters = waiters + self.waiters
+                self.has_pending.set()
+            except Exception as e:  # pylint: disable=broad-except
+                self.in_flight = []
+                self._resolve(waiters, e)
+                attempt = 0
+            else:
+                self._resolve(waiters)
+                attempt = 0
+
+    @staticmethod
+    def _resolve(
+        waiters: tp.List[asyncio.Future], error: tp.Optional[BaseException] = None
+    ) -> None:
+        for waiter in waiters:
+            if waiter.done():
+                continue
+            if error is None:
+                waiter.set_result(None)
+            else:
+                waiter.set_exception(error)
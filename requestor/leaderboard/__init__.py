@@ -0,0 +1,28 @@
+from .cache import LeaderboardCache, TeamRank
+from .file_sink import FileLeaderboardSink
+from .history import (
+    HistoryLeaderboardSink,
+    RankHistory,
+    make_rank_history,
+    render_rank_history_csv,
+    render_rank_history_svg,
+)
+from .publisher import LeaderboardPublisher, PublisherStatus, update_leaderboards
+from .sinks import LeaderboardSink
+from .web import register_leaderboard_routes
+
+__all__ = (
+    "FileLeaderboardSink",
+    "HistoryLeaderboardSink",
+    "LeaderboardCache",
+    "LeaderboardPublisher",
+    "LeaderboardSink",
+    "PublisherStatus",
+    "RankHistory",
+    "TeamRank",
+    "make_rank_history",
+    "register_leaderboard_routes",
+    "render_rank_history_csv",
+    "render_rank_history_svg",
+    "update_leaderboards",
+)
@@ -0,0 +1,62 @@
+import typing as tp
+from datetime import datetime
+
+from pydantic import BaseModel  # pylint: disable=no-name-in-module
+
+from requestor.models import ByModelLeaderboardRow, GlobalLeaderboardRow
+from requestor.utils import utc_now
+
+
+class TeamRank(BaseModel):
+    rank: int
+    n_teams: int
+    row: GlobalLeaderboardRow
+
+
+class LeaderboardCache(BaseModel):
+    """
+    In-memory snapshot of global leaderboard with team name to rank index,
+    so bot commands are answered without querying DB.
+
+    It's updated as a leaderboard sink, i.e. on every publication.
+    """
+
+    global_rows: tp.List[GlobalLeaderboardRow] = []
+    ranks: tp.Dict[str, int] = {}
+    updated_at: tp.Optional[datetime] = None
+
+    class Config:
+        # Bot handlers should read the same instance publisher updates
+        copy_on_model_validation = "none"
+
+    @property
+    def is_ready(self) -> bool:
+        return self.updated_at is not None
+
+    async def setup(self) -> None:
+        pass
+
+    async def cleanup(self) -> None:
+        pass
+
+    async def update_leaderboards(
+        self,
+        global_rows: tp.Optional[tp.List[GlobalLeaderboardRow]] = None,
+        by_model_rows: tp.Optional[tp.List[ByModelLeaderboardRow]] = None,
+    ) -> None:
+        if global_rows is None:
+            return
+
+        ranks = {row.team_name: rank for rank, row in enumerate(global_rows, 1)}
+        # Readers see either old or new snapshot, never a mix of them
+        self.global_rows, self.ranks = list(global_rows), ranks
+        self.updated_at = utc_now()
+
+    def get_top(self, n: int) -> tp.List[GlobalLeaderboardRow]:
+        return self.global_rows[:n]
+
+    def get_team_rank(self, team_name: str) -> tp.Optional[TeamRank]:
+        rank = self.ranks.get(team_name)
+        if rank is None:
+            return None
+        return TeamRank(rank=rank, n_teams=len(self.global_rows), row=self.global_rows[rank - 1])
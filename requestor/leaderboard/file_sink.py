@@ -0,0 +1,145 @@
+import csv
+import gzip
+import hashlib
+import html
+import io
+import os
+import typing as tp
+from pathlib import Path
+from tempfile import NamedTemporaryFile
+
+import orjson
+from asgiref.sync import sync_to_async
+from pydantic import BaseModel  # pylint: disable=no-name-in-module
+
+from requestor.models import ByModelLeaderboardRow, GlobalLeaderboardRow
+
+GLOBAL_LEADERBOARD_NAME: tp.Final = "global"
+BY_MODEL_LEADERBOARD_NAME: tp.Final = "by_model"
+
+CONTENT_TYPES: tp.Final = {
+    "html": "text/html",
+    "csv": "text/csv",
+    "json": "application/json",
+}
+
+LeaderboardRow = tp.Union[GlobalLeaderboardRow, ByModelLeaderboardRow]
+
+
+class LeaderboardFile(BaseModel):
+    content: bytes
+    gzipped: bytes
+    etag: str
+    content_type: str
+
+
+def make_leaderboard_file(content: bytes, content_type: str) -> LeaderboardFile:
+    return LeaderboardFile(
+        content=content,
+        # Files are compressed once on publication instead of every request
+        gzipped=gzip.compress(content),
+        etag=f'"{hashlib.sha1(content).hexdigest()}"',  # nosec
+        content_type=content_type,
+    )
+
+
+def render_json(rows: tp.Sequence[LeaderboardRow]) -> bytes:
+    return orjson.dumps([row.dict() for row in rows])
+
+
+def format_value(value: tp.Any, default: str) -> str:
+    return default if value is None else str(value)
+
+
+def render_csv(rows: tp.Sequence[LeaderboardRow], columns: tp.Sequence[str]) -> bytes:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    for row in rows:
+        writer.writerow([format_value(getattr(row, col), "") for col in columns])
+    return buffer.getvalue().encode()
+
+
+def render_html(title: str, rows: tp.Sequence[LeaderboardRow], columns: tp.Sequence[str]) -> bytes:
+    def make_html_row(cells: tp.Iterable[str], tag: str) -> str:
+        return "<tr>" + "".join(f"<{tag}>{html.escape(cell)}</{tag}>" for cell in cells) + "</tr>"
+
+    header = make_html_row(columns, "th")
+    body = "".join(
+        make_html_row((format_value(getattr(row, col), "-") for col in columns), "td")
+        for row in rows
+    )
+    return (
+        "<!DOCTYPE html>"
+        f'<html><head><meta charset="utf-8"><title>{html.escape(title)}</title></head>'
+        f"<body><table><thead>{header}</thead><tbody>{body}</tbody></table></body>"
+        "</html>"
+    ).encode()
+
+
+class FileLeaderboardSink(BaseModel):
+    """
+    Writes leaderboards to static HTML, CSV and JSON files in `root_dir`.
+
+    Files are replaced atomically, so they can be served while publishing.
+    Last published files are also kept in memory with compressed versions
+    and ETags to be served by the bot web server.
+    """
+
+    root_dir: Path
+    files: tp.Dict[str, LeaderboardFile] = {}
+
+    class Config:
+        copy_on_model_validation = "none"
+
+    async def setup(self) -> None:
+        self.root_dir.mkdir(parents=True, exist_ok=True)
+
+    async def cleanup(self) -> None:
+        pass
+
+    async def update_leaderboards(
+        self,
+        global_rows: tp.Optional[tp.List[GlobalLeaderboardRow]] = None,
+        by_model_rows: tp.Optional[tp.List[ByModelLeaderboardRow]] = None,
+    ) -> None:
+        return await sync_to_async(self._update_leaderboards)(global_rows, by_model_rows)
+
+    def _update_leaderboards(
+        self,
+        global_rows: tp.Optional[tp.List[GlobalLeaderboardRow]],
+        by_model_rows: tp.Optional[tp.List[ByModelLeaderboardRow]],
+    ) -> None:
+        if global_rows is not None:
+            self._write_leaderboard(GLOBAL_LEADERBOARD_NAME, global_rows, GlobalLeaderboardRow)
+        if by_model_rows is not None:
+            self._write_leaderboard(
+                BY_MODEL_LEADERBOARD_NAME, by_model_rows, ByModelLeaderboardRow
+            )
+
+    def _write_leaderboard(
+        self,
+        name: str,
+        rows: tp.Sequence[LeaderboardRow],
+        row_type: tp.Type[LeaderboardRow],
+    ) -> None:
+        columns = list(row_type.__fields__)
+        contents = {
+            "html": render_html(name, rows, columns),
+            "csv": render_csv(rows, columns),
+            "json": render_json(rows),
+        }
+        for extension, content in contents.items():
+            file_name = f"{name}.{extension}"
+            file = make_leaderboard_file(content, CONTENT_TYPES[extension])
+            self._write_file(file_name, file.content)
+            self._write_file(f"{file_name}.gz", file.gzipped)
+            self.files[file_name] = file
+
+    def _write_file(self, file_name: str, content: bytes) -> None:
+        # Temporary file is in the same dir, so replacing it is atomic
+        with NamedTemporaryFile(dir=self.root_dir, prefix=f".{file_name}.", delete=False) as f:
+            f.write(content)
+        # Temporary files are readable by owner only, but these ones are public
+        os.chmod(f.name, 0o644)
+        os.replace(f.name, self.root_dir / file_name)
@@ -0,0 +1,188 @@
+import csv
+import html
+import io
+import typing as tp
+from datetime import datetime
+
+from pydantic import BaseModel  # pylint: disable=no-name-in-module
+
+from requestor.db import LeaderboardRepository
+from requestor.models import ByModelLeaderboardRow, GlobalLeaderboardRow, LeaderboardSnapshot
+
+DT_FMT: tp.Final = "%Y-%m-%d %H:%M:%S"
+
+# Chart geometry in pixels
+CHART_WIDTH: tp.Final = 960
+CHART_ROW_HEIGHT: tp.Final = 24
+CHART_MARGIN: tp.Final = 40
+CHART_LEGEND_WIDTH: tp.Final = 200
+CHART_COLORS: tp.Final = (
+    "#1f77b4",
+    "#ff7f0e",
+    "#2ca02c",
+    "#d62728",
+    "#9467bd",
+    "#8c564b",
+    "#e377c2",
+    "#7f7f7f",
+    "#bcbd22",
+    "#17becf",
+)
+
+
+class HistoryLeaderboardSink(BaseModel):
+    """Appends global leaderboard snapshots to DB to show its history"""
+
+    leaderboard_repository: LeaderboardRepository
+    metric: str
+
+    class Config:
+        arbitrary_types_allowed = True
+        copy_on_model_validation = "none"
+
+    async def setup(self) -> None:
+        pass
+
+    async def cleanup(self) -> None:
+        pass
+
+    async def update_leaderboards(
+        self,
+        global_rows: tp.Optional[tp.List[GlobalLeaderboardRow]] = None,
+        by_model_rows: tp.Optional[tp.List[ByModelLeaderboardRow]] = None,
+    ) -> None:
+        if global_rows is not None:
+            await self.leaderboard_repository.add_leaderboard_snapshot(self.metric, global_rows)
+
+
+class RankHistory(BaseModel):
+    timestamps: tp.List[datetime]
+    # Ranks by team name for every timestamp, None if team was absent
+    ranks: tp.Dict[str, tp.List[tp.Optional[int]]]
+
+
+def make_rank_history(snapshots: tp.Sequence[LeaderboardSnapshot]) -> RankHistory:
+    ranks: tp.Dict[str, tp.List[tp.Optional[int]]] = {}
+    for i, snapshot in enumerate(snapshots):
+        for rank, team_name in enumerate(snapshot.team_names, 1):
+            # Teams go in order of appearance
+            ranks.setdefault(team_name, [None] * len(snapshots))[i] = rank
+    return RankHistory(timestamps=[snapshot.created_at for snapshot in snapshots], ranks=ranks)
+
+
+def render_rank_history_csv(history: RankHistory) -> bytes:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    team_names = list(history.ranks)
+    writer.writerow(["created_at"] + team_names)
+    for i, timestamp in enumerate(history.timestamps):
+        ranks = (history.ranks[team_name][i] for team_name in team_names)
+        row: tp.List[str] = [timestamp.strftime(DT_FMT)]
+        writer.writerow(row + ["" if r is None else str(r) for r in ranks])
+    return buffer.getvalue().encode()
+
+
+def render_line(
+    points: tp.Sequence[tp.Optional[tp.Tuple[float, float]]], color: str
+) -> tp.List[str]:
+    """SVG elements of line which is broken at missing points"""
+    segments: tp.List[tp.List[tp.Tuple[float, float]]] = [[]]
+    for point in points:
+        if point is None:
+            segments.append([])
+        else:
+            segments[-1].append(point)
+
+    elements = []
+    for segment in filter(None, segments):
+        if len(segment) == 1:
+            ((px, py),) = segment
+            elements.append(f'<circle cx="{px:.1f}" cy="{py:.1f}" r="2" fill="{color}"/>')
+        else:
+            coords = " ".join(f"{px:.1f},{py:.1f}" for px, py in segment)
+            elements.append(f'<polyline points="{coords}" fill="none" stroke="{color}"/>')
+    return elements
+
+
+class ChartScale:
+    """Maps timestamps to x and ranks to y coordinates of the plot"""
+
+    def __init__(self, timestamps: tp.Sequence[float], plot_width: float) -> None:
+        # Snapshots are ordered by time
+        self.start, self.end = (timestamps[0], timestamps[-1]) if timestamps else (0.0, 0.0)
+        self.plot_width = plot_width
+
+    def x(self, timestamp: float) -> float:
+        if self.end == self.start:
+            return CHART_MARGIN + self.plot_width / 2
+        return CHART_MARGIN + (timestamp - self.start) / (self.end - self.start) * self.plot_width
+
+    @staticmethod
+    def y(rank: int) -> float:
+        return CHART_MARGIN + (rank - 0.5) * CHART_ROW_HEIGHT
+
+
+def render_rank_axis(n_ranks: int, scale: ChartScale) -> tp.List[str]:
+    return [
+        f'<text x="4" y="{scale.y(rank)}" dominant-baseline="middle">{rank}</text>'
+        for rank in range(1, n_ranks + 1)
+    ]
+
+
+def render_time_axis(
+    timestamps: tp.Sequence[datetime], height: float, scale: ChartScale
+) -> tp.List[str]:
+    """Labels of the first and the last snapshot time at the bottom"""
+    if not timestamps:
+        return []
+    return [
+        f'<text x="{scale.x(timestamp.timestamp())}" y="{height - CHART_MARGIN / 2}" '
+        f'text-anchor="{anchor}">{timestamp.strftime(DT_FMT)}</text>'
+        for timestamp, anchor in ((timestamps[0], "start"), (timestamps[-1], "end"))
+    ]
+
+
+def render_legend_item(team_name: str, i: int, color: str) -> str:
+    legend_y = CHART_MARGIN + i * CHART_ROW_HEIGHT
+    return (
+        f'<text x="{CHART_WIDTH - CHART_LEGEND_WIDTH}" y="{legend_y}" fill="{color}">'
+        f"{html.escape(team_name)}</text>"
+    )
+
+
+def render_team_lines(
+    ranks_by_team: tp.Dict[str, tp.List[tp.Optional[int]]],
+    timestamps: tp.Sequence[float],
+    scale: ChartScale,
+) -> tp.List[str]:
+    """Rank line and legend item of every team"""
+    elements = []
+    for i, (team_name, ranks) in enumerate(ranks_by_team.items()):
+        color = CHART_COLORS[i % len(CHART_COLORS)]
+        points = [
+            (scale.x(timestamp), scale.y(rank)) if rank is not None else None
+            for timestamp, rank in zip(timestamps, ranks)
+        ]
+        elements.extend(render_line(points, color))
+        elements.append(render_legend_item(team_name, i, color))
+    return elements
+
+
+def render_rank_history_svg(history: RankHistory, title: str) -> bytes:
+    """Line chart of ranks over time, the best rank is on top"""
+    n_ranks = max(
+        (r for ranks in history.ranks.values() for r in ranks if r is not None), default=1
+    )
+    height = n_ranks * CHART_ROW_HEIGHT + 2 * CHART_MARGIN
+    timestamps = [timestamp.timestamp() for timestamp in history.timestamps]
+    scale = ChartScale(timestamps, CHART_WIDTH - 2 * CHART_MARGIN - CHART_LEGEND_WIDTH)
+
+    elements = [f'<text x="{CHART_MARGIN}" y="{CHART_MARGIN / 2}">{html.escape(title)}</text>']
+    elements.extend(render_rank_axis(n_ranks, scale))
+    elements.extend(render_team_lines(history.ranks, timestamps, scale))
+    elements.extend(render_time_axis(history.timestamps, height, scale))
+
+    return (
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{CHART_WIDTH}" height="{height}" '
+        'font-family="sans-serif" font-size="12">' + "".join(elements) + "</svg>"
+    ).encode()
@@ -0,0 +1,171 @@
+import asyncio
+import typing as tp
+from datetime import datetime
+
+from pydantic import BaseModel, Field  # pylint: disable=no-name-in-module
+
+from requestor.db import LeaderboardRepository
+from requestor.log import app_logger
+from requestor.utils import utc_now
+
+from .sinks import LeaderboardSink
+
+
+async def update_leaderboards(
+    leaderboard_repository: LeaderboardRepository,
+    sinks: tp.Sequence[LeaderboardSink],
+    metric: str,
+) -> None:
+    global_rows, by_model_rows = await asyncio.gather(
+        leaderboard_repository.get_global_leaderboard(metric),
+        leaderboard_repository.get_by_model_leaderboard(metric),
+    )
+    # Failure of one sink, e.g. rate limited Sheets API, shouldn't block others
+    results = await asyncio.gather(
+        *(sink.update_leaderboards(global_rows, by_model_rows) for sink in sinks),
+        return_exceptions=True,
+    )
+    errors = [result for result in results if isinstance(result, BaseException)]
+    if errors:
+        raise errors[0]
+
+
+class PublisherStatus(BaseModel):
+    started_at: datetime
+    # Time of the first successful publication to all sinks
+    synced_at: tp.Optional[datetime]
+    last_published_at: tp.Optional[datetime]
+    last_error: tp.Optional[str]
+    n_pending_sinks: int
+
+
+class LeaderboardPublisher(BaseModel):
+    """
+    Publishes leaderboards in background not more often than
+    once per `publish_interval` seconds.
+
+    Changes are only marked with `mark_dirty`, all marks made during
+    the interval are coalesced to one update with the latest state.
+
+    Sinks are set up in background too, so unavailable sink, e.g. Sheets API
+    outage, doesn't block startup. Sink which fails to set up is skipped
+    and set up again on the next publication.
+    """
+
+    leaderboard_repository: LeaderboardRepository
+    sinks: tp.List[LeaderboardSink]
+    metric: str
+    publish_interval: float = 30
+
+    dirty: tp.Optional[asyncio.Event] = None
+    task: tp.Optional[asyncio.Task] = None
+    ready_sinks: tp.List[LeaderboardSink] = []
+    started_at: datetime = Field(default_factory=utc_now)
+    synced_at: tp.Optional[datetime] = None
+    last_published_at: tp.Optional[datetime] = None
+    last_error: tp.Optional[str] = None
+
+    class Config:
+        arbitrary_types_allowed = True
+        # Background task is bound to instance, so don't copy it on validation
+        copy_on_model_validation = "none"
+
+    async def setup(self) -> None:
+        # Event should be created inside running loop
+        self.dirty = asyncio.Event()
+        self.started_at = utc_now()
+        self.task = asyncio.create_task(self._run())
+
+    async def cleanup(self) -> None:
+        if self.task is not None:
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+            self.task = None
+        # Don't lose changes made since the last publication
+        if self.dirty is not None and self.dirty.is_set():
+            try:
+                await self.publish()
+            except Exception as e:  # pylint: disable=broad-except
+                app_logger.error(f"Failed to publish leaderboards: {e!r}")
+        for sink in self.ready_sinks:
+            await sink.cleanup()
+        self.ready_sinks = []
+
+    def mark_dirty(self) -> None:
+        if self.dirty is None:
+            raise RuntimeError("Setup before using")
+        self.dirty.set()
+
+    def get_status(self) -> PublisherStatus:
+        return PublisherStatus(
+            started_at=self.started_at,
+            synced_at=self.synced_at,
+            last_published_at=self.last_published_at,
+            last_error=self.last_error,
+            n_pending_sinks=len(self.sinks) - len(self.ready_sinks),
+        )
+
+    async def publish(self) -> None:
+        if self.dirty is not None:
+            self.dirty.clear()
+
+        setup_error = await self._setup_sinks()
+        try:
+            await update_leaderboards(self.leaderboard_repository, self.ready_sinks, self.metric)
+        except Exception as e:
+            self.last_error = repr(e)
+            raise
+        if setup_error is not None:
+            self.last_error = repr(setup_error)
+            raise setup_error
+
+        self.last_published_at = utc_now()
+        self.last_error = None
+        if self.synced_at is None:
+            self.synced_at = self.last_published_at
+            duration = (self.synced_at - self.started_at).total_seconds()
+            app_logger.info(f"Leaderboards are synced in {duration:.1f}s after start")
+
+    async def _setup_sinks(self) -> tp.Optional[Exception]:
+        """
+        Set up sinks which aren't ready, the first error is returned.
+        Publisher status is logged after every setup, so operators see
+        which sinks are still pending.
+        """
+        error = None
+        pending_sinks = [
+            sink
+            for sink in self.sinks
+            if not any(sink is ready_sink for ready_sink in self.ready_sinks)
+        ]
+        for sink in pending_sinks:
+            try:
+                await sink.setup()
+            except Exception as e:  # pylint: disable=broad-except
+                app_logger.error(f"Failed to set up {type(sink).__name__}: {e!r}")
+                error = error or e
+            else:
+                self.ready_sinks.append(sink)
+
+        if error is not None:
+            self.last_error = repr(error)
+            app_logger.warning(f"Leaderboard sinks setup failed: {self.get_status().json()}")
+        elif pending_sinks:
+            app_logger.info(f"Leaderboard sinks setup finished: {self.get_status().json()}")
+        return error
+
+    async def _run(self) -> None:
+        if self.dirty is None:
+            raise RuntimeError("Setup before using")
+
+        while True:
+            await self.dirty.wait()
+            try:
+                await self.publish()
+            except Exception as e:  # pylint: disable=broad-except
+                app_logger.error(f"Failed to publish leaderboards: {e!r}")
+                self.dirty.set()
+            await asyncio.sleep(self.publish_interval)
@@ -0,0 +1,21 @@
+import typing as tp
+
+from requestor.models import ByModelLeaderboardRow, GlobalLeaderboardRow
+
+
+@tp.runtime_checkable
+class LeaderboardSink(tp.Protocol):
+    """Destination which leaderboards are published to"""
+
+    async def setup(self) -> None:
+        ...
+
+    async def cleanup(self) -> None:
+        ...
+
+    async def update_leaderboards(
+        self,
+        global_rows: tp.Optional[tp.List[GlobalLeaderboardRow]] = None,
+        by_model_rows: tp.Optional[tp.List[ByModelLeaderboardRow]] = None,
+    ) -> None:
+        ...
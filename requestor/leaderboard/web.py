@@ -0,0 +1,34 @@
+import typing as tp
+
+from aiohttp import web
+
+from .file_sink import FileLeaderboardSink
+
+Handler = tp.Callable[[web.Request], tp.Awaitable[web.StreamResponse]]
+
+
+def make_leaderboard_file_handler(sink: FileLeaderboardSink) -> Handler:
+    async def leaderboard_file_h(request: web.Request) -> web.StreamResponse:
+        file = sink.files.get(request.match_info["file_name"])
+        if file is None:
+            raise web.HTTPNotFound()
+
+        headers = {"ETag": file.etag, "Cache-Control": "no-cache", "Vary": "Accept-Encoding"}
+        if file.etag in request.headers.get("If-None-Match", ""):
+            return web.Response(status=304, headers=headers)
+
+        body = file.content
+        if "gzip" in request.headers.get("Accept-Encoding", ""):
+            body = file.gzipped
+            headers["Content-Encoding"] = "gzip"
+        return web.Response(
+            body=body, headers=headers, content_type=file.content_type, charset="utf-8"
+        )
+
+    return leaderboard_file_h
+
+
+def register_leaderboard_routes(
+    web_app: web.Application, sink: FileLeaderboardSink, path_prefix: str
+) -> None:
+    web_app.router.add_get(f"{path_prefix}/{{file_name}}", make_leaderboard_file_handler(sink))
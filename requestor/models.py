@@ -4,6 +4,7 @@ from datetime import datetime
 from enum import Enum
 from uuid import UUID
 
+import numpy as np
 from aiogram import types
 from aiogram.utils.exceptions import RetryAfter
 from pydantic import BaseModel, Field  # pylint: disable=no-name-in-module
@@ -57,9 +58,78 @@ class Trial(BaseModel):
     status: TrialStatus
 
 
+class TrialRefusal(str, Enum):
+    team_not_found = "team_not_found"
+    model_not_found = "model_not_found"
+    success_limit = "success_limit"
+    waiting_limit = "waiting_limit"
+    failed_limit = "failed_limit"
+
+
+class TrialAdmission(BaseModel):
+    """Result of trial admission, `trial` is set only if it was admitted"""
+
+    team: tp.Optional[Team] = None
+    model: tp.Optional[Model] = None
+    trial: tp.Optional[Trial] = None
+    refusal: tp.Optional[TrialRefusal] = None
+    today_trial_stat: tp.Dict[TrialStatus, int] = {}
+
+
 class Metric(BaseModel):
     name: str
     value: float
+    ci_low: tp.Optional[float] = None
+    ci_high: tp.Optional[float] = None
+
+
+class SegmentMetric(BaseModel):
+    segmentation: str
+    segment: str
+    n_users: int
+    value: tp.Optional[float]
+
+
+class UserMetrics(BaseModel):
+    """Per-user metric values, all arrays are aligned with `users`"""
+
+    users: np.ndarray
+    ap: np.ndarray
+    hits: np.ndarray
+
+    class Config:
+        arbitrary_types_allowed = True
+
+
+class Comparison(BaseModel):
+    metric_name: str
+    n_users: int
+    delta: float
+    p_value: float
+    ci_low: float
+    ci_high: float
+
+
+class TrialHistoryItem(BaseModel):
+    trial_id: UUID
+    model_id: UUID
+    model_name: str
+    created_at: datetime
+    finished_at: tp.Optional[datetime]
+    status: TrialStatus
+    metric_value: tp.Optional[float]
+
+
+class TrialsHistoryPage(BaseModel):
+    # Newest trials go first
+    items: tp.List[TrialHistoryItem]
+    has_newer: bool
+    has_older: bool
+
+
+class HistoryDirection(str, Enum):
+    newer = "newer"
+    older = "older"
 
 
 class GlobalLeaderboardRow(BaseModel):
@@ -77,6 +147,13 @@ class ByModelLeaderboardRow(BaseModel):
     last_attempt: datetime
 
 
+class LeaderboardSnapshot(BaseModel):
+    created_at: datetime
+    # Rank of team is its index + 1
+    team_names: tp.List[str]
+    scores: tp.List[tp.Optional[float]]
+
+
 class ProgressNotifier(BaseModel):
     message: types.Message
 
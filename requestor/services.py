@@ -1,13 +1,25 @@
+import typing as tp
+
 import pandas as pd
-from asyncpg import create_pool
 from pydantic import BaseModel  # pylint: disable=no-name-in-module
 from rectools import Columns
 
-from .assessor import AssessorService
-from .db.service import DBService
+from .assessor import AssessorService, make_activity_segmentation, make_popularity_segmentation
+from .db.cache import TTLCache
+from .db.instrumentation import DBInstrumentation, create_instrumented_pool
+from .db.repositories import LeaderboardRepository
+from .db.service import DBService, prepare_hot_queries, prepare_replica_hot_queries
 from .google import GSService
 from .gunner import GunnerService
-from .settings import ServiceConfig
+from .leaderboard import (
+    FileLeaderboardSink,
+    HistoryLeaderboardSink,
+    LeaderboardCache,
+    LeaderboardPublisher,
+    LeaderboardSink,
+)
+from .settings import LeaderboardSinkType, ServiceConfig
+from .storage import StorageService
 from .utils import chunkify, get_interactions_from_s3
 
 
@@ -15,8 +27,29 @@ def make_db_service(config: ServiceConfig) -> DBService:
     db_config = config.db_config.dict()
     pool_config = db_config.pop("db_pool_config")
     pool_config["dsn"] = pool_config.pop("db_url")
-    pool = create_pool(**pool_config)
-    service = DBService(pool=pool, **db_config)
+    instrumentation = DBInstrumentation(db_config.pop("slow_query_threshold"))
+    pool = create_instrumented_pool(
+        **pool_config, instrumentation=instrumentation, init=prepare_hot_queries
+    )
+    replica_db_url = db_config.pop("replica_db_url")
+    replica_pool = None
+    if replica_db_url is not None:
+        # Replica has own instrumentation to report its acquire wait time
+        replica_pool = create_instrumented_pool(
+            **{**pool_config, "dsn": replica_db_url},
+            instrumentation=DBInstrumentation(instrumentation.slow_query_threshold),
+            init=prepare_replica_hot_queries,
+        )
+    cache_config = {"max_size": db_config.pop("cache_max_size"), "ttl": db_config.pop("cache_ttl")}
+    service = DBService(
+        pool=pool,
+        team_cache=TTLCache(**cache_config),
+        model_cache=TTLCache(**cache_config),
+        instrumentation=instrumentation,
+        replica_pool=replica_pool,
+        listener_dsn=pool_config["dsn"],
+        **db_config,
+    )
     return service
 
 
@@ -24,14 +57,58 @@ def make_gs_service(config: ServiceConfig) -> GSService:
     return GSService(**config.gs_config.dict())
 
 
+def make_leaderboard_file_sink(config: ServiceConfig) -> FileLeaderboardSink:
+    return FileLeaderboardSink(root_dir=config.leaderboard_config.files_dir)
+
+
+def make_leaderboard_publisher(
+    config: ServiceConfig,
+    db_service: DBService,
+    gs_service: GSService,
+    file_sink: tp.Optional[FileLeaderboardSink],
+    cache: LeaderboardCache,
+) -> LeaderboardPublisher:
+    leaderboard_config = config.leaderboard_config
+    leaderboard_repository = LeaderboardRepository(db_service=db_service)
+    # Cache is always updated because bot commands are answered from it
+    sinks: tp.List[LeaderboardSink] = [cache]
+    if LeaderboardSinkType.GS in leaderboard_config.sinks:
+        sinks.append(gs_service)
+    if LeaderboardSinkType.FILE in leaderboard_config.sinks and file_sink is not None:
+        sinks.append(file_sink)
+    if LeaderboardSinkType.HISTORY in leaderboard_config.sinks:
+        sinks.append(
+            HistoryLeaderboardSink(
+                leaderboard_repository=leaderboard_repository,
+                metric=config.assessor_config.main_metric_name,
+            )
+        )
+
+    return LeaderboardPublisher(
+        leaderboard_repository=leaderboard_repository,
+        sinks=sinks,
+        metric=config.assessor_config.main_metric_name,
+        publish_interval=leaderboard_config.publish_interval,
+    )
+
+
 def make_gunner_service(config: ServiceConfig, interactions: pd.DataFrame) -> GunnerService:
     users = interactions[Columns.User].unique().tolist()
     users_batches = chunkify(users, config.gunner_config.user_request_batch_size)
     return GunnerService(users_batches=users_batches)
 
 
-def make_assessor_service(interactions: pd.DataFrame) -> AssessorService:
-    return AssessorService(interactions=interactions)
+def make_storage_service(config: ServiceConfig) -> StorageService:
+    return StorageService(**config.storage_config.dict())
+
+
+def make_assessor_service(config: ServiceConfig, interactions: pd.DataFrame) -> AssessorService:
+    assessor_config = config.assessor_config
+    segmentations = [
+        make_activity_segmentation(interactions, assessor_config.activity_segment_bounds),
+        make_popularity_segmentation(interactions, assessor_config.popularity_segment_quantiles),
+    ]
+    return AssessorService(interactions=interactions, segmentations=segmentations)
 
 
 class App(BaseModel):
@@ -39,27 +116,45 @@ class App(BaseModel):
     db_service: DBService
     gs_service: GSService
     gunner_service: GunnerService
+    leaderboard_publisher: LeaderboardPublisher
+    leaderboard_cache: LeaderboardCache
+    leaderboard_file_sink: tp.Optional[FileLeaderboardSink] = None
+    storage_service: StorageService
 
     @classmethod
     def from_config(cls, config: ServiceConfig) -> "App":
         db_service = make_db_service(config)  # Do initialization here to avoid type errors
         gs_service = make_gs_service(config)
+        leaderboard_file_sink = None
+        if LeaderboardSinkType.FILE in config.leaderboard_config.sinks:
+            leaderboard_file_sink = make_leaderboard_file_sink(config)
+        leaderboard_cache = LeaderboardCache()
+        leaderboard_publisher = make_leaderboard_publisher(
+            config, db_service, gs_service, leaderboard_file_sink, leaderboard_cache
+        )
+        storage_service = make_storage_service(config)
 
         interactions = get_interactions_from_s3(config.s3_config)
 
         gunner_service = make_gunner_service(config, interactions)
-        assessor_service = make_assessor_service(interactions)
+        assessor_service = make_assessor_service(config, interactions)
 
         return App(
             assessor_service=assessor_service,
             db_service=db_service,
             gs_service=gs_service,
             gunner_service=gunner_service,
+            leaderboard_publisher=leaderboard_publisher,
+            leaderboard_cache=leaderboard_cache,
+            leaderboard_file_sink=leaderboard_file_sink,
+            storage_service=storage_service,
         )
 
     async def setup(self) -> None:
         await self.db_service.setup()
-        await self.gs_service.setup()
+        # Leaderboard sinks are set up by publisher in background
+        await self.leaderboard_publisher.setup()
 
     async def cleanup(self) -> None:
+        await self.leaderboard_publisher.cleanup()
         await self.db_service.cleanup()
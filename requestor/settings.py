@@ -29,7 +29,8 @@ class LogConfig(Config):
 
 class DBPoolConfig(Config):
     db_url: PostgresDsn
-    min_size: int = 0
+    # Connections opened and warmed up on start
+    min_size: int = 5
     max_size: int = 20
     max_queries: int = 1000
     max_inactive_connection_lifetime: int = 3600
@@ -43,6 +44,15 @@ class DBConfig(Config):
     db_pool_config: DBPoolConfig
     n_attempts: int = 3
     attempts_interval: int = 2
+    cache_max_size: int = 1024
+    cache_ttl: float = 300
+    # DB service calls longer than this number of seconds are logged
+    slow_query_threshold: float = 1
+    # Optional read replica for leaderboards and history,
+    # it uses the same pool settings as primary
+    replica_db_url: tp.Optional[PostgresDsn] = None
+    replica_max_lag: float = 5
+    replica_lag_check_interval: float = 1
 
 
 class TelegramConfig(Config):
@@ -53,6 +63,9 @@ class TelegramConfig(Config):
     host: str = "0.0.0.0"  # nosec
     webhook_path_pattern: str = "/webhook/{bot_token}"
     team_models_display_limit: int = 10
+    leaderboard_display_limit: int = 10
+    leaderboard_max_display_limit: int = 50
+    history_page_size: int = 5
     metric_by_assessor_display_precision: float = 0.7
     delay_between_messages: int = 4
 
@@ -64,14 +77,46 @@ class GSConfig(Config):
     global_leaderboard_page_max_rows: int
     by_model_leaderboard_page_name: str
     by_model_leaderboard_page_max_rows: int
+    # Can be changed to local stub server for tests and benchmarks
+    api_base_url: str = "https://sheets.googleapis.com"
+    token_url: tp.Optional[str] = None
+    timeout: float = 10
+    # Sheets API allows 60 write requests per minute per user
+    write_quota_per_minute: int = 60
+    write_max_attempts: int = 5
 
     class Config:
         case_sensitive = False
         env_prefix = "GS_"
 
 
+class LeaderboardSinkType(str, Enum):
+    GS = "gs"
+    FILE = "file"
+    HISTORY = "history"
+
+
+class LeaderboardConfig(Config):
+    # Leaderboards are published not more often than once per this seconds
+    publish_interval: float = 30
+    sinks: tp.List[LeaderboardSinkType] = [LeaderboardSinkType.GS, LeaderboardSinkType.HISTORY]
+    # Files are served by webhook server under the path prefix
+    files_dir: str = "leaderboard"
+    files_path_prefix: str = "/leaderboard"
+
+    class Config:
+        case_sensitive = False
+        env_prefix = "LEADERBOARD_"
+
+
 class AssessorConfig(Config):
     reco_size: int = 10
+    bootstrap_n_samples: int = 1000
+    bootstrap_batch_size: int = 100
+    confidence_level: float = 0.95
+    random_state: int = 32
+    activity_segment_bounds: tp.List[int] = [2, 5, 10]
+    popularity_segment_quantiles: tp.List[float] = [0.33, 0.66]
 
     @property
     def main_metric_name(self) -> str:
@@ -115,14 +160,24 @@ class S3Config(Config):
         env_prefix = "S3_"
 
 
+class StorageConfig(Config):
+    root_dir: str = "storage"
+
+    class Config:
+        case_sensitive = False
+        env_prefix = "STORAGE_"
+
+
 class ServiceConfig(Config):
     log_config: LogConfig
     db_config: DBConfig
     telegram_config: TelegramConfig
     gs_config: GSConfig
+    leaderboard_config: LeaderboardConfig
     assessor_config: AssessorConfig
     gunner_config: GunnerConfig
     s3_config: S3Config
+    storage_config: StorageConfig
 
     env: Env = Env.TEST
     run_migrations: bool = False
@@ -135,9 +190,11 @@ def get_config() -> ServiceConfig:
         db_config=DBConfig(db_pool_config=DBPoolConfig()),
         telegram_config=TelegramConfig(),
         gs_config=GSConfig(),
+        leaderboard_config=LeaderboardConfig(),
         assessor_config=AssessorConfig(),
         gunner_config=GunnerConfig(),
         s3_config=S3Config(),
+        storage_config=StorageConfig(),
     )
 
 
@@ -0,0 +1,4 @@
+from .exceptions import UserMetricsNotFoundError
+from .service import StorageService
+
+__all__ = ("StorageService", "UserMetricsNotFoundError")
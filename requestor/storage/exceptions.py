@@ -0,0 +1,2 @@
+class UserMetricsNotFoundError(Exception):
+    """Raised when there are no stored per-user metrics for the trial"""
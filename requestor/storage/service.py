@@ -0,0 +1,66 @@
+import os
+import shutil
+import typing as tp
+from pathlib import Path
+from uuid import UUID
+
+import numpy as np
+from asgiref.sync import sync_to_async
+from pydantic import BaseModel  # pylint: disable=no-name-in-module
+
+from requestor.models import UserMetrics
+from requestor.utils import make_uuid
+
+from .exceptions import UserMetricsNotFoundError
+
+USER_METRICS_DIR: tp.Final = "user_metrics"
+
+# Every column is stored in separate `.npy` file so it can be memory-mapped
+# and read independently from others
+USER_METRICS_DTYPES: tp.Final = {
+    "users": np.int64,
+    "ap": np.float32,
+    "hits": np.uint16,
+}
+
+
+class StorageService(BaseModel):
+    root_dir: Path
+
+    class Config:
+        arbitrary_types_allowed = True
+
+    def _get_user_metrics_dir(self, trial_id: UUID) -> Path:
+        return self.root_dir / USER_METRICS_DIR / str(trial_id)
+
+    async def save_user_metrics(self, trial_id: UUID, user_metrics: UserMetrics) -> None:
+        return await sync_to_async(self._save_user_metrics)(trial_id, user_metrics)
+
+    def _save_user_metrics(self, trial_id: UUID, user_metrics: UserMetrics) -> None:
+        trial_dir = self._get_user_metrics_dir(trial_id)
+        tmp_dir = trial_dir.with_name(f".{trial_dir.name}.{make_uuid()}")
+        tmp_dir.mkdir(parents=True)
+
+        for column, dtype in USER_METRICS_DTYPES.items():
+            values = getattr(user_metrics, column)
+            np.save(tmp_dir / f"{column}.npy", values.astype(dtype, copy=False))
+
+        # Directory appears only when all columns are written
+        if trial_dir.exists():
+            shutil.rmtree(trial_dir)
+        os.replace(tmp_dir, trial_dir)
+
+    async def load_user_metrics(self, trial_id: UUID, mmap: bool = True) -> UserMetrics:
+        return await sync_to_async(self._load_user_metrics)(trial_id, mmap)
+
+    def _load_user_metrics(self, trial_id: UUID, mmap: bool = True) -> UserMetrics:
+        trial_dir = self._get_user_metrics_dir(trial_id)
+        if not trial_dir.exists():
+            raise UserMetricsNotFoundError(f"User metrics for trial '{trial_id}' not found")
+
+        mmap_mode: tp.Optional[tp.Literal["r", "r+", "w+", "c"]] = "r" if mmap else None
+        columns = {
+            column: np.load(trial_dir / f"{column}.npy", mmap_mode=mmap_mode)
+            for column in USER_METRICS_DTYPES
+        }
+        return UserMetrics(**columns)
@@ -42,18 +42,22 @@ def do_with_retries(  # type: ignore[return]  # pylint: disable=inconsistent-ret
 
 
 async def async_do_with_retries(  # type: ignore[return]
-    func: tp.Awaitable[T],
+    func: tp.Callable[[], tp.Awaitable[T]],
     exc_type: tp.Union[tp.Type[Exception], tp.Tuple[tp.Type[Exception], ...]],
     max_attempts: int,
     interval: int,
+    on_retry: tp.Optional[tp.Callable[[], None]] = None,
 ) -> T:
     for attempt in range(1, max_attempts + 1):
         try:
-            return await func
+            # Awaitable can't be awaited twice, so create it on every attempt
+            return await func()
         except exc_type as e:
             app_logger.error(f"Caught exception on attempt {attempt}: {e!r}")
             if attempt == max_attempts:
                 raise
+            if on_retry is not None:
+                on_retry()
             await asyncio.sleep(interval)
 
 
@@ -0,0 +1,255 @@
+import os
+import statistics
+import typing as tp
+import uuid
+from contextlib import closing, contextmanager
+from pathlib import Path
+
+import click
+import psycopg2
+from alembic import command as alembic_command
+from alembic import config as alembic_config
+from psycopg2.extensions import connection
+from sqlalchemy.engine import make_url
+
+from requestor.db.queries import (
+    ADMIT_TRIAL_QUERY,
+    GET_BY_MODEL_LEADERBOARD_QUERY,
+    GET_GLOBAL_LEADERBOARD_QUERY,
+    GET_LAST_TRIALS_QUERY,
+    GET_MODEL_LAST_SUCCESS_TRIAL_QUERY,
+    GET_TEAM_LAST_N_MODELS_QUERY,
+    GET_TRIALS_BEFORE_QUERY,
+)
+
+DB_URL_ENV = "DB_URL"
+ALEMBIC_INI_PATH = Path(__file__).parent.parent / "alembic.ini"
+METRIC_NAME = "MAP@10"
+# Indexes for hot trials and models queries which are compared with seq scans
+HOT_INDEXES = ("team_created_at_idx", "model_created_at_idx")
+HISTORY_PAGE_SIZE = 10
+
+SEED_QUERIES = (
+    """
+    INSERT INTO teams (team_id, description, chat_id, api_base_url, created_at, updated_at)
+    SELECT gen_random_uuid(), 'team_' || i, i, 'url_' || i, now(), now()
+    FROM generate_series(1, %(n_teams)s) i
+    """,
+    """
+    INSERT INTO models (model_id, team_id, name, created_at)
+    SELECT gen_random_uuid(), team_id, 'model_' || i, now() - random() * interval '60 days'
+    FROM teams, generate_series(1, %(n_models)s) i
+    """,
+    """
+    INSERT INTO trials (trial_id, model_id, created_at, finished_at, status)
+    SELECT
+        gen_random_uuid()
+        , model_id
+        , created_at
+        , created_at + interval '1 minute'
+        , (ARRAY['success', 'failed'])[1 + (random() > 0.7)::INT]::trial_status_enum
+    FROM (
+        SELECT model_id, now() - random() * interval '60 days' AS created_at
+        FROM models, generate_series(1, %(n_trials)s)
+    ) t
+    """,
+    """
+    INSERT INTO metrics (trial_id, name, value)
+    SELECT trial_id, %(metric)s, random()
+    FROM trials
+    WHERE status = 'success'
+    """,
+    """
+    INSERT INTO team_daily_trial_stats (team_id, day, status, n_trials)
+    SELECT m.team_id, t.created_at::DATE, t.status, count(*)
+    FROM trials t
+        JOIN models m on t.model_id = m.model_id
+    GROUP BY m.team_id, t.created_at::DATE, t.status
+    """,
+    """
+    INSERT INTO team_stats (team_id, n_attempts, last_attempt)
+    SELECT m.team_id, count(*), max(t.created_at)
+    FROM trials t
+        JOIN models m on t.model_id = m.model_id
+    WHERE t.status = 'success'
+    GROUP BY m.team_id
+    """,
+    """
+    INSERT INTO team_metric_stats (team_id, name, best_score)
+    SELECT m.team_id, me.name, max(me.value)
+    FROM metrics me
+        JOIN trials t on me.trial_id = t.trial_id
+        JOIN models m on t.model_id = m.model_id
+    GROUP BY m.team_id, me.name
+    """,
+    """
+    INSERT INTO model_metric_stats (model_id, name, best_score, n_attempts, last_attempt)
+    SELECT t.model_id, me.name, max(me.value), count(*), max(t.created_at)
+    FROM metrics me
+        JOIN trials t on me.trial_id = t.trial_id
+    GROUP BY t.model_id, me.name
+    """,
+)
+
+# Queries of the code path that bot and app run, with their arguments
+BENCHMARK_QUERIES: tp.Dict[str, tp.Tuple[str, tp.Callable[[tp.Dict[str, tp.Any]], tp.Tuple]]] = {
+    "admit_trial": (
+        ADMIT_TRIAL_QUERY,
+        lambda p: (p["chat_id"], p["model_name"], p["day"], p["now"], 1000, 1000, 1000),
+    ),
+    "get_team_last_n_models": (
+        GET_TEAM_LAST_N_MODELS_QUERY,
+        lambda p: (p["team_id"], 10),
+    ),
+    "get_model_last_success_trial": (
+        GET_MODEL_LAST_SUCCESS_TRIAL_QUERY,
+        lambda p: (p["model_id"],),
+    ),
+    "get_last_trials": (
+        GET_LAST_TRIALS_QUERY,
+        lambda p: (p["team_id"], METRIC_NAME, None, HISTORY_PAGE_SIZE + 1),
+    ),
+    "get_trials_before": (
+        GET_TRIALS_BEFORE_QUERY,
+        lambda p: (p["team_id"], METRIC_NAME, None, HISTORY_PAGE_SIZE + 1, p["trial_id"]),
+    ),
+    "get_global_leaderboard": (
+        GET_GLOBAL_LEADERBOARD_QUERY,
+        lambda p: (METRIC_NAME,),
+    ),
+    "get_by_model_leaderboard": (
+        GET_BY_MODEL_LEADERBOARD_QUERY,
+        lambda p: (METRIC_NAME,),
+    ),
+}
+
+
+@contextmanager
+def scratch_db(db_url: str) -> tp.Iterator[str]:
+    """Temporary database on the same server, it's dropped on exit"""
+    url = make_url(db_url)
+    name = f"benchmark_{uuid.uuid4().hex}"
+    with closing(psycopg2.connect(db_url)) as conn:
+        conn.autocommit = True
+        with conn.cursor() as cursor:
+            cursor.execute(f'CREATE DATABASE "{name}"')
+        try:
+            yield str(url.set(database=name))
+        finally:
+            with conn.cursor() as cursor:
+                cursor.execute(f'DROP DATABASE IF EXISTS "{name}"')
+
+
+def upgrade_db(db_url: str) -> None:
+    # Migrations environment takes DB URL from env
+    prev_url = os.environ[DB_URL_ENV]
+    os.environ[DB_URL_ENV] = db_url
+    try:
+        alembic_command.upgrade(alembic_config.Config(str(ALEMBIC_INI_PATH)), "head")
+    finally:
+        os.environ[DB_URL_ENV] = prev_url
+
+
+def seed_history(conn: connection, n_teams: int, n_models: int, n_trials: int) -> None:
+    params = {
+        "n_teams": n_teams,
+        "n_models": n_models,
+        "n_trials": n_trials,
+        "metric": METRIC_NAME,
+    }
+    with conn.cursor() as cursor:
+        for query in SEED_QUERIES:
+            cursor.execute(query, params)
+        cursor.execute("ANALYZE")
+    conn.commit()
+
+
+def get_query_params(conn: connection) -> tp.Dict[str, tp.Any]:
+    query = """
+        SELECT
+            te.chat_id
+            , te.team_id
+            , m.model_id
+            , m.name AS model_name
+            , t.trial_id
+            , now()::TIMESTAMP AS now
+            , now()::DATE AS day
+        FROM trials t
+            JOIN models m on t.model_id = m.model_id
+            JOIN teams te on m.team_id = te.team_id
+        ORDER BY random()
+        LIMIT 1
+    """
+    with conn.cursor() as cursor:
+        cursor.execute(query)
+        names = [column.name for column in cursor.description]
+        params = dict(zip(names, cursor.fetchone()))
+    conn.rollback()
+    return params
+
+
+def measure_queries(
+    conn: connection, params: tp.Dict[str, tp.Any], n_runs: int, with_indexes: bool
+) -> tp.Dict[str, float]:
+    """
+    Median execution time (ms) of every benchmarked query.
+    Every run is rolled back, so writing queries don't change the data
+    and indexes are dropped only for the time of the run.
+    """
+    timings = {}
+    for name, (query, get_args) in BENCHMARK_QUERIES.items():
+        args = get_args(params)
+        placeholders = ", ".join(["%s"] * len(args))
+        times = []
+        for _ in range(n_runs):
+            with conn.cursor() as cursor:
+                if not with_indexes:
+                    for index in HOT_INDEXES:
+                        cursor.execute(f"DROP INDEX {index}")
+                cursor.execute(f"PREPARE benchmarked AS {query}")
+                cursor.execute(
+                    f"EXPLAIN (ANALYZE, FORMAT JSON) EXECUTE benchmarked ({placeholders})", args
+                )
+                plan = cursor.fetchone()[0][0]
+                times.append(plan["Execution Time"])
+            conn.rollback()
+        timings[name] = statistics.median(times)
+    return timings
+
+
+@click.command()
+@click.option("--n-teams", type=int, default=100, show_default=True)
+@click.option("--n-models", type=int, default=20, show_default=True, help="Models per team")
+@click.option("--n-trials", type=int, default=200, show_default=True, help="Trials per model")
+@click.option("--n-runs", type=int, default=5, show_default=True)
+def main(n_teams: int, n_models: int, n_trials: int, n_runs: int) -> None:
+    """
+    Seed synthetic trials history to a scratch DB on the server of DB_URL
+    and compare timings of current hot queries without and with indexes.
+    Scratch DB is dropped at the end, DB of DB_URL itself isn't changed.
+    """
+    try:
+        db_url = os.environ[DB_URL_ENV]
+    except KeyError:
+        click.echo(f"`{DB_URL_ENV}` env not set", err=True)
+        return
+
+    try:
+        with scratch_db(db_url) as scratch_url:
+            upgrade_db(scratch_url)
+            with closing(psycopg2.connect(scratch_url)) as conn:
+                seed_history(conn, n_teams, n_models, n_trials)
+                params = get_query_params(conn)
+                before = measure_queries(conn, params, n_runs, with_indexes=False)
+                after = measure_queries(conn, params, n_runs, with_indexes=True)
+    except psycopg2.Error as e:
+        click.echo(f"Error while running benchmark: {e!r}", err=True)
+        return
+
+    click.echo(f"{'query':<32}{'before, ms':>12}{'after, ms':>12}")
+    for name in BENCHMARK_QUERIES:
+        click.echo(f"{name:<32}{before[name]:>12.3f}{after[name]:>12.3f}")
+
+
+if __name__ == "__main__":
+    main()  # pylint: disable=no-value-for-parameter
@@ -0,0 +1,57 @@
+import asyncio
+import typing as tp
+from datetime import date
+
+import click
+
+from requestor.db import RecosRepository
+from requestor.db.repositories import get_month_start
+from requestor.services import make_db_service
+from requestor.settings import config
+from requestor.utils import utc_now
+
+
+def get_retention_start(keep_months: int) -> date:
+    """First day of the oldest month to keep, current month is counted too"""
+    month = get_month_start(utc_now())
+    n_months = month.year * 12 + month.month - keep_months
+    return date(n_months // 12, n_months % 12 + 1, 1)
+
+
+async def drop_old_recos_partitions(keep_months: int, detach: bool) -> tp.List[str]:
+    db_service = make_db_service(config)
+    await db_service.setup()
+    try:
+        recos_repository = RecosRepository(db_service=db_service)
+        return await recos_repository.remove_recos_partitions(
+            get_retention_start(keep_months), detach
+        )
+    finally:
+        await db_service.cleanup()
+
+
+@click.command()
+@click.option(
+    "--keep-months",
+    type=click.IntRange(min=1),
+    default=3,
+    show_default=True,
+    help="Number of months to keep including the current one",
+)
+@click.option(
+    "--detach",
+    is_flag=True,
+    help="Detach partitions instead of dropping, so they can be archived and dropped manually",
+)
+def main(keep_months: int, detach: bool) -> None:
+    """
+    Remove recommendations partitions of months
+    that are out of retention period
+    """
+    removed = asyncio.run(drop_old_recos_partitions(keep_months, detach))
+    action = "Detached" if detach else "Dropped"
+    click.echo(f"{action} partitions: {', '.join(removed) or '-'}")
+
+
+if __name__ == "__main__":
+    main()  # pylint: disable=no-value-for-parameter
@@ -0,0 +1,54 @@
+import asyncio
+import typing as tp
+from datetime import datetime
+from pathlib import Path
+
+import click
+
+from requestor.db import LeaderboardRepository
+from requestor.leaderboard import (
+    RankHistory,
+    make_rank_history,
+    render_rank_history_csv,
+    render_rank_history_svg,
+)
+from requestor.services import make_db_service
+from requestor.settings import config
+
+
+async def get_rank_history(metric: str, since: tp.Optional[datetime]) -> RankHistory:
+    db_service = make_db_service(config)
+    await db_service.setup()
+    try:
+        leaderboard_repository = LeaderboardRepository(db_service=db_service)
+        snapshots = await leaderboard_repository.get_leaderboard_snapshots(metric, since)
+    finally:
+        await db_service.cleanup()
+    return make_rank_history(snapshots)
+
+
+@click.command()
+@click.argument("output", type=click.Path(dir_okay=False, writable=True, path_type=Path))
+@click.option(
+    "--format", "fmt", type=click.Choice(["csv", "svg"]), default="csv", show_default=True
+)
+@click.option(
+    "--since", type=click.DateTime(), default=None, help="UTC time of the first snapshot"
+)
+def main(output: Path, fmt: str, since: tp.Optional[datetime]) -> None:
+    """
+    Export ranks of teams over time from saved leaderboard snapshots
+    as CSV table or SVG chart
+    """
+    metric = config.assessor_config.main_metric_name
+    history = asyncio.run(get_rank_history(metric, since))
+    if fmt == "csv":
+        content = render_rank_history_csv(history)
+    else:
+        content = render_rank_history_svg(history, f"Ranks by {metric}")
+    output.write_bytes(content)
+    click.echo(f"Exported {len(history.timestamps)} snapshots to {output}")
+
+
+if __name__ == "__main__":
+    main()  # pylint: disable=no-value-for-parameter
@@ -0,0 +1,30 @@
+import asyncio
+
+import click
+
+from requestor.db import LeaderboardRepository
+from requestor.services import make_db_service
+from requestor.settings import config
+
+
+async def rebuild_leaderboard_stats() -> None:
+    db_service = make_db_service(config)
+    await db_service.setup()
+    try:
+        await LeaderboardRepository(db_service=db_service).rebuild_leaderboard_stats()
+    finally:
+        await db_service.cleanup()
+
+
+@click.command()
+def main() -> None:
+    """
+    Recalculate leaderboard stats tables from trials and metrics
+    (e.g. after manual changes in DB)
+    """
+    asyncio.run(rebuild_leaderboard_stats())
+    click.echo("Leaderboard stats rebuilt")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+import asyncio
+import os
+import typing as tp
+from concurrent.futures import ProcessPoolExecutor
+
+import click
+import pandas as pd
+
+from requestor.assessor import AssessorService
+from requestor.db import DBService, RecosRepository
+from requestor.leaderboard import LeaderboardCache
+from requestor.models import Metric, Trial, UserMetrics
+from requestor.services import (
+    make_assessor_service,
+    make_db_service,
+    make_gs_service,
+    make_leaderboard_file_sink,
+    make_leaderboard_publisher,
+    make_storage_service,
+)
+from requestor.settings import LeaderboardSinkType, config
+from requestor.utils import get_interactions_from_s3
+
+# Interactions are heavy, so every worker gets its own copy only once
+_ASSESSOR: tp.Optional[AssessorService] = None
+
+
+def _init_worker(assessor_service: AssessorService) -> None:
+    global _ASSESSOR  # pylint: disable=global-statement
+    _ASSESSOR = assessor_service
+
+
+def rescore_trial(recos: pd.DataFrame) -> tp.Tuple[UserMetrics, tp.List[Metric]]:
+    """Re-calculate user metrics and metrics of trial from recommendations"""
+    if _ASSESSOR is None:
+        raise RuntimeError("Worker is not initialized")
+    return _ASSESSOR.rescore_recos(recos)
+
+
+async def rescore_trials(n_workers: int) -> None:
+    db_service = make_db_service(config)
+    storage_service = make_storage_service(config)
+
+    assessor_service = make_assessor_service(config, get_interactions_from_s3(config.s3_config))
+
+    await db_service.setup()
+    try:
+        trials = await db_service.get_success_trials()
+        click.echo(f"Found {len(trials)} successful trials")
+
+        recos_repository = RecosRepository(db_service=db_service)
+        loop = asyncio.get_running_loop()
+        # Limit number of trials which recommendations are kept in memory
+        semaphore = asyncio.Semaphore(2 * n_workers)
+
+        async def rescore(trial: Trial) -> tp.Optional[tp.Tuple[UserMetrics, tp.List[Metric]]]:
+            async with semaphore:
+                recos = await recos_repository.get_recos(trial)
+                if recos.empty:
+                    return None
+                return await loop.run_in_executor(executor, rescore_trial, recos)
+
+        with ProcessPoolExecutor(
+            max_workers=n_workers,
+            initializer=_init_worker,
+            initargs=(assessor_service,),
+        ) as executor:
+            results = await asyncio.gather(*(rescore(trial) for trial in trials))
+
+        results_by_trial = {
+            trial.trial_id: result for trial, result in zip(trials, results) if result is not None
+        }
+        n_skipped = len(trials) - len(results_by_trial)
+        if n_skipped:
+            click.echo(f"Skipped {n_skipped} trials without stored recommendations", err=True)
+
+        await db_service.replace_metrics(
+            {trial_id: metrics for trial_id, (_, metrics) in results_by_trial.items()}
+        )
+        # Files are replaced only when new metrics are committed to DB
+        for trial_id, (user_metrics, _) in results_by_trial.items():
+            await storage_service.save_user_metrics(trial_id, user_metrics)
+        click.echo(f"Re-scored {len(results_by_trial)} trials")
+
+        await publish_leaderboards(db_service)
+    finally:
+        await db_service.cleanup()
+
+
+async def publish_leaderboards(db_service: DBService) -> None:
+    """Publish leaderboards to sinks configured for the app"""
+    file_sink = None
+    if LeaderboardSinkType.FILE in config.leaderboard_config.sinks:
+        file_sink = make_leaderboard_file_sink(config)
+    publisher = make_leaderboard_publisher(
+        config, db_service, make_gs_service(config), file_sink, LeaderboardCache()
+    )
+    try:
+        await publisher.publish()
+    finally:
+        await publisher.cleanup()
+
+
+@click.command()
+@click.option("--n-workers", type=int, default=os.cpu_count(), show_default=True)
+def main(n_workers: int) -> None:
+    """
+    Re-calculate metrics of all successful trials from stored recommendations
+    with current assessor configuration and regenerate leaderboards
+    """
+    asyncio.run(rescore_trials(n_workers))
+
+
+if __name__ == "__main__":
+    main()  # pylint: disable=no-value-for-parameter
@@ -0,0 +1,81 @@
+import numpy as np
+import pandas as pd
+import pytest
+from rectools import Columns
+
+from requestor.assessor import (
+    Segmentation,
+    make_activity_segmentation,
+    make_popularity_segmentation,
+)
+
+
+@pytest.fixture(name="interactions")
+def interactions_fixture() -> pd.DataFrame:
+    data = [
+        (1, 1),
+        (2, 1),
+        (2, 2),
+        (3, 1),
+        (3, 2),
+        (3, 3),
+        (3, 4),
+        (3, 5),
+        (4, 5),
+    ]
+    return pd.DataFrame(data, columns=Columns.UserItem)
+
+
+def test_activity_segmentation(interactions: pd.DataFrame) -> None:
+    segmentation = make_activity_segmentation(interactions, [2, 5])
+
+    assert segmentation.name == "activity"
+    assert segmentation.labels == ["1", "2-4", "5+"]
+    np.testing.assert_array_equal(segmentation.users, [1, 2, 3, 4])
+    np.testing.assert_array_equal(segmentation.codes, [0, 1, 2, 0])
+    np.testing.assert_array_equal(segmentation.sizes, [2, 1, 1])
+
+
+@pytest.mark.parametrize("bounds", ([5, 2], [1, 3]))
+def test_activity_segmentation_incorrect_bounds(interactions: pd.DataFrame, bounds: list) -> None:
+    with pytest.raises(ValueError):
+        make_activity_segmentation(interactions, bounds)
+
+
+def test_popularity_segmentation(interactions: pd.DataFrame) -> None:
+    segmentation = make_popularity_segmentation(interactions, [0.5])
+
+    # mean items popularity by users: 3, 2.5, 1.8, 2
+    assert segmentation.name == "popularity"
+    assert segmentation.labels == ["0-50%", "50-100%"]
+    np.testing.assert_array_equal(segmentation.codes, [1, 1, 0, 0])
+
+
+@pytest.fixture(name="segmentation")
+def segmentation_fixture() -> Segmentation:
+    return Segmentation.from_codes(
+        "some", ["a", "b", "c"], np.array([10, 20, 30, 40]), np.array([0, 1, 0, 1])
+    )
+
+
+def test_reduce_mean(segmentation: Segmentation) -> None:
+    actual = segmentation.reduce_mean(np.array([10, 20, 30, 40]), np.array([1, 0.5, 0, 0.25]))
+
+    np.testing.assert_array_equal(actual[:2], [0.5, 0.375])
+    assert np.isnan(actual[2])
+
+
+def test_reduce_mean_aligned_by_users(segmentation: Segmentation) -> None:
+    actual = segmentation.reduce_mean(np.array([40, 30, 20, 10]), np.array([0.25, 0, 0.5, 1]))
+    np.testing.assert_array_equal(actual[:2], [0.5, 0.375])
+
+
+def test_reduce_mean_incorrect_shape(segmentation: Segmentation) -> None:
+    with pytest.raises(ValueError):
+        segmentation.reduce_mean(np.array([10]), np.array([1.0]))
+
+
+@pytest.mark.parametrize("users", ([10, 20, 30, 50], [5, 20, 30, 40], [10, 10, 30, 40]))
+def test_reduce_mean_unknown_users(segmentation: Segmentation, users: list) -> None:
+    with pytest.raises(ValueError):
+        segmentation.reduce_mean(np.array(users), np.array([1, 0.5, 0, 0.25]))
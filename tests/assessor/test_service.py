@@ -1,9 +1,10 @@
+import numpy as np
 import pandas as pd
 import pytest
 from rectools import Columns
 
-from requestor.assessor import AssessorService
-from requestor.models import Metric
+from requestor.assessor import AssessorService, make_activity_segmentation
+from requestor.models import Metric, SegmentMetric, UserMetrics
 from requestor.settings import ServiceConfig
 from tests.utils import gen_model_user_reco_response
 
@@ -61,6 +62,39 @@ async def test_estimate_recos(
     ]
     recos = await assessor_service.prepare_recos(user_reco_responses)
     actual = await assessor_service.estimate_recos(recos)
-    expected = [Metric(name=assessor_config.main_metric_name, value=0.5)]
+    expected = [Metric(name=assessor_config.main_metric_name, value=0.5, ci_low=0.5, ci_high=0.5)]
 
     assert actual == expected
+
+
+async def test_calc_user_metrics(
+    assessor_service: AssessorService,
+    service_config: ServiceConfig,
+) -> None:
+    user_reco_responses = [
+        gen_model_user_reco_response(
+            user_id=1,
+            items_size=service_config.assessor_config.reco_size,
+        )
+    ]
+    recos = await assessor_service.prepare_recos(user_reco_responses)
+    actual = await assessor_service.calc_user_metrics(recos)
+
+    np.testing.assert_array_equal(actual.users, [1])
+    np.testing.assert_array_equal(actual.ap, [0.5])
+    np.testing.assert_array_equal(actual.hits, [1])
+
+
+async def test_estimate_segments(assessor_service: AssessorService) -> None:
+    assessor_service.segmentations = [
+        make_activity_segmentation(assessor_service.interactions, [2])
+    ]
+    user_metrics = UserMetrics(users=np.array([1]), ap=np.array([0.5]), hits=np.array([1]))
+
+    actual = await assessor_service.estimate_segments(user_metrics)
+
+    expected = [
+        SegmentMetric(segmentation="activity", segment="1", n_users=1, value=0.5),
+        SegmentMetric(segmentation="activity", segment="2+", n_users=0, value=None),
+    ]
+    assert actual == expected
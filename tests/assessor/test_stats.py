@@ -0,0 +1,89 @@
+import numpy as np
+import pytest
+
+from requestor.assessor.stats import (
+    bootstrap_confidence_interval,
+    bootstrap_means,
+    paired_bootstrap_test,
+)
+
+
+def test_bootstrap_means_matches_plain_bootstrap() -> None:
+    rng = np.random.default_rng(0)
+    values = np.where(rng.random(10_000) < 0.2, rng.random(10_000), 0)
+
+    actual = bootstrap_means(values, n_samples=1000, batch_size=128, random_state=1)
+
+    plain = values[rng.integers(0, values.size, size=(1000, values.size))].mean(axis=1)
+    assert actual.shape == (1000,)
+    assert actual.mean() == pytest.approx(values.mean(), rel=1e-2)
+    assert actual.std() == pytest.approx(plain.std(), rel=0.15)
+
+
+def test_bootstrap_means_is_reproducible() -> None:
+    values = np.array([0, 0, 1, 0.5, 0, 0.25])
+
+    first = bootstrap_means(values, n_samples=100, batch_size=7, random_state=42)
+    second = bootstrap_means(values, n_samples=100, batch_size=100, random_state=42)
+
+    np.testing.assert_array_equal(first, second)
+
+
+def test_bootstrap_means_all_zeros() -> None:
+    actual = bootstrap_means(np.zeros(5), n_samples=10, batch_size=3)
+    np.testing.assert_array_equal(actual, np.zeros(10))
+
+
+def test_bootstrap_means_empty_values() -> None:
+    with pytest.raises(ValueError):
+        bootstrap_means(np.array([]), n_samples=10, batch_size=3)
+
+
+def test_bootstrap_confidence_interval() -> None:
+    rng = np.random.default_rng(0)
+    values = rng.random(1000)
+
+    low, high = bootstrap_confidence_interval(
+        values, n_samples=500, confidence_level=0.95, batch_size=100, random_state=0
+    )
+
+    assert low < values.mean() < high
+
+
+@pytest.mark.parametrize("confidence_level", (0, 1, 1.5))
+def test_bootstrap_confidence_interval_incorrect_level(confidence_level: float) -> None:
+    with pytest.raises(ValueError):
+        bootstrap_confidence_interval(
+            np.ones(3), n_samples=10, confidence_level=confidence_level, batch_size=10
+        )
+
+
+def test_paired_bootstrap_test_detects_difference() -> None:
+    rng = np.random.default_rng(0)
+    values_b = rng.random(5000)
+    values_a = values_b + 0.05 + rng.normal(scale=0.1, size=5000)
+
+    delta, p_value, low, high = paired_bootstrap_test(
+        values_a, values_b, n_samples=500, confidence_level=0.95, batch_size=100, random_state=0
+    )
+
+    assert delta == pytest.approx(0.05, abs=0.01)
+    assert p_value < 0.01
+    assert low <= delta <= high
+
+
+def test_paired_bootstrap_test_same_values() -> None:
+    values = np.array([0, 0.5, 0.25, 0])
+
+    delta, p_value, low, high = paired_bootstrap_test(
+        values, values, n_samples=100, confidence_level=0.95, batch_size=10
+    )
+
+    assert (delta, p_value, low, high) == (0, 1, 0, 0)
+
+
+def test_paired_bootstrap_test_different_shapes() -> None:
+    with pytest.raises(ValueError):
+        paired_bootstrap_test(
+            np.ones(3), np.ones(4), n_samples=10, confidence_level=0.95, batch_size=10
+        )
@@ -17,11 +17,13 @@ from sqlalchemy import orm
 
 from requestor.assessor import AssessorService
 from requestor.db.models import Base
+from requestor.db.repositories import LeaderboardRepository, RecosRepository
 from requestor.db.service import DBService
 from requestor.google import GSService
 from requestor.gunner import GunnerService
 from requestor.services import make_db_service, make_gs_service
 from requestor.settings import ServiceConfig, get_config
+from requestor.storage import StorageService
 from tests.utils import DBObjectCreator, clear_spreadsheet
 
 CURRENT_DIR = Path(__file__).parent
@@ -91,6 +93,16 @@ async def db_service(
         await service.cleanup()
 
 
+@pytest.fixture
+def leaderboard_repository(db_service: DBService) -> LeaderboardRepository:
+    return LeaderboardRepository(db_service=db_service)
+
+
+@pytest.fixture
+def recos_repository(db_service: DBService) -> RecosRepository:
+    return RecosRepository(db_service=db_service)
+
+
 @pytest.fixture
 def service_config() -> ServiceConfig:
     return get_config()
@@ -126,10 +138,15 @@ def spreadsheet(service_config: ServiceConfig) -> tp.Iterator[gspread.Spreadshee
 
 @pytest.mark.asyncio
 @pytest.fixture
-async def gs_service(service_config: ServiceConfig, spreadsheet: gspread.Spreadsheet) -> GSService:
+async def gs_service(
+    service_config: ServiceConfig, spreadsheet: gspread.Spreadsheet
+) -> tp.AsyncGenerator[GSService, None]:
     service = make_gs_service(service_config)
     await service.setup()
-    return service
+    try:
+        yield service
+    finally:
+        await service.cleanup()
 
 
 @pytest.fixture
@@ -145,6 +162,11 @@ def assessor_service() -> AssessorService:
     return service
 
 
+@pytest.fixture
+def storage_service(tmp_path: Path) -> StorageService:
+    return StorageService(root_dir=tmp_path)
+
+
 @pytest.fixture
 def users_batches() -> tp.List[tp.List[int]]:
     return [[1, 2, 3, 4, 5]]
@@ -0,0 +1,55 @@
+import time
+
+import pytest
+
+from requestor.db.cache import CacheStats, TTLCache
+
+
+class TestTTLCache:
+    def test_get_and_set(self) -> None:
+        cache: TTLCache[str, int] = TTLCache()
+        assert cache.get("a") is None
+        cache.set("a", 1)
+        assert cache.get("a") == 1
+        assert cache.get_stats() == CacheStats(hits=1, misses=1, size=1)
+
+    def test_least_recently_used_evicted(self) -> None:
+        cache: TTLCache[str, int] = TTLCache(max_size=2)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+
+        assert cache.get("b") is None
+        assert cache.get("a") == 1
+        assert cache.get("c") == 3
+        assert len(cache) == 2
+
+    def test_expired(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        now = time.monotonic()
+        monkeypatch.setattr(time, "monotonic", lambda: now)
+        cache: TTLCache[str, int] = TTLCache(ttl=10)
+        cache.set("a", 1)
+
+        monkeypatch.setattr(time, "monotonic", lambda: now + 11)
+        assert cache.get("a") is None
+        assert len(cache) == 0
+
+    def test_invalidate(self) -> None:
+        cache: TTLCache[str, int] = TTLCache()
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.set("c", 3)
+
+        cache.invalidate("a")
+        cache.invalidate("d")
+        cache.invalidate_where(lambda value: value > 2)
+
+        assert cache.get("a") is None
+        assert cache.get("b") == 2
+        assert cache.get("c") is None
+
+    @pytest.mark.parametrize("max_size,ttl", ((0, 1), (1, 0)))
+    def test_incorrect_params(self, max_size: int, ttl: float) -> None:
+        with pytest.raises(ValueError):
+            TTLCache(max_size=max_size, ttl=ttl)
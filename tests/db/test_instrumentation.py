@@ -0,0 +1,93 @@
+import asyncio
+import typing as tp
+
+import pytest
+
+from requestor.db.instrumentation import DBInstrumentation, InstrumentedPool, LatencyHistogram
+
+
+class TestLatencyHistogram:
+    def test_observe(self) -> None:
+        histogram = LatencyHistogram(buckets=(0.1, 1))
+        for value in (0.05, 0.1, 0.5, 2):
+            histogram.observe(value)
+
+        stats = histogram.get_stats()
+        assert stats.buckets == {0.1: 2, 1: 1, float("inf"): 1}
+        assert stats.count == 4
+        assert stats.total == pytest.approx(2.65)
+
+
+class TestDBInstrumentation:
+    def test_method_stats(self) -> None:
+        instrumentation = DBInstrumentation(slow_query_threshold=1)
+        instrumentation.observe_call("get_team", 0.01, failed=False)
+        instrumentation.observe_retry("get_team")
+        instrumentation.observe_call("get_team", 1.5, failed=True)
+
+        stats = instrumentation.get_method_stats()["get_team"]
+        assert stats.latency.count == 2
+        assert stats.n_errors == 1
+        assert stats.n_retries == 1
+        assert stats.n_slow == 1
+
+    def test_slow_call_logged(self, caplog: pytest.LogCaptureFixture) -> None:
+        instrumentation = DBInstrumentation(slow_query_threshold=0.5)
+        instrumentation.observe_call("fast", 0.1, failed=False)
+        instrumentation.observe_call("slow", 0.7, failed=False)
+        assert [record.getMessage() for record in caplog.records] == [
+            "Slow DB call: slow took 0.700s"
+        ]
+
+    def test_invalid_threshold(self) -> None:
+        with pytest.raises(ValueError):
+            DBInstrumentation(slow_query_threshold=0)
+
+
+class FakeConnection:
+    async def fetchval(self, query: str, *args: tp.Any, column: int, timeout: tp.Any) -> str:
+        return query
+
+
+class FakePool:
+    def __init__(self) -> None:
+        self.n_released = 0
+
+    async def acquire(self, timeout: tp.Optional[float]) -> FakeConnection:
+        await asyncio.sleep(0.01)
+        return FakeConnection()
+
+    async def release(self, connection: FakeConnection, timeout: tp.Optional[float]) -> None:
+        self.n_released += 1
+
+    async def close(self) -> None:
+        pass
+
+
+@pytest.mark.asyncio
+class TestInstrumentedPool:
+    async def test_acquire_reported(self) -> None:
+        fake_pool = FakePool()
+        pool = InstrumentedPool(fake_pool, DBInstrumentation(), max_size=5)
+
+        conn = await pool.acquire()
+        assert pool.get_stats().n_in_use == 1
+        async with pool.acquire():
+            assert pool.get_stats().n_in_use == 2
+        await pool.release(conn)
+
+        stats = pool.get_stats()
+        assert (stats.max_size, stats.n_in_use) == (5, 0)
+        assert stats.acquire_wait.count == 2
+        assert stats.acquire_wait.total >= 0.02
+        assert fake_pool.n_released == 2
+
+    async def test_query_methods_acquire_connection(self) -> None:
+        fake_pool = FakePool()
+        pool = InstrumentedPool(fake_pool, DBInstrumentation(), max_size=5)
+
+        assert await pool.fetchval("SELECT 1") == "SELECT 1"
+        await pool.close()  # Not overridden methods are taken from pool
+
+        assert pool.get_stats().acquire_wait.count == 1
+        assert fake_pool.n_released == 1
@@ -0,0 +1,274 @@
+# pylint: disable=attribute-defined-outside-init
+import typing as tp
+from datetime import timedelta
+
+import pytest
+
+from requestor.db import DBService, LeaderboardRepository
+from requestor.models import ByModelLeaderboardRow, GlobalLeaderboardRow, Metric, TrialStatus
+from requestor.utils import utc_now
+from tests.utils import (
+    DBObjectCreator,
+    add_metric,
+    add_model,
+    add_team,
+    add_trial,
+    gen_model_info,
+    gen_team_info,
+)
+
+pytestmark = pytest.mark.asyncio
+
+
+class TestLeaderboard:
+    def setup(self) -> None:
+        self.now = utc_now()
+        self.now_1 = self.now - timedelta(hours=1)
+        self.now_2 = self.now - timedelta(hours=2)
+        self.now_3 = self.now - timedelta(hours=3)
+
+    @tp.no_type_check
+    def _add_data(  # pylint: disable=too-many-locals
+        self, create_db_object: DBObjectCreator
+    ) -> tp.Dict:  # pylint: disable=too-many-locals
+        # 1 - team with 2 models, both have trials
+        # 2 - team with 2 models, only 1st has trials
+        # 3 - team with model with successful trial, but without metrics
+        # 4 - team with model, but without successful trials
+        # 5 - team with model, but without trials
+        # 6 - team without models
+
+        data = {}
+
+        # Add teams
+        for i in range(1, 7):
+            t_info = gen_team_info(i)
+            t_desc = f"desc_team_{i}"
+            t_id = add_team(t_info, create_db_object, description=t_desc)
+            data[i] = {"id": t_id, "description": t_desc}
+
+        # Add models
+        for i in (1, 2):
+            data[i]["models"] = {}
+            for j in (1, 2):
+                t_id = data[i]["id"]
+                m_info = gen_model_info(t_id, rnd=j)
+                m_id = add_model(m_info, create_db_object)
+                data[i]["models"][j] = {"id": m_id, "name": m_info.name}
+        for i in (3, 4, 5):
+            t_id = data[i]["id"]
+            m_info = gen_model_info(t_id, rnd=1)
+            m_id = add_model(m_info, create_db_object)
+            data[i]["models"] = {1: {"id": m_id, "name": m_info.name}}
+
+        # Add trials
+        for i in (1, 2, 3, 4):
+            models = data[i]["models"]
+            for j, m in models.items():
+                m_id = m["id"]
+                statuses = (TrialStatus.waiting, TrialStatus.started, TrialStatus.failed)
+                status = statuses[(i + j) % 3]
+                tr_id = add_trial(m_id, status, create_db_object, created_at=self.now)
+                m["trials"] = {1: {"id": tr_id, "dt": self.now}}
+
+        model = data[1]["models"][1]
+        tr_1_id = add_trial(model["id"], TrialStatus.success, create_db_object, self.now_1)
+        tr_2_id = add_trial(model["id"], TrialStatus.success, create_db_object, self.now_3)
+        model["trials"][2] = {"id": tr_1_id, "dt": self.now_1}
+        model["trials"][3] = {"id": tr_2_id, "dt": self.now_3}
+
+        model = data[1]["models"][2]
+        tr_id = add_trial(model["id"], TrialStatus.success, create_db_object, self.now_2)
+        model["trials"][2] = {"id": tr_id, "dt": self.now_2}
+
+        model = data[2]["models"][1]
+        tr_1_id = add_trial(model["id"], TrialStatus.success, create_db_object, self.now)
+        tr_2_id = add_trial(model["id"], TrialStatus.success, create_db_object, self.now_2)
+        model["trials"][2] = {"id": tr_1_id, "dt": self.now}
+        model["trials"][3] = {"id": tr_2_id, "dt": self.now_2}
+
+        model = data[3]["models"][1]
+        tr_id = add_trial(model["id"], TrialStatus.success, create_db_object, self.now_2)
+        model["trials"][2] = {"id": tr_id, "dt": self.now_2}
+
+        # Add metrics
+        tr_id = data[1]["models"][1]["trials"][2]["id"]
+        add_metric(tr_id, "metric_1", 10, create_db_object)
+        add_metric(tr_id, "metric_2", 100, create_db_object)
+        tr_id = data[1]["models"][1]["trials"][3]["id"]
+        add_metric(tr_id, "metric_1", 20, create_db_object)
+
+        tr_id = data[1]["models"][2]["trials"][2]["id"]
+        add_metric(tr_id, "metric_1", 30, create_db_object)
+
+        tr_id = data[2]["models"][1]["trials"][3]["id"]
+        add_metric(tr_id, "metric_1", 50, create_db_object)
+
+        return data
+
+    async def test_global_leaderboard(
+        self,
+        leaderboard_repository: LeaderboardRepository,
+        create_db_object: DBObjectCreator,
+    ) -> None:
+        data = self._add_data(create_db_object)
+        await leaderboard_repository.rebuild_leaderboard_stats()
+
+        actual = await leaderboard_repository.get_global_leaderboard("metric_1")
+
+        expected = [
+            GlobalLeaderboardRow(
+                team_name=data[2]["description"],
+                best_score=50,
+                n_attempts=2,
+                last_attempt=self.now,
+            ),
+            GlobalLeaderboardRow(
+                team_name=data[1]["description"],
+                best_score=30,
+                n_attempts=3,
+                last_attempt=self.now_1,
+            ),
+            GlobalLeaderboardRow(
+                team_name=data[3]["description"],
+                best_score=None,
+                n_attempts=1,
+                last_attempt=self.now_2,
+            ),
+            GlobalLeaderboardRow(
+                team_name=data[4]["description"],
+                best_score=None,
+                n_attempts=0,
+                last_attempt=None,
+            ),
+            GlobalLeaderboardRow(
+                team_name=data[5]["description"],
+                best_score=None,
+                n_attempts=0,
+                last_attempt=None,
+            ),
+            GlobalLeaderboardRow(
+                team_name=data[6]["description"],
+                best_score=None,
+                n_attempts=0,
+                last_attempt=None,
+            ),
+        ]
+
+        assert actual[: len(expected)] == expected
+
+    async def test_by_model_leaderboard(
+        self,
+        leaderboard_repository: LeaderboardRepository,
+        create_db_object: DBObjectCreator,
+    ) -> None:
+        data = self._add_data(create_db_object)
+        await leaderboard_repository.rebuild_leaderboard_stats()
+
+        actual = await leaderboard_repository.get_by_model_leaderboard("metric_1")
+
+        expected = [
+            ByModelLeaderboardRow(
+                team_name=data[1]["description"],
+                model_name=data[1]["models"][1]["name"],
+                best_score=20,
+                n_attempts=2,
+                last_attempt=self.now_1,
+            ),
+            ByModelLeaderboardRow(
+                team_name=data[1]["description"],
+                model_name=data[1]["models"][2]["name"],
+                best_score=30,
+                n_attempts=1,
+                last_attempt=self.now_2,
+            ),
+            ByModelLeaderboardRow(
+                team_name=data[2]["description"],
+                model_name=data[2]["models"][1]["name"],
+                best_score=50,
+                n_attempts=1,
+                last_attempt=self.now_2,
+            ),
+        ]
+
+        assert actual == expected
+
+    async def test_leaderboard_stats_maintained_incrementally(
+        self,
+        db_service: DBService,
+        leaderboard_repository: LeaderboardRepository,
+        create_db_object: DBObjectCreator,
+    ) -> None:
+        team_1_id = add_team(gen_team_info(1), create_db_object)
+        team_2_id = add_team(gen_team_info(2), create_db_object)
+        model_1_id = add_model(gen_model_info(team_1_id, rnd="1"), create_db_object)
+        model_2_id = add_model(gen_model_info(team_1_id, rnd="2"), create_db_object)
+        model_3_id = add_model(gen_model_info(team_2_id, rnd="1"), create_db_object)
+
+        trial = await db_service.add_trial(model_1_id, TrialStatus.waiting)
+        await db_service.update_trial_status(trial.trial_id, TrialStatus.success)
+        await db_service.add_metrics(trial.trial_id, [Metric(name="metric_1", value=10)])
+
+        trial = await db_service.add_trial(model_1_id, TrialStatus.waiting)
+        await db_service.update_trial_status(trial.trial_id, TrialStatus.success)
+        await db_service.add_metrics(trial.trial_id, [Metric(name="metric_1", value=5)])
+        await db_service.add_metrics(trial.trial_id, [Metric(name="metric_2", value=7)])
+
+        # Metrics are added before trial became successful
+        trial = await db_service.add_trial(model_2_id, TrialStatus.started)
+        await db_service.add_metrics(trial.trial_id, [Metric(name="metric_1", value=20)])
+        await db_service.update_trial_status(trial.trial_id, TrialStatus.success)
+        await db_service.update_trial_status(trial.trial_id, TrialStatus.success)
+
+        trial = await db_service.add_trial(model_3_id, TrialStatus.waiting)
+        await db_service.update_trial_status(trial.trial_id, TrialStatus.failed)
+
+        trial = await db_service.add_trial(model_3_id, TrialStatus.waiting)
+        await db_service.update_trial_status(trial.trial_id, TrialStatus.success)
+
+        global_leaderboard = await leaderboard_repository.get_global_leaderboard("metric_1")
+        by_model_leaderboard = await leaderboard_repository.get_by_model_leaderboard("metric_1")
+
+        assert [(r.best_score, r.n_attempts) for r in global_leaderboard] == [(20, 3), (None, 1)]
+        assert [(r.best_score, r.n_attempts) for r in by_model_leaderboard] == [(10, 2), (20, 1)]
+
+        await leaderboard_repository.rebuild_leaderboard_stats()
+
+        assert (
+            await leaderboard_repository.get_global_leaderboard("metric_1") == global_leaderboard
+        )
+        assert (
+            await leaderboard_repository.get_by_model_leaderboard("metric_1")
+            == by_model_leaderboard
+        )
+
+    async def test_leaderboard_snapshots(
+        self, leaderboard_repository: LeaderboardRepository
+    ) -> None:
+        rows = [
+            GlobalLeaderboardRow(team_name="a", best_score=0.5, n_attempts=1, last_attempt=None),
+            GlobalLeaderboardRow(team_name="b", best_score=None, n_attempts=0, last_attempt=None),
+        ]
+        changed_rows = [rows[1].copy(update={"best_score": 0.7}), rows[0]]
+
+        assert await leaderboard_repository.add_leaderboard_snapshot("metric", rows)
+        # Attempts count isn't saved, so leaderboard is the same
+        assert not await leaderboard_repository.add_leaderboard_snapshot(
+            "metric", [rows[0].copy(update={"n_attempts": 2}), rows[1]]
+        )
+        assert await leaderboard_repository.add_leaderboard_snapshot("other_metric", rows)
+        assert await leaderboard_repository.add_leaderboard_snapshot("metric", changed_rows)
+        # The same state as before the last snapshot is saved again
+        assert await leaderboard_repository.add_leaderboard_snapshot("metric", rows)
+
+        snapshots = await leaderboard_repository.get_leaderboard_snapshots("metric")
+        assert [(s.team_names, s.scores) for s in snapshots] == [
+            (["a", "b"], [0.5, None]),
+            (["b", "a"], [0.7, 0.5]),
+            (["a", "b"], [0.5, None]),
+        ]
+
+        since = await leaderboard_repository.get_leaderboard_snapshots(
+            "metric", snapshots[1].created_at
+        )
+        assert since == snapshots[1:]
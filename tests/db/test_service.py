@@ -1,30 +1,42 @@
-# pylint: disable=attribute-defined-outside-init
+import asyncio
 import typing as tp
-from datetime import timedelta
+from datetime import date, datetime, timedelta
 from uuid import uuid4
 
+import pandas as pd
 import pytest
+from rectools import Columns
 from sqlalchemy import orm
 
+from requestor.db import DBService, LeaderboardRepository, RecosRepository
+from requestor.db.cache import CacheStats
 from requestor.db.exceptions import (
     DuplicatedMetricError,
     DuplicatedModelError,
+    DuplicatedRecommendationError,
     DuplicatedTeamError,
     ModelNotFoundError,
     TeamNotFoundError,
     TokenNotFoundError,
     TrialNotFoundError,
 )
-from requestor.db.models import MetricsTable, ModelsTable, TeamsTable, TokensTable, TrialsTable
-from requestor.db.service import DBService
-from requestor.models import (
-    ByModelLeaderboardRow,
-    GlobalLeaderboardRow,
-    Metric,
-    ModelInfo,
-    TeamInfo,
-    TrialStatus,
+from requestor.db.models import (
+    MetricsTable,
+    ModelsTable,
+    RecommendationsTable,
+    TeamsTable,
+    TokensTable,
+    TrialsTable,
 )
+from requestor.db.queries import HOT_QUERIES
+from requestor.db.repositories import (
+    get_month_start,
+    get_next_month_start,
+    make_recos_partition_name,
+)
+from requestor.models import Metric, ModelInfo, TeamInfo, Trial, TrialRefusal, TrialStatus
+from requestor.services import make_db_service
+from requestor.settings import ServiceConfig, TrialLimit
 from requestor.utils import utc_now
 from tests.utils import (
     OTHER_TEAM_INFO,
@@ -39,9 +51,7 @@ from tests.utils import (
     add_trial,
     assert_db_model_equal_to_pydantic_model,
     gen_model_info,
-    gen_team_info,
     make_db_team,
-    make_db_trial,
 )
 
 pytestmark = pytest.mark.asyncio
@@ -51,6 +61,25 @@ async def test_ping(db_service: DBService) -> None:
     assert await db_service.ping()
 
 
+async def test_hot_queries_prepared_on_setup(db_service: DBService) -> None:
+    assert db_service.is_ready
+    async with db_service.pool.acquire() as conn:
+        records = await conn.fetch("SELECT statement FROM pg_prepared_statements")
+    assert {record["statement"] for record in records} >= set(HOT_QUERIES)
+
+
+async def test_db_stats(db_service: DBService) -> None:
+    await db_service.ping()
+    await db_service.ping()
+
+    stats = db_service.get_db_stats()
+    assert stats.methods["ping"].latency.count == 2
+    assert stats.methods["ping"].n_errors == 0
+    assert stats.pool is not None
+    assert stats.pool.n_in_use == 0  # Listener connection is outside of pool
+    assert stats.pool.acquire_wait.count >= 2
+
+
 class TestTeams:
     async def test_add_team_success(
         self,
@@ -170,6 +199,59 @@ class TestTeams:
         with pytest.raises(TeamNotFoundError):
             await db_service.get_team_by_chat(TEAM_INFO.chat_id)
 
+    async def test_get_team_by_chat_cached(
+        self, db_service: DBService, create_db_object: DBObjectCreator
+    ) -> None:
+        team_id = add_team(TEAM_INFO, create_db_object)
+        await db_service.get_team_by_chat(TEAM_INFO.chat_id)
+        await db_service.get_team_by_chat(TEAM_INFO.chat_id)
+        assert db_service.get_db_stats().caches["team"] == CacheStats(hits=1, misses=1, size=1)
+
+        await db_service.update_team(team_id, OTHER_TEAM_INFO)
+
+        with pytest.raises(TeamNotFoundError):
+            await db_service.get_team_by_chat(TEAM_INFO.chat_id)
+        team = await db_service.get_team_by_chat(OTHER_TEAM_INFO.chat_id)
+        assert team.api_base_url == OTHER_TEAM_INFO.api_base_url
+
+    async def test_team_cache_invalidated_by_other_service(
+        self,
+        db_service: DBService,
+        service_config: ServiceConfig,
+        create_db_object: DBObjectCreator,
+    ) -> None:
+        team_id = add_team(TEAM_INFO, create_db_object)
+        await db_service.get_team_by_chat(TEAM_INFO.chat_id)
+
+        other_service = make_db_service(service_config)
+        await other_service.setup()
+        try:
+            updated_info = TEAM_INFO.copy(update={"api_base_url": "other_url"})
+            await other_service.update_team(team_id, updated_info)
+        finally:
+            await other_service.cleanup()
+        await asyncio.sleep(0.5)  # Wait for notification
+
+        team = await db_service.get_team_by_chat(TEAM_INFO.chat_id)
+        assert team.api_base_url == "other_url"
+
+    async def test_cache_listener_reconnected(
+        self, db_service: DBService, create_db_object: DBObjectCreator
+    ) -> None:
+        add_team(TEAM_INFO, create_db_object)
+        await db_service.get_team_by_chat(TEAM_INFO.chat_id)
+        listener_conn = db_service.listener_conn
+        assert listener_conn is not None
+
+        await db_service.pool.execute(
+            "SELECT pg_terminate_backend($1::INT)", listener_conn.get_server_pid()
+        )
+        await asyncio.sleep(0.5)  # Wait for reconnection
+
+        assert db_service.listener_conn is not None
+        assert db_service.listener_conn is not listener_conn
+        assert len(db_service.team_cache) == 0
+
 
 class TestModels:
     async def test_add_model_success(
@@ -277,6 +359,20 @@ class TestModels:
         model_1 = await db_service.get_model_by_name(team_id, model_1_info.name)
         assert model_1.name == model_1_info.name
 
+    async def test_get_model_by_name_cached(
+        self, db_service: DBService, create_db_object: DBObjectCreator
+    ) -> None:
+        team_id = add_team(TEAM_INFO, create_db_object)
+        model_info = gen_model_info(team_id)
+
+        with pytest.raises(ModelNotFoundError):
+            await db_service.get_model_by_name(team_id, model_info.name)
+        model = await db_service.add_model(model_info)
+
+        assert await db_service.get_model_by_name(team_id, model_info.name) == model
+        assert await db_service.get_model_by_name(team_id, model_info.name) == model
+        assert db_service.get_db_stats().caches["model"] == CacheStats(hits=1, misses=2, size=1)
+
     async def test_get_model_by_name_exception(
         self, db_service: DBService, create_db_object: DBObjectCreator
     ) -> None:
@@ -360,6 +456,59 @@ class TestTrials:
         with pytest.raises(TrialNotFoundError):
             await db_service.update_trial_status(uuid4(), TrialStatus.success)
 
+    async def test_get_model_last_success_trial(
+        self,
+        db_service: DBService,
+        create_db_object: DBObjectCreator,
+    ) -> None:
+        team_id = add_team(TEAM_INFO, create_db_object)
+        model_id = add_model(gen_model_info(team_id), create_db_object)
+        other_model_id = add_model(gen_model_info(team_id, rnd="2"), create_db_object)
+
+        now = utc_now()
+        add_trial(model_id, TrialStatus.success, create_db_object, now - timedelta(hours=2))
+        expected_id = add_trial(
+            model_id, TrialStatus.success, create_db_object, now - timedelta(hours=1)
+        )
+        add_trial(model_id, TrialStatus.failed, create_db_object, now)
+        add_trial(other_model_id, TrialStatus.success, create_db_object, now)
+
+        trial = await db_service.get_model_last_success_trial(model_id)
+
+        assert trial.trial_id == expected_id
+        assert trial.status == TrialStatus.success
+
+    async def test_get_model_last_success_trial_when_no_success(
+        self,
+        db_service: DBService,
+        create_db_object: DBObjectCreator,
+    ) -> None:
+        team_id = add_team(TEAM_INFO, create_db_object)
+        model_id = add_model(gen_model_info(team_id), create_db_object)
+        add_trial(model_id, TrialStatus.failed, create_db_object)
+
+        with pytest.raises(TrialNotFoundError):
+            await db_service.get_model_last_success_trial(model_id)
+
+    async def test_get_success_trials(
+        self,
+        db_service: DBService,
+        create_db_object: DBObjectCreator,
+    ) -> None:
+        team_id = add_team(TEAM_INFO, create_db_object)
+        model_id = add_model(gen_model_info(team_id), create_db_object)
+
+        now = utc_now()
+        trial_1_id = add_trial(model_id, TrialStatus.success, create_db_object, now)
+        trial_2_id = add_trial(
+            model_id, TrialStatus.success, create_db_object, now - timedelta(hours=1)
+        )
+        add_trial(model_id, TrialStatus.failed, create_db_object, now)
+
+        trials = await db_service.get_success_trials()
+
+        assert [trial.trial_id for trial in trials] == [trial_2_id, trial_1_id]
+
     async def test_get_trial_today_stat(
         self,
         db_service: DBService,
@@ -372,20 +521,16 @@ class TestTrials:
         t1_m2_id = add_model(gen_model_info(t1_id, rnd="2"), create_db_object)
         t2_m1_id = add_model(gen_model_info(t2_id), create_db_object)
 
-        today = utc_now()
-        yesterday = utc_now() - timedelta(days=1)
+        for status in (TrialStatus.started, TrialStatus.started, TrialStatus.waiting):
+            await db_service.add_trial(t1_m1_id, status)
+        trial = await db_service.add_trial(t1_m1_id, TrialStatus.started)
+        await db_service.update_trial_status(trial.trial_id, TrialStatus.success)
+        trial = await db_service.add_trial(t1_m2_id, TrialStatus.waiting)
+        await db_service.update_trial_status(trial.trial_id, TrialStatus.failed)
+        await db_service.add_trial(t2_m1_id, TrialStatus.started)
 
-        trials = (
-            make_db_trial(model_id=t1_m1_id, status=TrialStatus.started, created_at=today),
-            make_db_trial(model_id=t1_m1_id, status=TrialStatus.started, created_at=today),
-            make_db_trial(model_id=t1_m1_id, status=TrialStatus.success, created_at=today),
-            make_db_trial(model_id=t1_m1_id, status=TrialStatus.success, created_at=yesterday),
-            make_db_trial(model_id=t1_m2_id, status=TrialStatus.waiting, created_at=today),
-            make_db_trial(model_id=t1_m2_id, status=TrialStatus.failed, created_at=today),
-            make_db_trial(model_id=t2_m1_id, status=TrialStatus.started, created_at=today),
-        )
-        for trial in trials:
-            create_db_object(trial)
+        yesterday = utc_now() - timedelta(days=1)
+        add_trial(t1_m1_id, TrialStatus.success, create_db_object, created_at=yesterday)
 
         t1_trials_stat = await db_service.get_team_today_trial_stat(t1_id)
 
@@ -396,6 +541,102 @@ class TestTrials:
             TrialStatus.failed: 1,
         }
 
+    async def test_admit_trial(
+        self,
+        db_service: DBService,
+        db_session: orm.Session,
+        create_db_object: DBObjectCreator,
+    ) -> None:
+        team_id = add_team(TEAM_INFO, create_db_object)
+        model_info = gen_model_info(team_id)
+        model_id = add_model(model_info, create_db_object)
+
+        admission = await db_service.admit_trial(TEAM_INFO.chat_id, model_info.name)
+
+        assert admission.refusal is None
+        assert admission.team.team_id == team_id
+        assert admission.model.model_id == model_id
+        assert admission.trial.model_id == model_id
+        assert admission.trial.status == TrialStatus.waiting
+
+        db_trials = db_session.query(TrialsTable).all()
+        assert len(db_trials) == 1
+        assert_db_model_equal_to_pydantic_model(db_trials[0], admission.trial)
+        assert await db_service.get_team_today_trial_stat(team_id) == {TrialStatus.waiting: 1}
+
+    @pytest.mark.parametrize(
+        "chat_id,model_name,refusal",
+        (
+            (OTHER_TEAM_INFO.chat_id, "some_name_", TrialRefusal.team_not_found),
+            (TEAM_INFO.chat_id, "other_name", TrialRefusal.model_not_found),
+        ),
+    )
+    async def test_admit_trial_for_nonexistent_team_or_model(
+        self,
+        db_service: DBService,
+        db_session: orm.Session,
+        create_db_object: DBObjectCreator,
+        chat_id: int,
+        model_name: str,
+        refusal: TrialRefusal,
+    ) -> None:
+        team_id = add_team(TEAM_INFO, create_db_object)
+        add_model(gen_model_info(team_id), create_db_object)
+
+        admission = await db_service.admit_trial(chat_id, model_name)
+
+        assert admission.refusal == refusal
+        assert admission.trial is None
+        assert len(db_session.query(TrialsTable).all()) == 0
+
+    @pytest.mark.parametrize(
+        "status,refusal",
+        (
+            (TrialStatus.success, TrialRefusal.success_limit),
+            (TrialStatus.waiting, TrialRefusal.waiting_limit),
+            (TrialStatus.failed, TrialRefusal.failed_limit),
+        ),
+    )
+    async def test_admit_trial_over_limit(
+        self,
+        db_service: DBService,
+        db_session: orm.Session,
+        create_db_object: DBObjectCreator,
+        status: TrialStatus,
+        refusal: TrialRefusal,
+    ) -> None:
+        team_id = add_team(TEAM_INFO, create_db_object)
+        model_info = gen_model_info(team_id)
+        model_id = add_model(model_info, create_db_object)
+        for _ in range(TrialLimit[status.value]):
+            trial = await db_service.add_trial(model_id, TrialStatus.waiting)
+            await db_service.update_trial_status(trial.trial_id, status)
+        n_trials = len(db_session.query(TrialsTable).all())
+
+        admission = await db_service.admit_trial(TEAM_INFO.chat_id, model_info.name)
+
+        assert admission.refusal == refusal
+        assert admission.today_trial_stat[status] == TrialLimit[status.value]
+        assert len(db_session.query(TrialsTable).all()) == n_trials
+
+    async def test_concurrent_admissions_respect_waiting_limit(
+        self,
+        db_service: DBService,
+        db_session: orm.Session,
+        create_db_object: DBObjectCreator,
+    ) -> None:
+        team_id = add_team(TEAM_INFO, create_db_object)
+        model_info = gen_model_info(team_id)
+        add_model(model_info, create_db_object)
+
+        admissions = await asyncio.gather(
+            *(db_service.admit_trial(TEAM_INFO.chat_id, model_info.name) for _ in range(5))
+        )
+
+        n_admitted = sum(admission.refusal is None for admission in admissions)
+        assert n_admitted == TrialLimit.waiting
+        assert len(db_session.query(TrialsTable).all()) == TrialLimit.waiting
+
 
 class TestMetrics:
     async def test_add_metrics_success(
@@ -407,12 +648,17 @@ class TestMetrics:
         team_id = add_team(TEAM_INFO, create_db_object)
         model_id = add_model(gen_model_info(team_id), create_db_object)
         trial_id = add_trial(model_id, TrialStatus.started, create_db_object)
-        metrics = [Metric(name="m1", value=10), Metric(name="m2", value=20)]
+        metrics = [
+            Metric(name="m1", value=10, ci_low=9, ci_high=11),
+            Metric(name="m2", value=20),
+        ]
 
         await db_service.add_metrics(trial_id, metrics)
 
-        db_metrics = db_session.query(MetricsTable).all()
+        db_metrics = db_session.query(MetricsTable).order_by(MetricsTable.name).all()
         assert len(db_metrics) == 2
+        assert (db_metrics[0].ci_low, db_metrics[0].ci_high) == (9, 11)
+        assert (db_metrics[1].ci_low, db_metrics[1].ci_high) == (None, None)
 
     async def test_add_duplicated_metrics(
         self,
@@ -444,174 +690,238 @@ class TestMetrics:
         db_metrics = db_session.query(MetricsTable).all()
         assert len(db_metrics) == 0
 
-
-class TestLeaderboard:
-    def setup(self) -> None:
-        self.now = utc_now()
-        self.now_1 = self.now - timedelta(hours=1)
-        self.now_2 = self.now - timedelta(hours=2)
-        self.now_3 = self.now - timedelta(hours=3)
-
-    @tp.no_type_check
-    def _add_data(  # pylint: disable=too-many-locals
-        self, create_db_object: DBObjectCreator
-    ) -> tp.Dict:  # pylint: disable=too-many-locals
-        # 1 - team with 2 models, both have trials
-        # 2 - team with 2 models, only 1st has trials
-        # 3 - team with model with successful trial, but without metrics
-        # 4 - team with model, but without successful trials
-        # 5 - team with model, but without trials
-        # 6 - team without models
-
-        data = {}
-
-        # Add teams
-        for i in range(1, 7):
-            t_info = gen_team_info(i)
-            t_desc = f"desc_team_{i}"
-            t_id = add_team(t_info, create_db_object, description=t_desc)
-            data[i] = {"id": t_id, "description": t_desc}
-
-        # Add models
-        for i in (1, 2):
-            data[i]["models"] = {}
-            for j in (1, 2):
-                t_id = data[i]["id"]
-                m_info = gen_model_info(t_id, rnd=j)
-                m_id = add_model(m_info, create_db_object)
-                data[i]["models"][j] = {"id": m_id, "name": m_info.name}
-        for i in (3, 4, 5):
-            t_id = data[i]["id"]
-            m_info = gen_model_info(t_id, rnd=1)
-            m_id = add_model(m_info, create_db_object)
-            data[i]["models"] = {1: {"id": m_id, "name": m_info.name}}
-
-        # Add trials
-        for i in (1, 2, 3, 4):
-            models = data[i]["models"]
-            for j, m in models.items():
-                m_id = m["id"]
-                statuses = (TrialStatus.waiting, TrialStatus.started, TrialStatus.failed)
-                status = statuses[(i + j) % 3]
-                tr_id = add_trial(m_id, status, create_db_object, created_at=self.now)
-                m["trials"] = {1: {"id": tr_id, "dt": self.now}}
-
-        model = data[1]["models"][1]
-        tr_1_id = add_trial(model["id"], TrialStatus.success, create_db_object, self.now_1)
-        tr_2_id = add_trial(model["id"], TrialStatus.success, create_db_object, self.now_3)
-        model["trials"][2] = {"id": tr_1_id, "dt": self.now_1}
-        model["trials"][3] = {"id": tr_2_id, "dt": self.now_3}
-
-        model = data[1]["models"][2]
-        tr_id = add_trial(model["id"], TrialStatus.success, create_db_object, self.now_2)
-        model["trials"][2] = {"id": tr_id, "dt": self.now_2}
-
-        model = data[2]["models"][1]
-        tr_1_id = add_trial(model["id"], TrialStatus.success, create_db_object, self.now)
-        tr_2_id = add_trial(model["id"], TrialStatus.success, create_db_object, self.now_2)
-        model["trials"][2] = {"id": tr_1_id, "dt": self.now}
-        model["trials"][3] = {"id": tr_2_id, "dt": self.now_2}
-
-        model = data[3]["models"][1]
-        tr_id = add_trial(model["id"], TrialStatus.success, create_db_object, self.now_2)
-        model["trials"][2] = {"id": tr_id, "dt": self.now_2}
-
-        # Add metrics
-        tr_id = data[1]["models"][1]["trials"][2]["id"]
-        add_metric(tr_id, "metric_1", 10, create_db_object)
-        add_metric(tr_id, "metric_2", 100, create_db_object)
-        tr_id = data[1]["models"][1]["trials"][3]["id"]
-        add_metric(tr_id, "metric_1", 20, create_db_object)
-
-        tr_id = data[1]["models"][2]["trials"][2]["id"]
-        add_metric(tr_id, "metric_1", 30, create_db_object)
-
-        tr_id = data[2]["models"][1]["trials"][3]["id"]
-        add_metric(tr_id, "metric_1", 50, create_db_object)
-
-        return data
-
-    async def test_global_leaderboard(
+    async def test_replace_metrics(
         self,
         db_service: DBService,
+        db_session: orm.Session,
         create_db_object: DBObjectCreator,
     ) -> None:
-        data = self._add_data(create_db_object)
-
-        actual = await db_service.get_global_leaderboard("metric_1")
-
-        expected = [
-            GlobalLeaderboardRow(
-                team_name=data[2]["description"],
-                best_score=50,
-                n_attempts=2,
-                last_attempt=self.now,
-            ),
-            GlobalLeaderboardRow(
-                team_name=data[1]["description"],
-                best_score=30,
-                n_attempts=3,
-                last_attempt=self.now_1,
-            ),
-            GlobalLeaderboardRow(
-                team_name=data[3]["description"],
-                best_score=None,
-                n_attempts=1,
-                last_attempt=self.now_2,
-            ),
-            GlobalLeaderboardRow(
-                team_name=data[4]["description"],
-                best_score=None,
-                n_attempts=0,
-                last_attempt=None,
-            ),
-            GlobalLeaderboardRow(
-                team_name=data[5]["description"],
-                best_score=None,
-                n_attempts=0,
-                last_attempt=None,
-            ),
-            GlobalLeaderboardRow(
-                team_name=data[6]["description"],
-                best_score=None,
-                n_attempts=0,
-                last_attempt=None,
-            ),
+        team_id = add_team(TEAM_INFO, create_db_object)
+        model_id = add_model(gen_model_info(team_id), create_db_object)
+        trial_1_id = add_trial(model_id, TrialStatus.success, create_db_object)
+        trial_2_id = add_trial(model_id, TrialStatus.success, create_db_object)
+        trial_3_id = add_trial(model_id, TrialStatus.success, create_db_object)
+        add_metric(trial_1_id, "m1", 10, create_db_object)
+        add_metric(trial_1_id, "m2", 20, create_db_object)
+        add_metric(trial_3_id, "m1", 30, create_db_object)
+
+        await db_service.replace_metrics(
+            {
+                trial_1_id: [Metric(name="m1", value=11)],
+                trial_2_id: [Metric(name="m1", value=12, ci_low=1, ci_high=20)],
+            }
+        )
+
+        db_metrics = db_session.query(MetricsTable).order_by(MetricsTable.value).all()
+        actual = [(m.trial_id, m.name, m.value) for m in db_metrics]
+        assert actual == [
+            (str(trial_1_id), "m1", 11),
+            (str(trial_2_id), "m1", 12),
+            (str(trial_3_id), "m1", 30),
         ]
 
-        assert actual[: len(expected)] == expected
+    async def test_replace_duplicated_metrics(
+        self,
+        db_service: DBService,
+        db_session: orm.Session,
+        create_db_object: DBObjectCreator,
+    ) -> None:
+        team_id = add_team(TEAM_INFO, create_db_object)
+        model_id = add_model(gen_model_info(team_id), create_db_object)
+        trial_id = add_trial(model_id, TrialStatus.success, create_db_object)
+        add_metric(trial_id, "m1", 10, create_db_object)
+
+        with pytest.raises(DuplicatedMetricError):
+            await db_service.replace_metrics(
+                {trial_id: [Metric(name="m1", value=11), Metric(name="m1", value=12)]}
+            )
+
+        db_metrics = db_session.query(MetricsTable).all()
+        assert [(m.name, m.value) for m in db_metrics] == [("m1", 10)]
+
+
+class TestRecommendations:
+    async def _add_trial(self, db_service: DBService, create_db_object: DBObjectCreator) -> Trial:
+        team_id = add_team(TEAM_INFO, create_db_object)
+        model_id = add_model(gen_model_info(team_id), create_db_object)
+        return await db_service.add_trial(model_id, TrialStatus.started)
 
-    async def test_by_model_leaderboard(
+    async def test_add_and_get_recos(
         self,
         db_service: DBService,
+        recos_repository: RecosRepository,
         create_db_object: DBObjectCreator,
     ) -> None:
-        data = self._add_data(create_db_object)
-
-        actual = await db_service.get_by_model_leaderboard("metric_1")
-
-        expected = [
-            ByModelLeaderboardRow(
-                team_name=data[1]["description"],
-                model_name=data[1]["models"][1]["name"],
-                best_score=20,
-                n_attempts=2,
-                last_attempt=self.now_1,
-            ),
-            ByModelLeaderboardRow(
-                team_name=data[1]["description"],
-                model_name=data[1]["models"][2]["name"],
-                best_score=30,
-                n_attempts=1,
-                last_attempt=self.now_2,
-            ),
-            ByModelLeaderboardRow(
-                team_name=data[2]["description"],
-                model_name=data[2]["models"][1]["name"],
-                best_score=50,
-                n_attempts=1,
-                last_attempt=self.now_2,
-            ),
-        ]
+        trial = await self._add_trial(db_service, create_db_object)
+        other_trial = await db_service.add_trial(trial.model_id, TrialStatus.started)
+        recos = pd.DataFrame(
+            {
+                Columns.User: [1, 1, 2, 2],
+                Columns.Item: [10, 20, 20, 30],
+                Columns.Rank: [1, 2, 1, 2],
+            }
+        )
+
+        await recos_repository.add_recos(trial, recos)
+        await recos_repository.add_recos(other_trial, recos.head(1))
+        actual = await recos_repository.get_recos(trial)
+
+        actual = actual.sort_values(Columns.UserItem, ignore_index=True)
+        pd.testing.assert_frame_equal(actual, recos)
+        assert await recos_repository.get_recos_partitions() == [get_month_start(trial.created_at)]
+
+    async def test_add_recos_after_cached_partition_dropped(
+        self,
+        db_service: DBService,
+        recos_repository: RecosRepository,
+        create_db_object: DBObjectCreator,
+    ) -> None:
+        trial = await self._add_trial(db_service, create_db_object)
+        other_trial = await db_service.add_trial(trial.model_id, TrialStatus.started)
+        recos = pd.DataFrame({Columns.User: [1], Columns.Item: [10], Columns.Rank: [1]})
+        await recos_repository.add_recos(trial, recos)
+        month = get_month_start(trial.created_at)
+        # Dropped by other process, so the partition is still cached
+        await db_service.pool.execute(f"DROP TABLE {make_recos_partition_name(month)}")
 
-        assert actual == expected
+        await recos_repository.add_recos(other_trial, recos)
+
+        pd.testing.assert_frame_equal(await recos_repository.get_recos(other_trial), recos)
+        assert await recos_repository.get_recos_partitions() == [month]
+
+    async def test_get_nonexistent_recos(
+        self,
+        db_service: DBService,
+        recos_repository: RecosRepository,
+        create_db_object: DBObjectCreator,
+    ) -> None:
+        trial = await self._add_trial(db_service, create_db_object)
+        actual = await recos_repository.get_recos(trial)
+        assert actual.empty
+        assert list(actual.columns) == [Columns.User, Columns.Item, Columns.Rank]
+
+    async def test_add_duplicated_recos(
+        self,
+        db_service: DBService,
+        recos_repository: RecosRepository,
+        db_session: orm.Session,
+        create_db_object: DBObjectCreator,
+    ) -> None:
+        trial = await self._add_trial(db_service, create_db_object)
+        recos = pd.DataFrame({Columns.User: [1, 1], Columns.Item: [10, 10], Columns.Rank: [1, 2]})
+
+        with pytest.raises(DuplicatedRecommendationError):
+            await recos_repository.add_recos(trial, recos)
+
+        assert len(db_session.query(RecommendationsTable).all()) == 0
+
+    async def test_add_recos_for_nonexistent_trial(
+        self,
+        db_service: DBService,
+        recos_repository: RecosRepository,
+        create_db_object: DBObjectCreator,
+    ) -> None:
+        trial = await self._add_trial(db_service, create_db_object)
+        recos = pd.DataFrame({Columns.User: [1], Columns.Item: [10], Columns.Rank: [1]})
+        with pytest.raises(TrialNotFoundError):
+            await recos_repository.add_recos(trial.copy(update={"trial_id": uuid4()}), recos)
+
+    @pytest.mark.parametrize("detach", (False, True))
+    async def test_remove_recos_partitions(
+        self,
+        db_service: DBService,
+        recos_repository: RecosRepository,
+        db_session: orm.Session,
+        create_db_object: DBObjectCreator,
+        detach: bool,
+    ) -> None:
+        trial = await self._add_trial(db_service, create_db_object)
+        recos = pd.DataFrame({Columns.User: [1], Columns.Item: [10], Columns.Rank: [1]})
+        for created_at in (
+            datetime(2022, 11, 5),
+            datetime(2022, 12, 31, 23),
+            datetime(2023, 1, 1),
+        ):
+            old_trial_id = add_trial(
+                trial.model_id, TrialStatus.success, create_db_object, created_at
+            )
+            old_trial = trial.copy(update={"trial_id": old_trial_id, "created_at": created_at})
+            await recos_repository.add_recos(old_trial, recos)
+        await recos_repository.add_recos(trial, recos)
+
+        removed = await recos_repository.remove_recos_partitions(date(2023, 1, 1), detach)
+
+        assert removed == ["recommendations_p202211", "recommendations_p202212"]
+        assert await recos_repository.get_recos_partitions() == [
+            date(2023, 1, 1),
+            get_month_start(trial.created_at),
+        ]
+        assert len(db_session.query(RecommendationsTable).all()) == 2
+        if detach:
+            await db_service.pool.execute("DROP TABLE recommendations_p202211")
+            await db_service.pool.execute("DROP TABLE recommendations_p202212")
+
+
+@pytest.mark.parametrize(
+    "month,expected",
+    (
+        (date(2022, 1, 1), date(2022, 2, 1)),
+        (datetime(2022, 11, 30, 23, 59), date(2022, 12, 1)),
+        (date(2022, 12, 15), date(2023, 1, 1)),
+    ),
+)
+async def test_get_next_month_start(month: date, expected: date) -> None:
+    assert get_next_month_start(month) == expected
+
+
+class TestReplica:
+    @pytest.fixture
+    async def replica_db_service(
+        self, db_session: orm.Session, service_config: ServiceConfig
+    ) -> tp.AsyncGenerator[DBService, None]:
+        # Second DSN to the same DB behaves like a replica without lag
+        db_config = service_config.db_config.copy(
+            update={"replica_db_url": service_config.db_config.db_pool_config.db_url}
+        )
+        service = make_db_service(service_config.copy(update={"db_config": db_config}))
+        await service.setup()
+        try:
+            yield service
+        finally:
+            await service.cleanup()
+
+    async def test_reads_routed_to_replica(self, replica_db_service: DBService) -> None:
+        leaderboard_repository = LeaderboardRepository(db_service=replica_db_service)
+        await leaderboard_repository.get_global_leaderboard("metric_1")
+
+        stats = replica_db_service.get_db_stats()
+        assert replica_db_service.is_replica_fresh
+        assert stats.replica_pool is not None
+        assert stats.replica_pool.acquire_wait.count == 2  # Lag check and query
+
+    async def test_fallback_to_primary_on_lag(self, replica_db_service: DBService) -> None:
+        replica_db_service.replica_max_lag = -1
+        leaderboard_repository = LeaderboardRepository(db_service=replica_db_service)
+        await leaderboard_repository.get_global_leaderboard("metric_1")
+
+        stats = replica_db_service.get_db_stats()
+        assert not replica_db_service.is_replica_fresh
+        assert stats.replica_pool is not None
+        assert stats.replica_pool.acquire_wait.count == 1  # Lag check only
+
+    async def test_lag_checked_with_interval(self, replica_db_service: DBService) -> None:
+        replica_db_service.replica_lag_check_interval = 60
+        leaderboard_repository = LeaderboardRepository(db_service=replica_db_service)
+        await leaderboard_repository.get_global_leaderboard("metric_1")
+        await leaderboard_repository.get_by_model_leaderboard("metric_1")
+
+        stats = replica_db_service.get_db_stats()
+        assert stats.replica_pool is not None
+        assert stats.replica_pool.acquire_wait.count == 3
+
+    async def test_team_models_read_from_primary(self, replica_db_service: DBService) -> None:
+        await replica_db_service.get_team_last_n_models(uuid4(), 10)
+
+        stats = replica_db_service.get_db_stats()
+        assert stats.replica_pool is not None
+        assert stats.replica_pool.acquire_wait.count == 0
@@ -0,0 +1,104 @@
+import typing as tp
+from datetime import datetime, timedelta
+from uuid import UUID, uuid4
+
+import pytest
+
+from requestor.db import DBService
+from requestor.models import HistoryDirection, TrialStatus, TrialsHistoryPage
+from tests.utils import (
+    OTHER_TEAM_INFO,
+    TEAM_INFO,
+    DBObjectCreator,
+    add_metric,
+    add_model,
+    add_team,
+    add_trial,
+    gen_model_info,
+)
+
+pytestmark = pytest.mark.asyncio
+
+METRIC = "metric"
+
+
+async def get_history_pages(
+    db_service: DBService, team_id: UUID, limit: int, model_id: tp.Optional[UUID] = None
+) -> tp.List[TrialsHistoryPage]:
+    """Walk history pages from the last trials to the oldest ones"""
+    pages = [await db_service.get_trials_history(team_id, METRIC, limit, model_id)]
+    while pages[-1].has_older:
+        page = await db_service.get_trials_history(
+            team_id, METRIC, limit, model_id, cursor=pages[-1].items[-1].trial_id
+        )
+        pages.append(page)
+    return pages
+
+
+def get_page_trial_ids(pages: tp.List[TrialsHistoryPage]) -> tp.List[tp.List[UUID]]:
+    return [[item.trial_id for item in page.items] for page in pages]
+
+
+class TestTrialsHistory:
+    async def test_get_trials_history_pages(
+        self,
+        db_service: DBService,
+        create_db_object: DBObjectCreator,
+    ) -> None:
+        team_id = add_team(TEAM_INFO, create_db_object)
+        model_1_id = add_model(gen_model_info(team_id, rnd="1"), create_db_object)
+        model_2_id = add_model(gen_model_info(team_id, rnd="2"), create_db_object)
+        other_team_id = add_team(OTHER_TEAM_INFO, create_db_object)
+        other_model_id = add_model(gen_model_info(other_team_id), create_db_object)
+        add_trial(other_model_id, TrialStatus.success, create_db_object)
+
+        trial_ids = []
+        for i in range(5):
+            model_id = model_1_id if i % 2 == 0 else model_2_id
+            created_at = datetime(2022, 10, 11) + timedelta(hours=i)
+            trial_ids.append(
+                add_trial(model_id, TrialStatus.success, create_db_object, created_at)
+            )
+        add_metric(trial_ids[4], METRIC, 0.5, create_db_object)
+        add_metric(trial_ids[4], "other_metric", 0.7, create_db_object)
+        newest_first = trial_ids[::-1]
+
+        pages = await get_history_pages(db_service, team_id, 2)
+        assert get_page_trial_ids(pages) == [newest_first[:2], newest_first[2:4], newest_first[4:]]
+        assert [(page.has_newer, page.has_older) for page in pages] == [
+            (False, True),
+            (True, True),
+            (True, False),
+        ]
+        assert [item.metric_value for item in pages[0].items] == [0.5, None]
+        assert pages[0].items[0].model_name == "some_name_1"
+
+        back = await db_service.get_trials_history(
+            team_id,
+            METRIC,
+            2,
+            cursor=pages[1].items[0].trial_id,
+            direction=HistoryDirection.newer,
+        )
+        assert back == pages[0]
+
+    async def test_get_trials_history_by_model(
+        self,
+        db_service: DBService,
+        create_db_object: DBObjectCreator,
+    ) -> None:
+        team_id = add_team(TEAM_INFO, create_db_object)
+        model_1_id = add_model(gen_model_info(team_id, rnd="1"), create_db_object)
+        model_2_id = add_model(gen_model_info(team_id, rnd="2"), create_db_object)
+        # Trials created at the same time are ordered by id
+        trial_ids = sorted(
+            add_trial(model_1_id, TrialStatus.failed, create_db_object) for _ in range(3)
+        )
+        add_trial(model_2_id, TrialStatus.failed, create_db_object)
+
+        pages = await get_history_pages(db_service, team_id, 2, model_1_id)
+        assert get_page_trial_ids(pages) == [trial_ids[::-1][:2], [trial_ids[0]]]
+
+    async def test_get_trials_history_negative_limit(self, db_service: DBService) -> None:
+        with pytest.raises(ValueError):
+            await db_service.get_trials_history(uuid4(), METRIC, 0)
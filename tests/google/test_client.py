@@ -0,0 +1,146 @@
+import json
+import typing as tp
+
+import pytest
+import rsa
+from pytest_httpserver import HTTPServer
+
+from requestor.google import GSService, SheetsAPIError, SheetsClient
+from requestor.models import GlobalLeaderboardRow
+
+pytestmark = pytest.mark.asyncio
+
+SPREADSHEET_ID = "spreadsheet_id"
+
+
+@pytest.fixture(name="private_key", scope="module")
+def private_key_fixture() -> str:
+    _, key = rsa.newkeys(1024)
+    return key.save_pkcs1().decode()
+
+
+@pytest.fixture(name="credentials")
+def credentials_fixture(httpserver: HTTPServer, private_key: str) -> tp.Dict[str, tp.Any]:
+    return {
+        "client_email": "bot@project.iam.gserviceaccount.com",
+        "private_key": private_key,
+        "token_uri": httpserver.url_for("/token"),
+    }
+
+
+def expect_token(httpserver: HTTPServer, token: str) -> None:
+    httpserver.expect_oneshot_request("/token", method="POST").respond_with_json(
+        {"access_token": token, "expires_in": 3600}
+    )
+
+
+def expect_spreadsheet(httpserver: HTTPServer, token: str) -> None:
+    httpserver.expect_oneshot_request(
+        f"/v4/spreadsheets/{SPREADSHEET_ID}",
+        method="GET",
+        headers={"Authorization": f"Bearer {token}"},
+    ).respond_with_json(
+        {
+            "sheets": [
+                {"properties": {"sheetId": 0, "title": "global"}},
+                {"properties": {"sheetId": 1, "title": "by_model"}},
+            ]
+        }
+    )
+
+
+async def test_token_cached(httpserver: HTTPServer, credentials: tp.Dict[str, tp.Any]) -> None:
+    expect_token(httpserver, "token_1")
+    expect_spreadsheet(httpserver, "token_1")
+    expect_spreadsheet(httpserver, "token_1")
+
+    client = SheetsClient(credentials=credentials, base_url=httpserver.url_for("").rstrip("/"))
+    await client.setup()
+    try:
+        for _ in range(2):
+            spreadsheet = await client.get_spreadsheet(SPREADSHEET_ID)
+            assert len(spreadsheet["sheets"]) == 2
+    finally:
+        await client.cleanup()
+
+    assert not httpserver.assertions
+    assert len(httpserver.log) == 3
+
+
+async def test_token_refreshed_when_unauthorized(
+    httpserver: HTTPServer, credentials: tp.Dict[str, tp.Any]
+) -> None:
+    expect_token(httpserver, "token_1")
+    expect_token(httpserver, "token_2")
+    httpserver.expect_oneshot_request(
+        f"/v4/spreadsheets/{SPREADSHEET_ID}", headers={"Authorization": "Bearer token_1"}
+    ).respond_with_data("Unauthorized", status=401)
+    expect_spreadsheet(httpserver, "token_2")
+
+    client = SheetsClient(credentials=credentials, base_url=httpserver.url_for("").rstrip("/"))
+    await client.setup()
+    try:
+        await client.get_spreadsheet(SPREADSHEET_ID)
+    finally:
+        await client.cleanup()
+
+    assert client.token == "token_2"
+
+
+async def test_error_raised(httpserver: HTTPServer, credentials: tp.Dict[str, tp.Any]) -> None:
+    expect_token(httpserver, "token_1")
+    httpserver.expect_request(
+        f"/v4/spreadsheets/{SPREADSHEET_ID}/values:batchUpdate", method="POST"
+    ).respond_with_data("Quota exceeded", status=429)
+
+    client = SheetsClient(credentials=credentials, base_url=httpserver.url_for("").rstrip("/"))
+    await client.setup()
+    try:
+        with pytest.raises(SheetsAPIError) as e:
+            await client.values_batch_update(SPREADSHEET_ID, {"data": []})
+    finally:
+        await client.cleanup()
+
+    assert e.value.status == 429
+
+
+async def test_gs_service_with_stub_server(
+    httpserver: HTTPServer, credentials: tp.Dict[str, tp.Any]
+) -> None:
+    expect_token(httpserver, "token_1")
+    expect_spreadsheet(httpserver, "token_1")
+    httpserver.expect_oneshot_request(
+        f"/v4/spreadsheets/{SPREADSHEET_ID}/values:batchUpdate",
+        method="POST",
+        json={
+            "valueInputOption": "USER_ENTERED",
+            "data": [
+                {
+                    "range": "'global'!A2:E3",
+                    "values": [[1, "team_1", 10, 1, "-"], ["", "", "", "", ""]],
+                },
+            ],
+        },
+    ).respond_with_json({})
+
+    service = GSService(
+        credentials=json.dumps(credentials),
+        url=f"https://docs.google.com/spreadsheets/d/{SPREADSHEET_ID}/edit",
+        global_leaderboard_page_name="global",
+        global_leaderboard_page_max_rows=3,
+        by_model_leaderboard_page_name="by_model",
+        by_model_leaderboard_page_max_rows=3,
+        api_base_url=httpserver.url_for("").rstrip("/"),
+    )
+    await service.setup()
+    try:
+        rows = [
+            GlobalLeaderboardRow(
+                team_name="team_1", best_score=10, n_attempts=1, last_attempt=None
+            )
+        ]
+        await service.update_leaderboards(global_rows=rows)
+    finally:
+        await service.cleanup()
+
+    assert not httpserver.assertions
@@ -2,8 +2,10 @@ from datetime import datetime
 
 import gspread
 import pytest
+from pytest_mock import MockerFixture
 
-from requestor.google import GSService
+from requestor.google import GSService, SheetsClient
+from requestor.google.service import make_values_diff
 from requestor.models import ByModelLeaderboardRow, GlobalLeaderboardRow
 from requestor.settings import ServiceConfig
 
@@ -27,6 +29,7 @@ async def test_global_leaderboard(
     ]
 
     await gs_service.update_global_leaderboard(rows)
+    await gs_service.flush()
 
     actual_values = ws.get_all_values()
 
@@ -63,6 +66,7 @@ async def test_by_model_leaderboard(
     ]
 
     await gs_service.update_by_model_leaderboard(rows)
+    await gs_service.flush()
 
     actual_values = ws.get_all_values()
 
@@ -74,3 +78,78 @@ async def test_by_model_leaderboard(
     ]
 
     assert actual_values == expected_values
+
+
+async def test_leaderboard_updated_with_diff(
+    spreadsheet: gspread.Spreadsheet,
+    gs_service: GSService,
+    service_config: ServiceConfig,
+) -> None:
+    ws = spreadsheet.worksheet(service_config.gs_config.global_leaderboard_page_name)
+    header = ws.row_values(1)
+
+    rows = [
+        GlobalLeaderboardRow(team_name="team_1", best_score=50, n_attempts=2, last_attempt=None),
+        GlobalLeaderboardRow(team_name="team_2", best_score=30, n_attempts=3, last_attempt=None),
+        GlobalLeaderboardRow(team_name="team_3", best_score=10, n_attempts=1, last_attempt=None),
+    ]
+    await gs_service.update_global_leaderboard(rows)
+    await gs_service.flush()
+
+    rows = [rows[0], rows[1].copy(update={"n_attempts": 4})]
+    await gs_service.update_global_leaderboard(rows)
+    await gs_service.flush()
+
+    expected_values = [
+        header,
+        ["1", "team_1", "50", "2", "-"],
+        ["2", "team_2", "30", "4", "-"],
+    ]
+    assert ws.get_all_values() == expected_values
+
+
+class TestMakeValuesDiff:
+    def test_changed_rows_merged(self) -> None:
+        old = [[1, "a"], [2, "b"], [3, "c"], [4, "d"]]
+        new = [[1, "a"], [2, "x"], [3, "y"], [4, "d"], [5, "e"]]
+        assert make_values_diff(old, new) == [
+            {"range": "A3:E4", "values": [[2, "x"], [3, "y"]]},
+            {"range": "A6:E6", "values": [[5, "e"]]},
+        ]
+
+    def test_removed_rows_emptied(self) -> None:
+        old = [[1, "a"], [2, "b"], [3, "c"]]
+        new = [[1, "a"]]
+        assert make_values_diff(old, new) == [
+            {"range": "A3:E4", "values": [["", ""], ["", ""]]},
+        ]
+
+    def test_no_changes(self) -> None:
+        values = [[1, "a"], [2, "b"]]
+        assert make_values_diff(values, values) == []
+
+
+async def test_both_leaderboards_updated_with_one_request(
+    gs_service: GSService,
+    mocker: MockerFixture,
+) -> None:
+    spy = mocker.spy(SheetsClient, "values_batch_update")
+    global_rows = [
+        GlobalLeaderboardRow(team_name="team_1", best_score=50, n_attempts=2, last_attempt=None),
+    ]
+    by_model_rows = [
+        ByModelLeaderboardRow(
+            team_name="team_1",
+            model_name="m1",
+            best_score=50,
+            n_attempts=2,
+            last_attempt=datetime(2022, 10, 23, 15, 16, 17),
+        ),
+    ]
+
+    await gs_service.update_leaderboards(global_rows, by_model_rows)
+    await gs_service.flush()
+    await gs_service.update_leaderboards(global_rows, by_model_rows)
+    await gs_service.flush()
+
+    assert spy.call_count == 1  # Nothing changed at the second time
@@ -0,0 +1,129 @@
+import asyncio
+import typing as tp
+from http import HTTPStatus
+
+import pytest
+from pytest_mock import MockerFixture
+
+from requestor.google.exceptions import SheetsAPIError
+from requestor.google.write_queue import QuotaTracker, RetryPolicy, SheetsWriteQueue
+
+
+class TestQuotaTracker:
+    def test_requests_spaced_evenly(self, mocker: MockerFixture) -> None:
+        monotonic = mocker.patch("requestor.google.write_queue.time.monotonic", return_value=100)
+        quota = QuotaTracker(max_requests=60, period=60)
+        assert quota.get_delay() == 0
+
+        quota.add_request()
+        assert quota.get_delay() == 1
+
+        monotonic.return_value = 101
+        assert quota.get_delay() == 0
+
+    def test_window_is_full(self, mocker: MockerFixture) -> None:
+        monotonic = mocker.patch("requestor.google.write_queue.time.monotonic", return_value=100)
+        quota = QuotaTracker(max_requests=2, period=10)
+        quota.add_request()
+        monotonic.return_value = 105
+        quota.add_request()
+
+        monotonic.return_value = 106
+        assert quota.get_delay() == 4
+
+        monotonic.return_value = 110
+        assert quota.get_delay() == 0
+
+    def test_blocked(self, mocker: MockerFixture) -> None:
+        mocker.patch("requestor.google.write_queue.time.monotonic", return_value=100)
+        quota = QuotaTracker(max_requests=60, period=60)
+        quota.block(7)
+        assert quota.get_delay() == 7
+
+
+class FakeWriter:
+    def __init__(self, errors: tp.Sequence[Exception] = ()) -> None:
+        self.errors = list(errors)
+        self.calls: tp.List[tp.Dict[str, int]] = []
+
+    async def __call__(self, values: tp.Dict[str, int]) -> None:
+        self.calls.append(values)
+        if self.errors:
+            raise self.errors.pop(0)
+
+
+@pytest.mark.asyncio
+async def test_newer_values_replace_queued() -> None:
+    writer = FakeWriter()
+    queue = SheetsWriteQueue(writer, RetryPolicy(QuotaTracker(max_requests=1000), max_attempts=1))
+    queue.start()
+    try:
+        await asyncio.gather(queue.put({"a": 1, "b": 1}), queue.put({"a": 2}))
+    finally:
+        await queue.stop()
+
+    assert writer.calls == [{"a": 2, "b": 1}]
+
+
+@pytest.mark.asyncio
+async def test_rate_limited_write_retried(mocker: MockerFixture) -> None:
+    sleep = mocker.patch("requestor.google.write_queue.asyncio.sleep", wraps=asyncio.sleep)
+    writer = FakeWriter([SheetsAPIError(HTTPStatus.TOO_MANY_REQUESTS, "quota", retry_after=0.01)])
+    queue = SheetsWriteQueue(writer, RetryPolicy(QuotaTracker(max_requests=1000), max_attempts=2))
+    queue.start()
+    try:
+        await queue.put({"a": 1})
+    finally:
+        await queue.stop()
+
+    assert writer.calls == [{"a": 1}, {"a": 1}]
+    assert sleep.call_args_list[-1].args[0] >= 0.009
+
+
+@pytest.mark.asyncio
+async def test_write_fails_after_max_attempts() -> None:
+    error = SheetsAPIError(HTTPStatus.TOO_MANY_REQUESTS, "quota", retry_after=0.01)
+    writer = FakeWriter([error, error])
+    queue = SheetsWriteQueue(writer, RetryPolicy(QuotaTracker(max_requests=1000), max_attempts=2))
+    queue.start()
+    try:
+        with pytest.raises(SheetsAPIError):
+            await queue.put({"a": 1})
+    finally:
+        await queue.stop()
+
+    assert len(writer.calls) == 2
+
+
+@pytest.mark.asyncio
+async def test_other_errors_not_retried() -> None:
+    writer = FakeWriter([SheetsAPIError(HTTPStatus.BAD_REQUEST, "bad range")])
+    queue = SheetsWriteQueue(writer, RetryPolicy(QuotaTracker(max_requests=1000), max_attempts=5))
+    queue.start()
+    try:
+        with pytest.raises(SheetsAPIError):
+            await queue.put({"a": 1})
+    finally:
+        await queue.stop()
+
+    assert len(writer.calls) == 1
+
+
+@pytest.mark.asyncio
+async def test_submit_not_waiting_for_write() -> None:
+    can_write = asyncio.Event()
+
+    async def write(values: tp.Dict[str, int]) -> None:
+        await can_write.wait()
+
+    queue = SheetsWriteQueue(write, RetryPolicy(QuotaTracker(max_requests=1000), max_attempts=1))
+    queue.start()
+    try:
+        waiter = queue.submit({"a": 1})
+        await asyncio.sleep(0)
+        assert not waiter.done()
+
+        can_write.set()
+        await waiter
+    finally:
+        await queue.stop()
@@ -0,0 +1,48 @@
+import pytest
+
+from requestor.leaderboard import LeaderboardCache
+from requestor.models import GlobalLeaderboardRow
+
+pytestmark = pytest.mark.asyncio
+
+GLOBAL_ROWS = [
+    GlobalLeaderboardRow(team_name="team_1", best_score=0.5, n_attempts=2, last_attempt=None),
+    GlobalLeaderboardRow(team_name="team_2", best_score=0.3, n_attempts=1, last_attempt=None),
+    GlobalLeaderboardRow(team_name="team_3", best_score=None, n_attempts=0, last_attempt=None),
+]
+
+
+async def test_cache_not_ready_before_update() -> None:
+    cache = LeaderboardCache()
+    assert not cache.is_ready
+    assert cache.get_top(10) == []
+    assert cache.get_team_rank("team_1") is None
+
+
+async def test_team_rank() -> None:
+    cache = LeaderboardCache()
+    await cache.update_leaderboards(global_rows=GLOBAL_ROWS)
+
+    assert cache.is_ready
+    team_rank = cache.get_team_rank("team_2")
+    assert team_rank is not None
+    assert (team_rank.rank, team_rank.n_teams, team_rank.row) == (2, 3, GLOBAL_ROWS[1])
+    assert cache.get_team_rank("unknown") is None
+
+
+async def test_top_teams() -> None:
+    cache = LeaderboardCache()
+    await cache.update_leaderboards(global_rows=GLOBAL_ROWS)
+    assert cache.get_top(2) == GLOBAL_ROWS[:2]
+    assert cache.get_top(10) == GLOBAL_ROWS
+
+
+async def test_snapshot_replaced() -> None:
+    cache = LeaderboardCache()
+    await cache.update_leaderboards(global_rows=GLOBAL_ROWS)
+    await cache.update_leaderboards(global_rows=GLOBAL_ROWS[::-1])
+    # Leaderboard without global rows doesn't change snapshot
+    await cache.update_leaderboards(by_model_rows=[])
+
+    assert cache.get_top(1) == [GLOBAL_ROWS[2]]
+    assert cache.ranks == {"team_3": 1, "team_2": 2, "team_1": 3}
@@ -0,0 +1,105 @@
+import gzip
+import json
+import typing as tp
+from datetime import datetime
+from pathlib import Path
+
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestClient, TestServer
+
+from requestor.leaderboard import FileLeaderboardSink, register_leaderboard_routes
+from requestor.models import ByModelLeaderboardRow, GlobalLeaderboardRow
+
+pytestmark = pytest.mark.asyncio
+
+GLOBAL_ROWS = [
+    GlobalLeaderboardRow(
+        team_name="team_1",
+        best_score=0.5,
+        n_attempts=2,
+        last_attempt=datetime(2022, 10, 23, 15, 16, 17),
+    ),
+    GlobalLeaderboardRow(team_name="<team_2>", best_score=None, n_attempts=0, last_attempt=None),
+]
+BY_MODEL_ROWS = [
+    ByModelLeaderboardRow(
+        team_name="team_1",
+        model_name="m1",
+        best_score=0.5,
+        n_attempts=2,
+        last_attempt=datetime(2022, 10, 23, 15, 16, 17),
+    ),
+]
+
+
+@pytest.fixture(name="file_sink")
+async def file_sink_fixture(tmp_path: Path) -> FileLeaderboardSink:
+    sink = FileLeaderboardSink(root_dir=tmp_path / "leaderboard")
+    await sink.setup()
+    await sink.update_leaderboards(GLOBAL_ROWS, BY_MODEL_ROWS)
+    return sink
+
+
+async def test_files_written(file_sink: FileLeaderboardSink) -> None:
+    root_dir = file_sink.root_dir
+    assert sorted(path.name for path in root_dir.iterdir()) == sorted(
+        f"{name}.{ext}{gz}"
+        for name in ("global", "by_model")
+        for ext in ("html", "csv", "json")
+        for gz in ("", ".gz")
+    )
+
+    assert json.loads((root_dir / "global.json").read_text())[1] == {
+        "team_name": "<team_2>",
+        "best_score": None,
+        "n_attempts": 0,
+        "last_attempt": None,
+    }
+    assert (root_dir / "global.csv").read_text().splitlines() == [
+        "team_name,best_score,n_attempts,last_attempt",
+        "team_1,0.5,2,2022-10-23 15:16:17",
+        "<team_2>,,0,",
+    ]
+    assert "<td>&lt;team_2&gt;</td>" in (root_dir / "global.html").read_text()
+    assert (
+        gzip.decompress((root_dir / "by_model.csv.gz").read_bytes())
+        == (root_dir / "by_model.csv").read_bytes()
+    )
+
+
+async def test_files_replaced(file_sink: FileLeaderboardSink) -> None:
+    etag = file_sink.files["global.json"].etag
+    await file_sink.update_leaderboards(global_rows=GLOBAL_ROWS[:1])
+
+    assert len(json.loads((file_sink.root_dir / "global.json").read_text())) == 1
+    assert file_sink.files["global.json"].etag != etag
+    # No temporary files are left
+    assert not [path for path in file_sink.root_dir.iterdir() if path.name.startswith(".")]
+
+
+class TestServing:
+    @pytest.fixture
+    async def client(self, file_sink: FileLeaderboardSink) -> tp.AsyncGenerator[TestClient, None]:
+        web_app = web.Application()
+        register_leaderboard_routes(web_app, file_sink, "/leaderboard")
+        client = TestClient(TestServer(web_app))
+        await client.start_server()
+        yield client
+        await client.close()
+
+    async def test_gzipped(self, client: TestClient, file_sink: FileLeaderboardSink) -> None:
+        resp = await client.get("/leaderboard/global.json", headers={"Accept-Encoding": "gzip"})
+        assert resp.status == 200
+        assert resp.headers["Content-Encoding"] == "gzip"
+        assert resp.headers["ETag"] == file_sink.files["global.json"].etag
+        assert await resp.read() == file_sink.files["global.json"].content
+
+    async def test_not_modified(self, client: TestClient, file_sink: FileLeaderboardSink) -> None:
+        etag = file_sink.files["by_model.html"].etag
+        resp = await client.get("/leaderboard/by_model.html", headers={"If-None-Match": etag})
+        assert resp.status == 304
+
+    async def test_not_found(self, client: TestClient) -> None:
+        resp = await client.get("/leaderboard/unknown.html")
+        assert resp.status == 404
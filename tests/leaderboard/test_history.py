@@ -0,0 +1,69 @@
+from datetime import datetime
+
+import pytest
+
+from requestor.db import LeaderboardRepository
+from requestor.leaderboard import (
+    HistoryLeaderboardSink,
+    make_rank_history,
+    render_rank_history_csv,
+    render_rank_history_svg,
+)
+from requestor.models import GlobalLeaderboardRow, LeaderboardSnapshot
+
+SNAPSHOTS = [
+    LeaderboardSnapshot(
+        created_at=datetime(2022, 10, 1, 12), team_names=["a", "b"], scores=[0.5, None]
+    ),
+    LeaderboardSnapshot(
+        created_at=datetime(2022, 10, 2, 12), team_names=["c", "a"], scores=[0.7, 0.5]
+    ),
+    LeaderboardSnapshot(
+        created_at=datetime(2022, 10, 3, 12), team_names=["a", "c", "b"], scores=[0.8, 0.7, 0.1]
+    ),
+]
+
+
+def test_make_rank_history() -> None:
+    history = make_rank_history(SNAPSHOTS)
+    assert history.timestamps == [snapshot.created_at for snapshot in SNAPSHOTS]
+    assert history.ranks == {"a": [1, 2, 1], "b": [2, None, 3], "c": [None, 1, 2]}
+
+
+def test_render_rank_history_csv() -> None:
+    content = render_rank_history_csv(make_rank_history(SNAPSHOTS))
+    assert content.decode().splitlines() == [
+        "created_at,a,b,c",
+        "2022-10-01 12:00:00,1,2,",
+        "2022-10-02 12:00:00,2,,1",
+        "2022-10-03 12:00:00,1,3,2",
+    ]
+
+
+def test_render_rank_history_svg() -> None:
+    content = render_rank_history_svg(make_rank_history(SNAPSHOTS), "<Ranks>").decode()
+    assert content.startswith("<svg") and content.endswith("</svg>")
+    assert "&lt;Ranks&gt;" in content
+    # Line of team which is absent in the middle is broken into points
+    assert content.count("<polyline") == 2
+    assert content.count("<circle") == 2
+
+
+def test_render_empty_rank_history() -> None:
+    history = make_rank_history([])
+    assert render_rank_history_csv(history).decode().splitlines() == ["created_at"]
+    assert render_rank_history_svg(history, "Ranks").startswith(b"<svg")
+
+
+@pytest.mark.asyncio
+async def test_history_sink_saves_global_leaderboard(
+    leaderboard_repository: LeaderboardRepository,
+) -> None:
+    sink = HistoryLeaderboardSink(leaderboard_repository=leaderboard_repository, metric="metric")
+    rows = [GlobalLeaderboardRow(team_name="a", best_score=0.5, n_attempts=1, last_attempt=None)]
+
+    await sink.update_leaderboards(global_rows=rows)
+    await sink.update_leaderboards(by_model_rows=[])
+
+    snapshots = await leaderboard_repository.get_leaderboard_snapshots("metric")
+    assert [(s.team_names, s.scores) for s in snapshots] == [(["a"], [0.5])]
@@ -0,0 +1,150 @@
+import asyncio
+import typing as tp
+from pathlib import Path
+
+import pytest
+from asyncmock import AsyncMock
+from pytest_mock import MockerFixture
+
+from requestor.db import LeaderboardRepository
+from requestor.google import GSService
+from requestor.leaderboard import FileLeaderboardSink, LeaderboardPublisher, update_leaderboards
+
+pytestmark = pytest.mark.asyncio
+
+
+@pytest.fixture(name="gs_service")
+def gs_service_fixture(mocker: MockerFixture) -> GSService:
+    for method in ("setup", "cleanup", "update_leaderboards"):
+        mocker.patch.object(GSService, method, new=AsyncMock())
+    return GSService(
+        credentials="",
+        url="",
+        global_leaderboard_page_name="",
+        global_leaderboard_page_max_rows=0,
+        by_model_leaderboard_page_name="",
+        by_model_leaderboard_page_max_rows=0,
+    )
+
+
+def make_publisher(
+    leaderboard_repository: LeaderboardRepository, gs_service: GSService, publish_interval: float
+) -> LeaderboardPublisher:
+    return LeaderboardPublisher(
+        leaderboard_repository=leaderboard_repository,
+        sinks=[gs_service],
+        metric="metric_1",
+        publish_interval=publish_interval,
+    )
+
+
+async def test_marks_are_coalesced(
+    leaderboard_repository: LeaderboardRepository, gs_service: GSService
+) -> None:
+    publisher = make_publisher(leaderboard_repository, gs_service, publish_interval=0.5)
+    update_mock = tp.cast(AsyncMock, gs_service.update_leaderboards)
+    await publisher.setup()
+    try:
+        for _ in range(5):
+            publisher.mark_dirty()
+        await asyncio.sleep(0.1)
+        assert update_mock.call_count == 1
+
+        publisher.mark_dirty()
+        publisher.mark_dirty()
+        await asyncio.sleep(0.1)
+        assert update_mock.call_count == 1
+
+        await asyncio.sleep(0.5)
+        assert update_mock.call_count == 2
+    finally:
+        await publisher.cleanup()
+
+
+async def test_not_published_without_changes(
+    leaderboard_repository: LeaderboardRepository, gs_service: GSService
+) -> None:
+    publisher = make_publisher(leaderboard_repository, gs_service, publish_interval=0.1)
+    await publisher.setup()
+    await asyncio.sleep(0.3)
+    await publisher.cleanup()
+    tp.cast(AsyncMock, gs_service.update_leaderboards).assert_not_called()
+
+
+async def test_pending_changes_published_on_cleanup(
+    leaderboard_repository: LeaderboardRepository, gs_service: GSService
+) -> None:
+    publisher = make_publisher(leaderboard_repository, gs_service, publish_interval=10)
+    await publisher.setup()
+    publisher.mark_dirty()
+    await asyncio.sleep(0.1)
+    publisher.mark_dirty()
+    await publisher.cleanup()
+    assert tp.cast(AsyncMock, gs_service.update_leaderboards).call_count == 2
+
+
+async def test_failed_publication_retried(
+    leaderboard_repository: LeaderboardRepository, gs_service: GSService
+) -> None:
+    update_mock = tp.cast(AsyncMock, gs_service.update_leaderboards)
+    update_mock.side_effect = [RuntimeError("quota exceeded"), None]
+    publisher = make_publisher(leaderboard_repository, gs_service, publish_interval=0.1)
+    await publisher.setup()
+    try:
+        publisher.mark_dirty()
+        await asyncio.sleep(0.3)
+        assert update_mock.call_count == 2
+    finally:
+        await publisher.cleanup()
+
+
+async def test_sink_failure_not_blocks_others(
+    leaderboard_repository: LeaderboardRepository, gs_service: GSService, tmp_path: Path
+) -> None:
+    tp.cast(AsyncMock, gs_service.update_leaderboards).side_effect = RuntimeError("rate limit")
+    file_sink = FileLeaderboardSink(root_dir=tmp_path)
+    await file_sink.setup()
+
+    with pytest.raises(RuntimeError):
+        await update_leaderboards(leaderboard_repository, [gs_service, file_sink], "metric_1")
+    assert (tmp_path / "global.json").read_text() == "[]"
+
+
+async def test_sink_setup_failure_not_blocks_others(
+    leaderboard_repository: LeaderboardRepository,
+    gs_service: GSService,
+    tmp_path: Path,
+    caplog: pytest.LogCaptureFixture,
+) -> None:
+    setup_mock = tp.cast(AsyncMock, gs_service.setup)
+    setup_mock.side_effect = [RuntimeError("Sheets API is unavailable"), None]
+    file_sink = FileLeaderboardSink(root_dir=tmp_path / "leaderboard")
+    publisher = LeaderboardPublisher(
+        leaderboard_repository=leaderboard_repository,
+        sinks=[gs_service, file_sink],
+        metric="metric_1",
+        publish_interval=0.1,
+    )
+    await publisher.setup()
+    try:
+        publisher.mark_dirty()
+        await asyncio.sleep(0.05)
+        assert (tmp_path / "leaderboard" / "global.json").exists()
+        tp.cast(AsyncMock, gs_service.update_leaderboards).assert_not_called()
+        status = publisher.get_status()
+        assert status.synced_at is None
+        assert status.n_pending_sinks == 1
+        assert status.last_error is not None
+        assert f"Leaderboard sinks setup failed: {status.json()}" in caplog.messages
+
+        # Sink is set up again on retry
+        await asyncio.sleep(0.2)
+        assert setup_mock.call_count == 2
+        tp.cast(AsyncMock, gs_service.update_leaderboards).assert_called_once()
+        status = publisher.get_status()
+        assert status.synced_at is not None
+        assert status.n_pending_sinks == 0
+        assert status.last_error is None
+    finally:
+        await publisher.cleanup()
+    tp.cast(AsyncMock, gs_service.cleanup).assert_called_once()
@@ -0,0 +1,48 @@
+from uuid import uuid4
+
+import numpy as np
+import pytest
+
+from requestor.models import UserMetrics
+from requestor.storage import StorageService, UserMetricsNotFoundError
+
+pytestmark = pytest.mark.asyncio
+
+
+def make_user_metrics(ap_shift: float = 0) -> UserMetrics:
+    return UserMetrics(
+        users=np.array([10, 20, 30]),
+        ap=np.array([0, 0.5, 0.25]) + ap_shift,
+        hits=np.array([0, 2, 1]),
+    )
+
+
+@pytest.mark.parametrize("mmap", (True, False))
+async def test_save_and_load_user_metrics(storage_service: StorageService, mmap: bool) -> None:
+    trial_id = uuid4()
+    user_metrics = make_user_metrics()
+
+    await storage_service.save_user_metrics(trial_id, user_metrics)
+    actual = await storage_service.load_user_metrics(trial_id, mmap=mmap)
+
+    assert isinstance(actual.ap, np.memmap) == mmap
+    np.testing.assert_array_equal(actual.users, user_metrics.users)
+    np.testing.assert_allclose(actual.ap, user_metrics.ap)
+    np.testing.assert_array_equal(actual.hits, user_metrics.hits)
+    assert actual.ap.dtype == np.float32
+    assert actual.hits.dtype == np.uint16
+
+
+async def test_save_user_metrics_overwrites(storage_service: StorageService) -> None:
+    trial_id = uuid4()
+    await storage_service.save_user_metrics(trial_id, make_user_metrics())
+    await storage_service.save_user_metrics(trial_id, make_user_metrics(ap_shift=0.1))
+
+    actual = await storage_service.load_user_metrics(trial_id)
+
+    np.testing.assert_allclose(actual.ap, [0.1, 0.6, 0.35], rtol=1e-6)
+
+
+async def test_load_nonexistent_user_metrics(storage_service: StorageService) -> None:
+    with pytest.raises(UserMetricsNotFoundError):
+        await storage_service.load_user_metrics(uuid4())